@@ -1,13 +1,21 @@
 #!/usr/bin/env python3
 """
 Batch PDF Generator
-Converts multiple HTML files to PDF in one operation.
+Converts multiple HTML (or Markdown) files to PDF in one operation.
 """
 
 import os
 import sys
+import time
+import queue
+import argparse
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from fnmatch import fnmatch
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 # Try to load .env file if python-dotenv is available
 try:
@@ -20,37 +28,274 @@ except ImportError:
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
-from generator import PDFGenerator
+from bulk import bulk_generate
+from generator import PDFGenerator, configure_logging
+from manifest import DONE, FAILED, RUNNING, BatchManifest, read_source, source_digest
+from optimizer import HTMLOptimizer
+from ratelimit import RateLimiter
+from templates import TemplateStore
+
+# generate_pdf() options that change the rendered output, with their defaults
+RENDER_OPTIONS = {"page_format": "A4", "print_background": True, "wait_for": "networkidle0"}
+
+MARKDOWN_SUFFIXES = (".md", ".markdown")
+
+# Per-process Markdown renderer, created on first use
+_markdown_renderer = None
+
+
+def source_to_html(data: bytes, path: Path) -> str:
+    """
+    Default preprocessor: turn an input file's bytes into the HTML to render.
+
+    Markdown files (.md, .markdown) are converted and wrapped in the
+    default document shell; anything else is taken as HTML.
+    """
+    text = data.decode("utf-8")
+    if path.suffix.lower() not in MARKDOWN_SUFFIXES:
+        return text
+    global _markdown_renderer
+    if _markdown_renderer is None:
+        from markdown_renderer import MarkdownRenderer
+
+        _markdown_renderer = MarkdownRenderer()
+    return _markdown_renderer.render(text)
+
+
+def _preprocess(
+    preprocessor: Callable[[bytes, Path], str], path: Path
+) -> Tuple[str, Tuple[int, int], str, float]:
+    """Worker-process job: read and preprocess one file, returning (digest, stat, html, seconds)."""
+    started = time.perf_counter()
+    data, stat = read_source(path)
+    html_content = preprocessor(data, path)
+    return source_digest(data), stat, html_content, time.perf_counter() - started
+
+
+class StageStats:
+    """Throughput, utilization and input queue depth of one pipeline stage."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.depth_sum = 0
+        self.depth_samples = 0
+        self.depth_max = 0
+        self.started = time.perf_counter()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """Count one processed item that kept a worker busy for seconds."""
+        with self._lock:
+            self.items += 1
+            self.busy += seconds
+
+    def sample_depth(self, depth: int):
+        """Record the number of items waiting for (or in) this stage."""
+        with self._lock:
+            self.depth_sum += depth
+            self.depth_samples += 1
+            self.depth_max = max(self.depth_max, depth)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            elapsed = max((self.finished or time.perf_counter()) - self.started, 1e-9)
+            return {
+                "stage": self.name,
+                "workers": self.workers,
+                "items": self.items,
+                "elapsed": elapsed,
+                "throughput": self.items / elapsed,
+                "utilization": self.busy / (self.workers * elapsed),
+                "queue_depth_avg": self.depth_sum / self.depth_samples if self.depth_samples else 0.0,
+                "queue_depth_max": self.depth_max,
+            }
+
+    def __str__(self):
+        stats = self.as_dict()
+        return (
+            f"{self.name}: {stats['items']} file(s) at {stats['throughput']:.1f}/s "
+            f"with {self.workers} worker(s), {stats['utilization']:.0%} busy, "
+            f"queue depth avg {stats['queue_depth_avg']:.1f} max {stats['queue_depth_max']}"
+        )
+
+
+def _matches(relative: str, patterns: Sequence[str]) -> bool:
+    """Match a posix relative path against globs; globs without "/" match the name."""
+    name = relative.rsplit("/", 1)[-1]
+    return any(fnmatch(relative if "/" in pattern else name, pattern) for pattern in patterns)
+
+
+def walk_files(
+    root: Path,
+    include: Sequence[str] = ("*.html",),
+    exclude: Sequence[str] = (),
+    recursive: bool = True,
+) -> Iterator[Path]:
+    """
+    Lazily yield files under root matching include and not exclude.
+
+    Directories are read one at a time, so the first path is yielded as
+    soon as the first directory has been listed and memory does not grow
+    with the size of the tree. Paths come out in a stable order (files,
+    then subdirectories, each sorted by name). Symlinked directories are
+    not followed.
+
+    Args:
+        root: Directory to search.
+        include: Globs a file must match, e.g. "*.html" or "reports/*.htm".
+        exclude: Globs of files or directories to skip, e.g. "drafts" or "*.tmp.html".
+        recursive: Descend into subdirectories.
+
+    Globs containing "/" match the path relative to root; others match the
+    file or directory name.
+    """
+    root = Path(root)
+    stack = [(root, "")]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            with os.scandir(directory) as scanner:
+                entries = sorted(scanner, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            relative = prefix + entry.name
+            if exclude and _matches(relative, exclude):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append((Path(entry.path), relative + "/"))
+            elif entry.is_file() and _matches(relative, include):
+                yield Path(entry.path)
+        if recursive:
+            stack.extend(reversed(subdirectories))
 
 
 class BatchPDFGenerator:
     """Handles batch conversion of HTML files to PDF."""
 
-    def __init__(self):
-        """Initialize the batch generator."""
-        self.generator = PDFGenerator()
+    def __init__(
+        self,
+        generator: PDFGenerator = None,
+        jobs: int = 1,
+        rate_limiter: RateLimiter = None,
+        backend: str = None,
+        optimizer: HTMLOptimizer = None,
+        manifest: Union[BatchManifest, bool] = True,
+        force: bool = False,
+        processes: int = 0,
+        preprocessor: Callable[[bytes, Path], str] = source_to_html,
+        queue_size: int = None,
+    ):
+        """
+        Initialize the batch generator.
+
+        Args:
+            generator: Optional PDFGenerator to reuse. If None, a new one is
+                created and its pooled session is shared by every file.
+            jobs: Default number of files converted concurrently.
+            rate_limiter: Optional RateLimiter for the generator created here.
+            backend: Rendering backend for the generator created here
+                ("doppio", "local" or "auto").
+            optimizer: Optional HTMLOptimizer for the generator created here.
+            manifest: BatchManifest recording every input's hash, options,
+                output and status, so re-runs skip up-to-date outputs and
+                retry failures. True uses output/batch_manifest.jsonl;
+                False renders every file on every run.
+            force: Render every file even if the manifest says it is up to date.
+            processes: When above 0, preprocess files (reading, Markdown
+                conversion) in this many worker processes and upload from
+                `jobs` threads, with bounded queues in between.
+            preprocessor: Callable(bytes, path) -> HTML run on every input;
+                it must be picklable (a module-level function) when
+                processes is set. Defaults to source_to_html().
+            queue_size: Bound of each queue between pipeline stages
+                (default: twice the larger of jobs and processes).
+        """
+        self.jobs = max(1, jobs)
+        self.generator = generator or PDFGenerator(
+            pool_maxsize=max(10, self.jobs),
+            rate_limiter=rate_limiter,
+            backend=backend,
+            optimizer=optimizer,
+        )
+        self._owns_generator = generator is None
         self.base_dir = Path(__file__).parent
         self.src_dir = self.base_dir / "src"
         self.output_dir = self.base_dir / "output"
+        self._owns_manifest = manifest is True
+        if manifest is True:
+            manifest = BatchManifest(self.output_dir / "batch_manifest.jsonl")
+        self.manifest = manifest or None
+        self.force = force
+        self.processes = max(0, processes)
+        self.preprocessor = preprocessor
+        self.queue_size = queue_size
+        self.pipeline_stats: List[StageStats] = []
         self.success_count = 0
         self.failure_count = 0
+        self.skipped_count = 0
         self.results = []
+        self.failures = []
+        self._lock = threading.Lock()
+
+    def close(self):
+        """Close the underlying generator and manifest if this batch created them."""
+        if self._owns_generator:
+            self.generator.close()
+        if self._owns_manifest:
+            self.manifest.close()
 
-    def find_html_files(self, directory: Path = None) -> List[Path]:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def find_html_files(self, directory: Path = None, **kwargs) -> List[Path]:
         """
         Find all HTML files in a directory.
 
         Args:
             directory: Directory to search (defaults to src/)
+            **kwargs: Options for iter_html_files() (recursive defaults to False)
+
+        Returns:
+            Sorted list of HTML file paths
+        """
+        kwargs.setdefault("recursive", False)
+        return sorted(self.iter_html_files(directory, **kwargs))
+
+    def iter_html_files(
+        self,
+        directory: Path = None,
+        include: Sequence[str] = ("*.html",),
+        exclude: Sequence[str] = (),
+        recursive: bool = True,
+    ) -> Iterator[Path]:
+        """
+        Lazily yield the HTML files in a directory tree (see walk_files()).
+
+        Args:
+            directory: Directory to search (defaults to src/)
+            include: Globs of files to convert
+            exclude: Globs of files or directories to skip
+            recursive: Descend into subdirectories
 
         Returns:
-            List of HTML file paths
+            Iterator of HTML file paths
         """
         if directory is None:
             directory = self.src_dir
-
-        html_files = list(directory.glob("*.html"))
-        return sorted(html_files)
+        return walk_files(directory, include, exclude, recursive)
 
     def convert_file(
         self, html_file: Path, output_name: str = None, **kwargs
@@ -63,42 +308,331 @@ class BatchPDFGenerator:
             output_name: Optional custom output filename
             **kwargs: Additional arguments for PDF generation
 
+        Files the manifest records as rendered with the same content and
+        options are skipped (unless force is set) and count as successes.
+
         Returns:
             Tuple of (success: bool, message: str)
         """
+        output_name, output_path, options = self._target(html_file, output_name, kwargs)
         try:
-            # Generate output filename
-            if output_name is None:
-                output_name = html_file.stem + ".pdf"
-
-            print(f"\n📄 Processing: {html_file.name}")
+            # Unchanged size and mtime: skip without reading the file
+            if self._is_current(html_file, options, output_path):
+                return self._skipped(output_path)
 
             # Read HTML content
-            with open(html_file, "r", encoding="utf-8") as f:
-                html_content = f.read()
+            data, stat = read_source(html_file)
+            html_content = self.preprocessor(data, html_file)
+        except Exception as e:
+            return self._failed(html_file, options, output_path, None, e)
+
+        return self._render(
+            html_file, html_content, source_digest(data), output_name, options, kwargs, stat
+        )
+
+    def _target(self, html_file: Path, output_name: Optional[str], kwargs: dict):
+        """Return (output_name, output_path, manifest options) for an input."""
+        # Generate output filename
+        if output_name is None:
+            output_name = html_file.stem + ".pdf"
+        output_path = self.generator.output_path(output_name)
+        options = {**RENDER_OPTIONS, **kwargs}
+        options.pop("use_cache", None)
+        # Preprocessors with a fingerprint (e.g. MarkdownPipeline rules)
+        # invalidate the manifest entries rendered with other settings
+        fingerprint = getattr(self.preprocessor, "fingerprint", None)
+        if fingerprint is not None:
+            options["preprocessor"] = fingerprint
+        return output_name, output_path, options
+
+    def _is_current(
+        self, html_file: Path, options: dict, output_path: Path, digest: Optional[str] = None
+    ) -> bool:
+        if self.manifest is None or self.force:
+            return False
+        return self.manifest.is_up_to_date(html_file, options, output_path, digest)
+
+    def _render(
+        self,
+        html_file: Path,
+        html_content: str,
+        digest: str,
+        output_name: str,
+        options: dict,
+        kwargs: dict,
+        stat: Optional[Tuple[int, int]] = None,
+    ) -> Tuple[bool, str]:
+        """
+        Render a preprocessed input and record the outcome.
+
+        digest and stat describe the bytes html_content was made from, so
+        an edit during the render is still seen as a change next run.
+        """
+        manifest = self.manifest
+        output_path = self.generator.output_path(output_name)
+        try:
+            # Touched but identical content: refresh the record and skip
+            if self._is_current(html_file, options, output_path, digest):
+                manifest.record(html_file, DONE, options, output_path, digest, source_stat=stat)
+                return self._skipped(output_path)
+
+            print(f"\n📄 Processing: {html_file.name}")
+            if manifest is not None:
+                manifest.record(html_file, RUNNING, options, output_path, digest, source_stat=stat)
 
             # Generate PDF
             output_path = self.generator.generate_pdf(
                 html_content=html_content, output_filename=output_name, **kwargs
             )
 
-            self.success_count += 1
+            if manifest is not None:
+                manifest.record(html_file, DONE, options, output_path, digest, source_stat=stat)
+            with self._lock:
+                self.success_count += 1
             message = f"✅ Success → {output_path.name}"
             return True, message
 
         except Exception as e:
+            return self._failed(html_file, options, output_path, digest, e)
+
+    def _failed(
+        self,
+        html_file: Path,
+        options: dict,
+        output_path: Path,
+        digest: Optional[str],
+        error: Exception,
+    ) -> Tuple[bool, str]:
+        if self.manifest is not None:
+            self.manifest.record(html_file, FAILED, options, output_path, digest, str(error))
+        with self._lock:
             self.failure_count += 1
-            message = f"❌ Failed: {str(e)}"
-            return False, message
+        return False, f"❌ Failed: {str(error)}"
+
+    def _skipped(self, output_path: Path) -> Tuple[bool, str]:
+        with self._lock:
+            self.skipped_count += 1
+        return True, f"⏭️  Up to date → {output_path.name}"
+
+    def iter_convert(
+        self,
+        html_files: Iterable[Path],
+        jobs: int = None,
+        root: Optional[Path] = None,
+        **kwargs,
+    ) -> Iterator[Tuple[str, bool, str]]:
+        """
+        Convert HTML files as they are produced, yielding results in input order.
+
+        html_files is consumed lazily: at most 2 * jobs files are queued or
+        rendering at any time, so conversion starts with the first path and
+        memory stays flat however many files there are. Failures are kept
+        in self.failures; successful results are not retained.
+
+        Args:
+            html_files: HTML files to convert, e.g. from iter_html_files()
+            jobs: Number of concurrent conversions (defaults to self.jobs)
+            root: Directory the files were found in. When set, outputs mirror
+                the tree under output/ (root/a/b.html -> output/a/b.pdf).
+            **kwargs: Additional arguments for PDF generation
+
+        Yields:
+            Tuples (filename, success, message); filename is relative to
+            root when root is set.
+        """
+        jobs = max(1, jobs or self.jobs)
+
+        def convert(html_file: Path) -> Tuple[str, bool, str]:
+            name, output_name = self._names(html_file, root)
+            success, message = self.convert_file(html_file, output_name, **kwargs)
+            return name, success, message
+
+        def record(result: Tuple[str, bool, str]) -> Tuple[str, bool, str]:
+            if not result[1]:
+                self.failures.append(result)
+            return result
+
+        if self.processes:
+            for result in self._iter_pipeline(html_files, jobs, root, kwargs):
+                yield record(result)
+            return
+
+        if jobs == 1:
+            for html_file in html_files:
+                yield record(convert(html_file))
+            return
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            # Bounded window of futures, drained in submission order
+            pending = deque()
+            for html_file in html_files:
+                pending.append(executor.submit(convert, html_file))
+                if len(pending) >= 2 * jobs:
+                    yield record(pending.popleft().result())
+            while pending:
+                yield record(pending.popleft().result())
+
+    @staticmethod
+    def _names(html_file: Path, root: Optional[Path]) -> Tuple[str, Optional[str]]:
+        """Return (display name, output name) of an input, mirroring root if set."""
+        if root is None:
+            return html_file.name, None
+        relative = html_file.relative_to(root)
+        return relative.as_posix(), str(relative.with_suffix(".pdf"))
+
+    def _iter_pipeline(
+        self, html_files: Iterable[Path], jobs: int, root: Optional[Path], kwargs: dict
+    ) -> Iterator[Tuple[str, bool, str]]:
+        """
+        Convert files in two stages: preprocessing in self.processes worker
+        processes, then uploading from `jobs` threads sharing the generator.
+
+        A feeder thread walks html_files, skips up-to-date files, and keeps
+        at most queue_size files in the process pool; finished documents go
+        through a queue of the same bound to the uploader threads. Results
+        are tagged with their input position and held in a reorder buffer
+        until the ones before them are yielded, so they come out in input
+        order; the feeder stays at most `window` files ahead of the consumer,
+        which bounds the buffer. Per-stage statistics are left in
+        self.pipeline_stats.
+        """
+        queue_size = self.queue_size or 2 * max(jobs, self.processes)
+        window = 2 * queue_size + jobs
+        slots = threading.Semaphore(window)
+        preprocess_stats = StageStats("preprocess", self.processes)
+        upload_stats = StageStats("upload", jobs)
+        self.pipeline_stats = [preprocess_stats, upload_stats]
+        uploads = queue.Queue(maxsize=queue_size)
+        results = queue.Queue()
+        stop = threading.Event()
+        feeder_error = []
+        done = object()
+
+        def feed(pool: ProcessPoolExecutor):
+            pending = {}
+
+            def drain(block: bool):
+                finished, _ = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index, html_file, name, output_name, options = pending.pop(future)
+                    try:
+                        digest, stat, html_content, seconds = future.result()
+                    except Exception as e:
+                        output_path = self.generator.output_path(output_name)
+                        failed = self._failed(html_file, options, output_path, None, e)
+                        results.put((index, (name, *failed)))
+                        continue
+                    preprocess_stats.record(seconds)
+                    # Blocks while the uploaders are behind (backpressure)
+                    uploads.put(
+                        (index, html_file, name, output_name, options, digest, stat, html_content)
+                    )
+                    upload_stats.sample_depth(uploads.qsize())
+
+            try:
+                for index, html_file in enumerate(html_files):
+                    # Wait for the consumer to catch up, moving finished
+                    # documents on meanwhile: one of them may be the next
+                    # result it is waiting for
+                    while not slots.acquire(blocking=False):
+                        if pending:
+                            drain(block=True)
+                        else:
+                            slots.acquire()
+                            break
+                    if stop.is_set():
+                        break
+                    name, output_name = self._names(html_file, root)
+                    output_name, output_path, options = self._target(html_file, output_name, kwargs)
+                    if self._is_current(html_file, options, output_path):
+                        results.put((index, (name, *self._skipped(output_path))))
+                        continue
+                    future = pool.submit(_preprocess, self.preprocessor, html_file)
+                    pending[future] = (index, html_file, name, output_name, options)
+                    preprocess_stats.sample_depth(len(pending))
+                    drain(block=len(pending) >= queue_size)
+                while pending:
+                    drain(block=True)
+            except BaseException as e:
+                feeder_error.append(e)
+                for future in pending:
+                    future.cancel()
+            finally:
+                preprocess_stats.finish()
+                for _ in range(jobs):
+                    uploads.put(None)
+
+        def upload():
+            while True:
+                item = uploads.get()
+                if item is None:
+                    results.put(done)
+                    return
+                index, html_file, name, output_name, options, digest, stat, html_content = item
+                if stop.is_set():
+                    continue
+                started = time.perf_counter()
+                success, message = self._render(
+                    html_file, html_content, digest, output_name, options, kwargs, stat
+                )
+                upload_stats.record(time.perf_counter() - started)
+                results.put((index, (name, success, message)))
+
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            threads = [threading.Thread(target=feed, args=(pool,), daemon=True)]
+            threads += [threading.Thread(target=upload, daemon=True) for _ in range(jobs)]
+            for thread in threads:
+                thread.start()
+            try:
+                # Reorder buffer: input position -> result
+                finished = {}
+                next_index = 0
+                running = jobs
+                while running:
+                    item = results.get()
+                    if item is done:
+                        running -= 1
+                        continue
+                    finished[item[0]] = item[1]
+                    while next_index in finished:
+                        yield finished.pop(next_index)
+                        next_index += 1
+                        slots.release()
+                # Gaps are only left by files cancelled after a feeder error
+                for index in sorted(finished):
+                    yield finished[index]
+            finally:
+                # Also reached when the consumer stops early: wind the stages down
+                stop.set()
+                # One at a time: Semaphore.release(n) needs Python 3.9
+                for _ in range(window):
+                    slots.release()
+                for thread in threads:
+                    thread.join()
+                upload_stats.finish()
+
+        if feeder_error:
+            raise feeder_error[0]
 
     def batch_convert(
-        self, html_files: List[Path] = None, **kwargs
+        self,
+        html_files: Iterable[Path] = None,
+        jobs: int = None,
+        root: Optional[Path] = None,
+        **kwargs,
     ) -> List[Tuple[str, bool, str]]:
         """
         Convert multiple HTML files to PDF.
 
+        Files are rendered by a bounded pool of worker threads when jobs > 1,
+        after preprocessing in worker processes when self.processes is set.
+        Results are always returned in the order of html_files.
+
         Args:
-            html_files: List of HTML files to convert (defaults to all in src/)
+            html_files: HTML files to convert (defaults to all in src/); any
+                iterable, consumed lazily (see iter_convert())
+            jobs: Number of concurrent conversions (defaults to self.jobs)
+            root: Mirror the tree below root under output/ (see iter_convert())
             **kwargs: Additional arguments for PDF generation
 
         Returns:
@@ -107,21 +641,29 @@ class BatchPDFGenerator:
         if html_files is None:
             html_files = self.find_html_files()
 
-        if not html_files:
+        count = len(html_files) if hasattr(html_files, "__len__") else None
+        if count == 0:
             print("⚠️  No HTML files found to convert")
             return []
 
-        print(f"\n🚀 Starting batch conversion of {len(html_files)} file(s)...")
+        jobs = max(1, jobs or self.jobs)
+
+        if count is None:
+            print("\n🚀 Starting batch conversion...")
+        else:
+            print(f"\n🚀 Starting batch conversion of {count} file(s)...")
+        if jobs > 1:
+            print(f"   Workers: {jobs}")
         print("=" * 70)
 
         results = []
+        for filename, success, message in self.iter_convert(html_files, jobs, root, **kwargs):
+            results.append((filename, success, message))
+            print(f"   {filename}: {message}" if jobs > 1 else f"   {message}")
 
-        for html_file in html_files:
-            success, message = self.convert_file(html_file, **kwargs)
-            results.append((html_file.name, success, message))
-            self.results.append((html_file.name, success, message))
-            print(f"   {message}")
-
+        if not results:
+            print("⚠️  No HTML files found to convert")
+        self.results.extend(results)
         return results
 
     def print_summary(self):
@@ -129,75 +671,377 @@ class BatchPDFGenerator:
         print("\n" + "=" * 70)
         print("BATCH CONVERSION SUMMARY")
         print("=" * 70)
-        print(f"Total files processed: {self.success_count + self.failure_count}")
+        print(
+            f"Total files processed: "
+            f"{self.success_count + self.failure_count + self.skipped_count}"
+        )
         print(f"✅ Successful: {self.success_count}")
+        if self.skipped_count:
+            print(f"⏭️  Up to date (skipped): {self.skipped_count}")
         print(f"❌ Failed: {self.failure_count}")
 
         if self.failure_count > 0:
             print("\nFailed conversions:")
-            for filename, success, message in self.results:
-                if not success:
-                    print(f"  - {filename}: {message}")
+            for filename, success, message in self.failures:
+                print(f"  - {filename}: {message}")
+
+        if self.pipeline_stats:
+            print("\nPipeline stages:")
+            for stage in self.pipeline_stats:
+                print(f"  {stage}")
+
+        stats = self.generator.optimization_stats
+        if stats["documents"]:
+            saved = stats["original_bytes"] - stats["optimized_bytes"]
+            print(
+                f"🗜️  Upload size: {stats['original_bytes'] / 1024:.1f} KB -> "
+                f"{stats['optimized_bytes'] / 1024:.1f} KB "
+                f"(saved {saved / 1024:.1f} KB over {stats['documents']} document(s))"
+            )
+
+        coalesced = self.generator.coalesce_stats["coalesced"]
+        if coalesced:
+            print(f"🔗 Duplicate inputs rendered once: {coalesced} render(s) saved")
 
         print("=" * 70)
 
 
-def convert_specific_files(filenames: List[str], **kwargs):
+def convert_specific_files(
+    filenames: List[str],
+    jobs: int = 1,
+    rate_limiter: RateLimiter = None,
+    backend: str = None,
+    optimizer: HTMLOptimizer = None,
+    force: bool = False,
+    processes: int = 0,
+    **kwargs,
+):
     """
     Convert specific HTML files by name.
 
     Args:
         filenames: List of HTML filenames to convert
+        jobs: Number of concurrent conversions
+        rate_limiter: Optional RateLimiter shared by all conversions
+        backend: Rendering backend ("doppio", "local" or "auto")
+        optimizer: Optional HTMLOptimizer applied before upload
+        force: Re-render files the manifest records as up to date
+        processes: Preprocess files in this many worker processes (0: off)
         **kwargs: Additional PDF generation options
     """
-    batch_gen = BatchPDFGenerator()
-    src_dir = batch_gen.src_dir
-
-    html_files = []
-    for filename in filenames:
-        file_path = src_dir / filename
-        if file_path.exists():
-            html_files.append(file_path)
-        else:
-            print(f"⚠️  File not found: {filename}")
+    with BatchPDFGenerator(
+        jobs=jobs,
+        rate_limiter=rate_limiter,
+        backend=backend,
+        optimizer=optimizer,
+        force=force,
+        processes=processes,
+    ) as batch_gen:
+        src_dir = batch_gen.src_dir
 
-    if html_files:
-        batch_gen.batch_convert(html_files, **kwargs)
-        batch_gen.print_summary()
+        html_files = []
+        for filename in filenames:
+            file_path = src_dir / filename
+            if file_path.exists():
+                html_files.append(file_path)
+            else:
+                print(f"⚠️  File not found: {filename}")
+
+        if html_files:
+            batch_gen.batch_convert(html_files, **kwargs)
+            batch_gen.print_summary()
 
 
-def convert_all_in_directory(directory: str = None, **kwargs):
+def convert_all_in_directory(
+    directory: str = None,
+    jobs: int = 1,
+    rate_limiter: RateLimiter = None,
+    backend: str = None,
+    optimizer: HTMLOptimizer = None,
+    force: bool = False,
+    processes: int = 0,
+    recursive: bool = True,
+    include: Sequence[str] = ("*.html",),
+    exclude: Sequence[str] = (),
+    **kwargs,
+):
     """
-    Convert all HTML files in a directory.
+    Convert all HTML files in a directory tree.
+
+    Files are rendered as they are discovered, and outputs mirror the tree
+    under output/ (dir/a/b.html -> output/a/b.pdf).
 
     Args:
         directory: Directory path (defaults to src/)
+        jobs: Number of concurrent conversions
+        rate_limiter: Optional RateLimiter shared by all conversions
+        backend: Rendering backend ("doppio", "local" or "auto")
+        optimizer: Optional HTMLOptimizer applied before upload
+        force: Re-render files the manifest records as up to date
+        processes: Preprocess files in this many worker processes (0: off)
+        recursive: Descend into subdirectories
+        include: Globs of files to convert
+        exclude: Globs of files or directories to skip
         **kwargs: Additional PDF generation options
     """
-    batch_gen = BatchPDFGenerator()
-
-    if directory:
-        dir_path = Path(directory)
-        if not dir_path.exists():
+    with BatchPDFGenerator(
+        jobs=jobs,
+        rate_limiter=rate_limiter,
+        backend=backend,
+        optimizer=optimizer,
+        force=force,
+        processes=processes,
+    ) as batch_gen:
+        dir_path = Path(directory) if directory else batch_gen.src_dir
+        if not dir_path.is_dir():
             print(f"❌ Directory not found: {directory}")
             return
-        html_files = batch_gen.find_html_files(dir_path)
-    else:
-        html_files = batch_gen.find_html_files()
 
-    if html_files:
-        print(f"Found {len(html_files)} HTML file(s):")
-        for f in html_files:
-            print(f"  - {f.name}")
+        html_files = batch_gen.iter_html_files(dir_path, include, exclude, recursive)
+        print(f"\n🚀 Converting HTML files under {dir_path} as they are found...")
+        print("=" * 70)
+        found = 0
+        # Print results as they come instead of collecting them
+        for filename, success, message in batch_gen.iter_convert(
+            html_files, root=dir_path, **kwargs
+        ):
+            found += 1
+            print(f"   {filename}: {message}")
+
+        if found:
+            batch_gen.print_summary()
+        else:
+            print("⚠️  No HTML files found")
 
-        batch_gen.batch_convert(html_files, **kwargs)
-        batch_gen.print_summary()
-    else:
-        print("⚠️  No HTML files found")
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Convert HTML files in src/ to PDF using the Doppio API.",
+        epilog="Mail merge, one PDF per data record: "
+        "batch_convert.py merge TEMPLATE RECORDS (see merge --help)",
+    )
+    parser.add_argument(
+        "files", nargs="*", help="HTML filenames in src/ (defaults to all)"
+    )
+    parser.add_argument(
+        "-d",
+        "--directory",
+        help="Convert every HTML file below this directory, mirroring its "
+        "tree under output/ (default: src/)",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        metavar="GLOB",
+        help="Only convert files matching GLOB; repeatable (default: *.html)",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Skip files or directories matching GLOB; repeatable",
+    )
+    parser.add_argument(
+        "--no-recursive",
+        dest="recursive",
+        action="store_false",
+        help="Do not descend into subdirectories",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of files to convert concurrently (default: 1)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help="Maximum API requests per second (default: unlimited)",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        help="Maximum renders in flight at once, used with --rate (default: --jobs)",
+    )
+    parser.add_argument(
+        "--rate-lock-file",
+        type=Path,
+        help="Share the --rate budget with other processes through this file",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["doppio", "local", "auto"],
+        help="Rendering backend; 'auto' renders simple documents locally "
+        "(default: $PDF_BACKEND or doppio)",
+    )
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Minify HTML/CSS and downscale embedded images before upload",
+    )
+    parser.add_argument(
+        "--image-dpi",
+        type=float,
+        default=150,
+        help="Maximum resolution of embedded images with --optimize (default: 150)",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        nargs="?",
+        const=os.cpu_count() or 1,
+        default=0,
+        help="Preprocess files (reading, Markdown conversion) in N worker "
+        "processes and upload from --jobs threads; without N, one per core. "
+        "Prints per-stage throughput and queue depth (default: off)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-render every file, even those output/batch_manifest.jsonl "
+        "records as up to date",
+    )
+    return parser.parse_args(argv)
 
 
-def main():
+def parse_merge_args(argv=None):
+    """Parse the arguments of the merge subcommand."""
+    parser = argparse.ArgumentParser(
+        prog="batch_convert.py merge",
+        description="Render one template per data record (mail merge).",
+    )
+    parser.add_argument(
+        "template",
+        help="Jinja2 template: a file name in templates/ (e.g. invoice.html) or a path",
+    )
+    parser.add_argument(
+        "records",
+        type=Path,
+        help="Data records, one per PDF: .csv (header row), .jsonl or .json",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="{index:05d}.pdf",
+        help="Output name under output/, formatted with the record's fields "
+        "and its row number as {index} (default: {index:05d}.pdf)",
+    )
+    parser.add_argument(
+        "--results",
+        type=Path,
+        help="Per-record results file, JSON Lines "
+        "(default: output/<records name>.results.jsonl)",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Re-render only the records --results lists as failed",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=8,
+        help="Number of records rendered concurrently (default: 8)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help="Maximum API requests per second (default: unlimited)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["doppio", "local", "auto"],
+        help="Rendering backend (default: $PDF_BACKEND or doppio)",
+    )
+    parser.add_argument(
+        "--page-format", default="A4", help="Page format (default: A4)"
+    )
+    parser.add_argument(
+        "--progress",
+        type=float,
+        default=5.0,
+        metavar="SECONDS",
+        help="Seconds between progress lines (default: 5)",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Log every render, not only progress and failures",
+    )
+    return parser.parse_args(argv)
+
+
+def merge_main(argv=None):
+    """Entry point of the merge subcommand."""
+    args = parse_merge_args(argv)
+    configure_logging(logging.INFO if args.verbose else logging.WARNING)
+    # Progress lines still show when per-render messages are hidden
+    logging.getLogger("pdf_generator.bulk").setLevel(logging.INFO)
+
+    if not os.getenv("DOPPIO_API_KEY"):
+        print("\n❌ Error: DOPPIO_API_KEY not set")
+        print("   Set it in .env file or as environment variable")
+        return 1
+
+    base_dir = Path(__file__).parent
+    results_path = args.results or base_dir / "output" / f"{args.records.stem}.results.jsonl"
+    if args.retry_failed and not results_path.exists():
+        print(f"❌ No results to retry: {results_path}")
+        return 1
+
+    rate_limiter = RateLimiter(args.rate) if args.rate else None
+    with PDFGenerator(
+        pool_maxsize=max(10, args.jobs), rate_limiter=rate_limiter, backend=args.backend
+    ) as generator:
+        template = Path(args.template)
+        if template.is_file():
+            generator.templates = TemplateStore(template.parent)
+        try:
+            stats = bulk_generate(
+                generator,
+                template.name if template.is_file() else args.template,
+                args.records,
+                args.output,
+                results_path=results_path,
+                retry_failed=args.retry_failed,
+                max_workers=args.jobs,
+                progress_interval=args.progress,
+                page_format=args.page_format,
+            )
+        except (FileNotFoundError, ValueError) as e:
+            print(f"❌ {e}")
+            return 1
+        finally:
+            if rate_limiter is not None:
+                rate_limiter.close()
+
+    print(
+        f"\n📬 {stats['records']} record(s) in {stats['elapsed']:.1f}s "
+        f"({stats['throughput']:.1f}/s): {stats['done']} done, {stats['failed']} failed"
+    )
+    print(f"   Results: {results_path}")
+    if stats["failed"]:
+        print(
+            f"   Re-run failures: python batch_convert.py merge {args.template} "
+            f"{args.records} -o '{args.output}' --results {results_path} --retry-failed"
+        )
+    return 1 if stats["failed"] else 0
+
+
+def main(argv=None):
     """Main entry point for batch conversion."""
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "merge":
+        return merge_main(argv[1:])
+    args = parse_args(argv)
+    configure_logging()
+
     print("\n" + "=" * 70)
     print("BATCH PDF GENERATOR")
     print("=" * 70)
@@ -209,16 +1053,49 @@ def main():
         print("   Sign up at: https://doppio.sh")
         return 1
 
+    rate_limiter = None
+    if args.rate:
+        max_in_flight = args.max_in_flight
+        if max_in_flight is None:
+            max_in_flight = args.jobs
+        rate_limiter = RateLimiter(
+            args.rate, max_in_flight=max_in_flight, lock_file=args.rate_lock_file
+        )
+        print(f"\nRate limit: {args.rate:g} request(s)/second")
+
+    optimizer = HTMLOptimizer(max_image_dpi=args.image_dpi) if args.optimize else None
+
     # Check command line arguments
-    if len(sys.argv) > 1:
+    if args.files:
         # Convert specific files
-        filenames = sys.argv[1:]
-        print(f"\nConverting {len(filenames)} specified file(s)...")
-        convert_specific_files(filenames)
+        print(f"\nConverting {len(args.files)} specified file(s)...")
+        convert_specific_files(
+            args.files,
+            jobs=args.jobs,
+            rate_limiter=rate_limiter,
+            backend=args.backend,
+            optimizer=optimizer,
+            force=args.force,
+            processes=args.processes,
+        )
     else:
-        # Convert all HTML files in src/
-        print("\nConverting all HTML files in src/ directory...")
-        convert_all_in_directory()
+        # Convert all HTML files in the directory tree
+        print(f"\nConverting all HTML files in {args.directory or 'src/'}...")
+        convert_all_in_directory(
+            args.directory,
+            recursive=args.recursive,
+            include=args.include or ("*.html",),
+            exclude=args.exclude,
+            jobs=args.jobs,
+            rate_limiter=rate_limiter,
+            backend=args.backend,
+            optimizer=optimizer,
+            force=args.force,
+            processes=args.processes,
+        )
+
+    if rate_limiter is not None:
+        rate_limiter.close()
 
     return 0
 
@@ -226,17 +1103,16 @@ def main():
 # Example usage patterns
 def example_custom_batch():
     """Example: Custom batch conversion with specific options."""
-    batch_gen = BatchPDFGenerator()
+    with BatchPDFGenerator() as batch_gen:
+        # Find all HTML files
+        html_files = batch_gen.find_html_files()
 
-    # Find all HTML files
-    html_files = batch_gen.find_html_files()
+        # Convert with custom options
+        batch_gen.batch_convert(
+            html_files, page_format="Letter", print_background=True, wait_for="load"
+        )
 
-    # Convert with custom options
-    batch_gen.batch_convert(
-        html_files, page_format="Letter", print_background=True, wait_for="load"
-    )
-
-    batch_gen.print_summary()
+        batch_gen.print_summary()
 
 
 def example_selective_conversion():
@@ -249,5 +1125,17 @@ if __name__ == "__main__":
     # Usage:
     #   python batch_convert.py                    # Convert all HTML in src/
     #   python batch_convert.py file1.html file2.html  # Convert specific files
+    #   python batch_convert.py --jobs 8           # Convert 8 files at a time
+    #   python batch_convert.py --force            # Re-render unchanged files too
+    #   python batch_convert.py -d site/ --exclude drafts -j 8
+    #                                              # Convert site/**.html into output/
+    #   python batch_convert.py -d notes/ --include "*.md" --processes -j 16
+    #                                              # Markdown on every core, 16 uploads
+    #   python batch_convert.py -j 8 --rate 5 --rate-lock-file /tmp/doppio.rate
+    #                                              # Share a 5 req/s budget
+    #   python batch_convert.py merge invoice.html customers.csv -o "invoices/{customer_id}.pdf" -j 16
+    #                                              # One invoice per CSV row
+    #   python batch_convert.py merge invoice.html customers.csv -o "invoices/{customer_id}.pdf" --retry-failed
+    #                                              # Re-render the rows that failed
 
     sys.exit(main())
@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Render Pipeline Benchmark
+Drives PDFGenerator, BatchPDFGenerator and the Flask /generate-pdf route
+against a local stub of the Doppio API and writes the results to JSON.
+
+Usage:
+    python benchmarks/bench_render.py
+    python benchmarks/bench_render.py --concurrency 1 4 16 --requests 200 \\
+        --latency 0.05 --payload-size 262144 --error-rate 0.02
+    python benchmarks/bench_render.py --baseline benchmarks/results/before.json
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import logging
+import platform
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:
+    # Windows: peak RSS is not reported
+    resource = None
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "src"))
+from metrics import RenderMetrics
+from stub_server import StubDoppioServer
+
+SCENARIOS = ("generator", "batch", "web")
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+MARKDOWN_SECTION = """
+## Section {index}
+
+Rendering throughput depends on **payload size**, connection reuse and how
+many renders are in flight. This paragraph is filler so the document has a
+realistic amount of text per section.
+
+- First point about section {index}
+- Second point with `inline code`
+- Third point with a [link](https://doppio.sh)
+
+> A short quote to exercise the blockquote styles.
+"""
+
+
+def sample_markdown(size: int) -> str:
+    """Return Markdown of roughly `size` characters."""
+    sections = []
+    total = 0
+    index = 1
+    while total < size:
+        section = MARKDOWN_SECTION.format(index=index)
+        sections.append(section)
+        total += len(section)
+        index += 1
+    return "# Benchmark Document\n" + "".join(sections)
+
+
+def sample_html(size: int) -> str:
+    """Return a full HTML page built from sample_markdown(size)."""
+    from markdown_renderer import MarkdownRenderer
+
+    return MarkdownRenderer().render(sample_markdown(size))
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = rank - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    """Throughput and latency percentiles (in milliseconds) for one run."""
+    ordered = sorted(latencies)
+    completed = len(ordered)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 3)
+
+    return {
+        "requests": completed,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round((completed - errors) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "mean": ms(sum(ordered) / completed if completed else None),
+            "p50": ms(percentile(ordered, 50)),
+            "p95": ms(percentile(ordered, 95)),
+            "p99": ms(percentile(ordered, 99)),
+            "max": ms(ordered[-1] if ordered else None),
+        },
+    }
+
+
+def stage_breakdown(metrics: Optional[RenderMetrics]) -> Optional[dict]:
+    """Mean milliseconds per render spent in each instrumented stage."""
+    if metrics is None:
+        return None
+    snapshot = metrics.snapshot()
+    renders = snapshot["duration_count"] or 1
+    return {
+        stage: round(seconds * 1000 / renders, 3)
+        for stage, seconds in snapshot["stage_seconds"].items()
+    }
+
+
+def make_generator(config: dict, work_dir: Path):
+    """PDFGenerator pointed at the stub, writing into work_dir."""
+    from generator import PDFGenerator
+
+    generator = PDFGenerator(
+        api_key="benchmark",
+        api_url=config["api_url"],
+        pool_maxsize=max(10, config["concurrency"]),
+        metrics=RenderMetrics() if config["instrument"] else None,
+        upload_modes=config["upload_modes"],
+        # Every request renders the same document; measure each one
+        coalesce=False,
+    )
+    generator.output_dir = work_dir
+    return generator
+
+
+def run_generator(config: dict, work_dir: Path) -> dict:
+    """Call PDFGenerator.generate_pdf from `concurrency` threads."""
+    concurrency = config["concurrency"]
+    html_content = sample_html(config["html_size"])
+    generator = make_generator(config, work_dir)
+
+    def render(index: int):
+        started = time.perf_counter()
+        try:
+            generator.generate_pdf(
+                html_content, f"bench_{index}.pdf", use_cache=False
+            )
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    with generator:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(render, range(config["requests"])))
+        elapsed = time.perf_counter() - started
+        retries = generator.retry_stats["retries"]
+
+    result = summarize(
+        [latency for latency, _ in outcomes],
+        sum(1 for _, ok in outcomes if not ok),
+        elapsed,
+    )
+    result["retries"] = retries
+    result["stages_ms"] = stage_breakdown(generator.metrics)
+    return result
+
+
+def run_batch(config: dict, work_dir: Path) -> dict:
+    """Convert `requests` HTML files with BatchPDFGenerator.batch_convert."""
+    from batch_convert import BatchPDFGenerator
+
+    concurrency = config["concurrency"]
+    input_dir = work_dir / "html"
+    input_dir.mkdir()
+    html_content = sample_html(config["html_size"])
+    html_files = []
+    for index in range(config["requests"]):
+        html_file = input_dir / f"doc_{index}.html"
+        html_file.write_text(html_content, encoding="utf-8")
+        html_files.append(html_file)
+
+    generator = make_generator(config, work_dir)
+
+    latencies = []
+    with generator, BatchPDFGenerator(generator=generator, jobs=concurrency) as batch:
+        convert_file = batch.convert_file
+
+        def timed_convert(html_file, *args, **kwargs):
+            started = time.perf_counter()
+            outcome = convert_file(html_file, *args, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            return outcome
+
+        # Time each file as the batch runs it
+        batch.convert_file = timed_convert
+        started = time.perf_counter()
+        batch.batch_convert(html_files, use_cache=False)
+        elapsed = time.perf_counter() - started
+        retries = generator.retry_stats["retries"]
+
+    result = summarize(latencies, batch.failure_count, elapsed)
+    result["retries"] = retries
+    result["stages_ms"] = stage_breakdown(generator.metrics)
+    return result
+
+
+def run_web(config: dict, work_dir: Path) -> dict:
+    """POST to the Flask /generate-pdf route from `concurrency` threads."""
+    # The web app builds its generator at import time from the environment
+    os.environ["DOPPIO_API_KEY"] = "benchmark"
+    os.environ["DOPPIO_API_URL"] = config["api_url"]
+    os.environ["DOPPIO_UPLOAD_MODES"] = ",".join(config["upload_modes"])
+    os.environ.setdefault("PDF_JOB_WORKERS", "1")
+    os.environ.setdefault("PDF_BACKEND", "doppio")
+    from web_app import app as web
+
+    web.output_storage.close()
+    web.output_storage = web.OutputStorage(work_dir)
+    web.output_dir = work_dir
+    web.pdf_generator.storage = web.output_storage
+    web.pdf_generator.output_dir = work_dir
+    # Every request posts the same content; measure each render
+    web.pdf_generator.flights = None
+    concurrency = config["concurrency"]
+    content = sample_markdown(config["html_size"])
+
+    def post(index: int):
+        client = web.app.test_client()
+        started = time.perf_counter()
+        response = client.post("/generate-pdf", data={"content": content, "mode": "markdown"})
+        return time.perf_counter() - started, response.status_code == 200
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(post, range(config["requests"])))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(
+        [latency for latency, _ in outcomes],
+        sum(1 for _, ok in outcomes if not ok),
+        elapsed,
+    )
+    result["retries"] = web.pdf_generator.retry_stats["retries"]
+    # The web app always collects render metrics
+    result["stages_ms"] = stage_breakdown(web.render_metrics)
+    return result
+
+
+RUNNERS = {"generator": run_generator, "batch": run_batch, "web": run_web}
+
+
+def run_scenario(config: dict) -> dict:
+    """
+    Run one scenario at one concurrency level.
+
+    Executed in a fresh process so each result reports its own peak RSS.
+    """
+    # Keep per-render status messages out of the benchmark output
+    logging.getLogger("pdf_generator").setLevel(logging.CRITICAL)
+    with tempfile.TemporaryDirectory(prefix="pdf-bench-") as work_dir:
+        with redirect_stdout(io.StringIO()):
+            result = RUNNERS[config["scenario"]](config, Path(work_dir))
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def git_revision() -> Optional[str]:
+    """Current commit of the repository, if available."""
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def compare(results: List[dict], baseline_path: Path):
+    """Print throughput and p95 changes against a previous results file."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {
+            (entry["scenario"], entry["concurrency"]): entry
+            for entry in json.load(f)["results"]
+        }
+
+    print(f"\nComparison with {baseline_path}:")
+    for entry in results:
+        before = baseline.get((entry["scenario"], entry["concurrency"]))
+        if before is None:
+            continue
+        changes = []
+        for label, new, old in (
+            ("throughput", entry["throughput_rps"], before["throughput_rps"]),
+            ("p95", entry["latency_ms"]["p95"], before["latency_ms"]["p95"]),
+            ("peak RSS", entry["peak_rss_mb"], before["peak_rss_mb"]),
+        ):
+            if new is None or not old:
+                continue
+            changes.append(f"{label} {(new - old) / old * 100:+.1f}%")
+        print(f"   {entry['scenario']:<10} c={entry['concurrency']:<4} " + ", ".join(changes))
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the render pipeline against a local stub Doppio server."
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=SCENARIOS,
+        default=list(SCENARIOS),
+        help="Code paths to benchmark (default: all)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        nargs="+",
+        type=int,
+        default=[1, 4, 16],
+        help="Concurrency levels to run each scenario at (default: 1 4 16)",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=100, help="Renders per run (default: 100)"
+    )
+    parser.add_argument(
+        "--html-size",
+        type=int,
+        default=16 * 1024,
+        help="Approximate size of each document in characters (default: 16384)",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="Stub latency per render in seconds"
+    )
+    parser.add_argument(
+        "--payload-size",
+        type=int,
+        default=64 * 1024,
+        help="Size of the PDF the stub returns in bytes (default: 65536)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of renders the stub fails with 503 (default: 0)",
+    )
+    parser.add_argument(
+        "--retry-after",
+        type=float,
+        default=0.0,
+        help="Retry-After seconds sent with injected failures (default: 0)",
+    )
+    parser.add_argument("--seed", type=int, default=1234, help="Failure injection seed")
+    parser.add_argument(
+        "--upload-modes",
+        nargs="+",
+        choices=["json", "gzip"],
+        default=["json"],
+        help="Upload modes the generator may pick from (default: json)",
+    )
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        help="Collect per-stage render timings in the generator and batch scenarios",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="Results file (default: benchmarks/results/bench_<timestamp>.json)",
+    )
+    parser.add_argument(
+        "--baseline", type=Path, help="Previous results file to compare against"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    started_at = datetime.now(timezone.utc)
+    output_path = args.output or RESULTS_DIR / (
+        f"bench_{started_at.strftime('%Y%m%d_%H%M%S')}.json"
+    )
+
+    stub = StubDoppioServer(
+        latency=args.latency,
+        payload_size=args.payload_size,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+
+    print("⏱️  Render pipeline benchmark")
+    print(f"   Stub: {args.latency * 1000:.0f} ms latency, "
+          f"{args.payload_size / 1024:.0f} KB PDFs, {args.error_rate:.1%} errors")
+    print(f"   {args.requests} renders per run, concurrency {args.concurrency}")
+    print("=" * 70)
+
+    results = []
+    spawn = multiprocessing.get_context("spawn")
+    with stub:
+        for scenario in args.scenarios:
+            for concurrency in args.concurrency:
+                config = {
+                    "scenario": scenario,
+                    "concurrency": max(1, concurrency),
+                    "requests": args.requests,
+                    "html_size": args.html_size,
+                    "api_url": stub.url,
+                    "instrument": args.instrument,
+                    "upload_modes": args.upload_modes,
+                }
+                served_before = stub.request_count + stub.error_count
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+                    result = executor.submit(run_scenario, config).result()
+                entry = {
+                    "scenario": scenario,
+                    "concurrency": config["concurrency"],
+                    **result,
+                    "server_requests": stub.request_count + stub.error_count - served_before,
+                }
+                results.append(entry)
+
+                latency = entry["latency_ms"]
+                rss = entry["peak_rss_mb"]
+                print(
+                    f"   {scenario:<10} c={config['concurrency']:<4} "
+                    f"{entry['throughput_rps']:>8.1f} req/s  "
+                    f"p50 {latency['p50']:>7.1f} ms  p95 {latency['p95']:>7.1f} ms  "
+                    f"p99 {latency['p99']:>7.1f} ms  "
+                    f"RSS {'n/a' if rss is None else f'{rss:.0f} MB'}  "
+                    f"errors {entry['errors']}"
+                )
+
+    report = {
+        "meta": {
+            "started_at": started_at.isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "requests": args.requests,
+            "html_size": args.html_size,
+            "instrument": args.instrument,
+            "upload_modes": args.upload_modes,
+            "stub": {
+                "latency": args.latency,
+                "payload_size": len(stub.pdf_bytes),
+                "error_rate": args.error_rate,
+                "retry_after": args.retry_after,
+                "seed": args.seed,
+            },
+        },
+        "results": results,
+    }
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print("=" * 70)
+    print(f"📊 Results saved to: {output_path}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
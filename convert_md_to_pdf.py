@@ -1,242 +1,34 @@
 #!/usr/bin/env python3
 """
 Convert Markdown to PDF using HTML template - refined for LinkedIn carousel.
+
+Without arguments, converts the Local AI course transcript into the carousel
+PDF. With files, directories or globs, converts each of them through the
+batch renderer using a rule set (--rules) and page preset (--preset).
 """
 
 import os
+import sys
+import argparse
 from pathlib import Path
-import markdown
-from src.generator import PDFGenerator
-
-# Read the markdown file
-md_path = Path("it a 2hr video couarse make a written couse on wha.md")
-with open(md_path, "r", encoding="utf-8") as f:
-    md_content = f.read()
-
-# Remove unwanted sections: perplexity logo, header, transcript description, footer notes
-lines = md_content.split('\n')
-filtered_lines = []
-skip_section = False
-for line in lines:
-    # Skip perplexity image and transcript intro
-    if '<img src="https://r2cdn.perplexity.ai/' in line:
-        continue
-    if 'it a 2hr video couarse make a written couse' in line:
-        skip_section = True
-    if 'written course transcript' in line and 'Cole Medin' in line:
-        skip_section = True
-    if skip_section and '***' in line:
-        skip_section = False
-        continue
-    if skip_section:
-        continue
-    # Skip the final notes
-    if '**You now have the complete workflow**' in line:
-        break
-    if line.startswith('<div align="center">⁂</div>'):
-        break
-    if '[^1]:' in line:
-        break
-    filtered_lines.append(line)
-
-# Join back and fix some text
-refined_content = '\n'.join(filtered_lines)
-# Fix typo
-refined_content = refined_content.replace("couarse", "course")
-refined_content = refined_content.replace("wha", "what")
-
-# Convert markdown to HTML
-html_content = markdown.markdown(refined_content)
-
-# Custom color scheme for AI/tech theme (green)
-css = '''<style>
-    :root {
-      --bg: #ffffff;
-      --text: #1a1a1a;
-      --accent: #10b981; /* Green for AI/tech */
-      --accent-light: #d1fae5;
-      --border: #e5e7eb;
-      --code-bg: #f9fafb;
-      --shadow: rgba(0, 0, 0, 0.05);
-      --font-main: 'Segoe UI', system-ui, -apple-system, sans-serif;
-      --font-mono: 'SF Mono', 'Monaco', 'Inconsolata', monospace;
-    }
-
-    * {
-      margin: 0;
-      padding: 0;
-      box-sizing: border-box;
-    }
-
-    body {
-      font-family: var(--font-main);
-      line-height: 1.6;
-      color: var(--text);
-      background: var(--bg);
-      padding: 2rem;
-      max-width: 800px;
-      margin: 0 auto;
-    }
-
-    @media print {
-      body {
-        padding: 1.5rem;
-        max-width: 100%;
-      }
-      h1, h2, h3 {
-        page-break-after: avoid;
-        page-break-inside: avoid;
-      }
-      pre, code {
-        page-break-inside: avoid;
-      }
-    }
-
-    h1 {
-      font-size: 2.8rem;
-      font-weight: 800;
-      margin: 1rem 0 2rem;
-      color: var(--accent);
-      text-align: center;
-      letter-spacing: -0.02em;
-    }
-
-    h2 {
-      font-size: 2rem;
-      font-weight: 700;
-      margin: 3rem 0 1.5rem;
-      padding: 1rem;
-      background: var(--accent-light);
-      color: var(--text);
-      border-radius: 8px;
-      text-align: center;
-      page-break-before: always; /* Each section on new page for carousel */
-    }
-
-    h3 {
-      font-size: 1.4rem;
-      font-weight: 600;
-      margin: 2rem 0 1rem;
-      color: var(--accent);
-    }
-
-    p, li {
-      margin-bottom: 1rem;
-      font-size: 1.1rem;
-    }
-
-    ul, ol {
-      padding-left: 1.5rem;
-      margin-bottom: 1.2rem;
-    }
-
-    li {
-      margin-bottom: 0.8rem;
-    }
-
-    blockquote {
-      background: var(--accent-light);
-      border-left: 4px solid var(--accent);
-      padding: 1rem 1.2rem;
-      margin: 1.5rem 0;
-      font-style: italic;
-      border-radius: 0 6px 6px 0;
-      font-weight: 500;
-    }
 
-    code {
-      font-family: var(--font-mono);
-      background: var(--code-bg);
-      padding: 0.3rem 0.5rem;
-      border-radius: 4px;
-      font-size: 0.95em;
-    }
-
-    pre {
-      background: var(--code-bg);
-      padding: 1.2rem;
-      border-radius: 8px;
-      overflow-x: auto;
-      margin: 1.5rem 0;
-      font-family: var(--font-mono);
-      font-size: 0.9em;
-      border: 1px solid var(--border);
-    }
-
-    table {
-      width: 100%;
-      border-collapse: collapse;
-      margin: 1.5rem 0;
-    }
-
-    th, td {
-      padding: 0.8rem 1rem;
-      text-align: left;
-      border-bottom: 1px solid var(--border);
-    }
-
-    th {
-      background: var(--accent-light);
-      font-weight: 700;
-      color: var(--accent);
-    }
-
-    tr:last-child td {
-      border-bottom: none;
-    }
-
-    .highlight {
-      background: #fffbeb;
-      padding: 0.2rem 0.4rem;
-      border-radius: 4px;
-      font-weight: 600;
-    }
-
-    .footer {
-      margin-top: 3rem;
-      padding-top: 1.5rem;
-      border-top: 1px solid var(--border);
-      font-size: 0.9rem;
-      color: #666;
-      text-align: center;
-    }
-
-    .emoji {
-      font-size: 1.5rem;
-    }
-  </style>'''
-
-# Create header
-header = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="UTF-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1.0"/>
-  <title>The Ultimate Guide to Local AI and AI Agents</title>
-  {css}
-</head>
-<body>
-<h1>🚀 The Ultimate Guide to Local AI and AI Agents</h1>
-<p style="text-align: center; font-size: 1.2rem; color: #666; margin-bottom: 3rem;">Build private, powerful AI agents on your own hardware</p>
-'''
-
-# Refine the HTML content for carousel style
-# Add some visual elements and make it more slide-friendly
-carousel_html = html_content.replace('<h2>', '<h2 class="slide-header">')
-# Add emojis and visual elements
-carousel_html = carousel_html.replace('<h2>Section 1: Introduction & Agenda</h2>', '<h2>📋 Slide 1: Why Go Local With AI?</h2>')
-carousel_html = carousel_html.replace('<h2>Section 2: What is Local AI?</h2>', '<h2>🤖 Slide 2: What is Local AI?</h2>')
-carousel_html = carousel_html.replace('<h2>Section 3: Local AI vs Cloud AI</h2>', '<h2>⚖️ Slide 3: Local vs Cloud AI</h2>')
-carousel_html = carousel_html.replace('<h2>Section 4: Hardware Requirements</h2>', '<h2>🖥️ Slide 4: Hardware You Need</h2>')
-carousel_html = carousel_html.replace('<h2>Section 5: Quantization & Offloading</h2>', '<h2>🔧 Slide 5: Optimization Techniques</h2>')
-carousel_html = carousel_html.replace('<h2>Section 6: Ollama Configuration</h2>', '<h2>⚙️ Slide 6: Setting Up Ollama</h2>')
-carousel_html = carousel_html.replace('<h2>Section 7: The Local AI Package</h2>', '<h2>📦 Slide 7: Complete AI Stack</h2>')
-carousel_html = carousel_html.replace('<h2>Section 8: Connecting, Using & Extending Agents</h2>', '<h2>🔗 Slide 8: Building Agents</h2>')
-carousel_html = carousel_html.replace('<h2>Section 9: Deployment & Cloud Hosting</h2>', '<h2>☁️ Slide 9: Going Live</h2>')
-carousel_html = carousel_html.replace('<h2>Section 10: Additional Resources & Support</h2>', '<h2>📚 Slide 10: Next Steps</h2>')
-
-# Add footer
-footer = '''
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from generator import PDFGenerator, configure_logging
+from markdown_pipeline import MarkdownPipeline, RuleSet, expand_inputs, input_root
+from markdown_renderer import CAROUSEL_CSS, DOCUMENT_SHELL, PageShell
+from sections import SectionRenderer
+
+# Carousel page shell: title slide header, inlined theme CSS and closing notes
+CAROUSEL_SHELL = PageShell(
+    title="The Ultimate Guide to Local AI and AI Agents",
+    css=CAROUSEL_CSS,
+    header=(
+        "<h1>🚀 The Ultimate Guide to Local AI and AI Agents</h1>\n"
+        '<p style="text-align: center; font-size: 1.2rem; color: #666; '
+        'margin-bottom: 3rem;">Build private, powerful AI agents on your own hardware</p>\n'
+    ),
+    footer='''
 <div class="footer">
   <p>🔒 <strong>Privacy First:</strong> Your data stays on your hardware</p>
   <p>💰 <strong>Cost Effective:</strong> No API fees, invest once in hardware</p>
@@ -244,27 +36,220 @@ footer = '''
   <p style="margin-top: 1.5rem;">Ready to get started? Check out the resources above!</p>
   <p style="margin-top: 1rem; font-style: italic;">#LocalAI #AIagents #Privacy #MachineLearning</p>
 </div>
-</body>
-</html>
-'''
-
-# Combine
-full_html = header + carousel_html + footer
-
-# Save to temporary HTML file
-temp_html = Path("output/ai-agents-carousel-guide.html")
-with open(temp_html, "w", encoding="utf-8") as f:
-    f.write(full_html)
-
-print(f"Created carousel HTML file: {temp_html}")
+''',
+)
 
-# Generate PDF
-generator = PDFGenerator()
-output_path = generator.generate_pdf(
-    html_content=full_html,
-    output_filename="local-ai-agents-carousel.pdf",
-    page_format="A4",
-    print_background=True
+# Rules for the Perplexity course transcript: drop the logo, title and
+# transcript intro and the closing notes, then turn sections into slides
+CAROUSEL_RULES = RuleSet(
+    drop_lines=['<img src="https://r2cdn.perplexity.ai/'],
+    skip_sections=[
+        {"start": "it a 2hr video couarse make a written couse", "end": "***"},
+        {"start": ["written course transcript", "Cole Medin"], "end": "***"},
+    ],
+    stop_at=[
+        "**You now have the complete workflow**",
+        '<div align="center">⁂</div>',
+        "[^1]:",
+    ],
+    replace={
+        "## Section 1: Introduction \\& Agenda": "## 📋 Slide 1: Why Go Local With AI?",
+        "## Section 2: What is Local AI?": "## 🤖 Slide 2: What is Local AI?",
+        "## Section 3: Local AI vs Cloud AI": "## ⚖️ Slide 3: Local vs Cloud AI",
+        "## Section 4: Hardware Requirements": "## 🖥️ Slide 4: Hardware You Need",
+        "## Section 5: Quantization \\& Offloading": "## 🔧 Slide 5: Optimization Techniques",
+        "## Section 6: Ollama Configuration": "## ⚙️ Slide 6: Setting Up Ollama",
+        "## Section 7: The Local AI Package": "## 📦 Slide 7: Complete AI Stack",
+        "## Section 8: Connecting, Using \\& Extending Agents": "## 🔗 Slide 8: Building Agents",
+        "## Section 9: Deployment \\& Cloud Hosting": "## ☁️ Slide 9: Going Live",
+        "## Section 10: Additional Resources \\& Support": "## 📚 Slide 10: Next Steps",
+    },
+    replace_words={"couarse": "course", "wha": "what"},
+    html_replace={"<h2>": '<h2 class="slide-header">'},
 )
 
-print(f"Carousel PDF generated: {output_path}")
+# Page shell and default rules per --preset
+PRESETS = {
+    "document": (DOCUMENT_SHELL, RuleSet()),
+    "carousel": (CAROUSEL_SHELL, CAROUSEL_RULES),
+}
+
+COURSE_MARKDOWN = Path("it a 2hr video couarse make a written couse on wha.md")
+
+
+def convert_course(split: bool = False):
+    """
+    Convert the course transcript into the carousel PDF.
+
+    Args:
+        split: Render each slide separately (cached per slide) and merge
+            them, instead of rendering one document.
+    """
+    pipeline = MarkdownPipeline(CAROUSEL_RULES, CAROUSEL_SHELL)
+    if split:
+        with PDFGenerator() as generator:
+            output_path = SectionRenderer(generator).render(
+                pipeline.section_documents(COURSE_MARKDOWN.read_text(encoding="utf-8")),
+                "local-ai-agents-carousel.pdf",
+            )
+        print(f"Carousel PDF generated: {output_path}")
+        return
+
+    full_html = pipeline.convert_file(COURSE_MARKDOWN)
+
+    # Save to temporary HTML file
+    temp_html = Path("output/ai-agents-carousel-guide.html")
+    with open(temp_html, "w", encoding="utf-8") as f:
+        f.write(full_html)
+
+    print(f"Created carousel HTML file: {temp_html}")
+
+    # Generate PDF
+    with PDFGenerator() as generator:
+        output_path = generator.generate_pdf(
+            html_content=full_html,
+            output_filename="local-ai-agents-carousel.pdf",
+            page_format="A4",
+            print_background=True,
+        )
+
+    print(f"Carousel PDF generated: {output_path}")
+
+
+def iter_inputs(patterns):
+    """
+    Expand the input patterns and return (common root, absolute paths).
+
+    Outputs mirror the inputs' tree below the root, so a/intro.md and
+    b/intro.md become output/a/intro.pdf and output/b/intro.pdf.
+    """
+    root = input_root(patterns)
+    return root, (Path(os.path.abspath(path)) for path in expand_inputs(patterns))
+
+
+def convert_split(pipeline: MarkdownPipeline, patterns, args) -> int:
+    """Render each Markdown file section by section and merge the sections."""
+    failed = 0
+    root, paths = iter_inputs(patterns)
+    with PDFGenerator(pool_maxsize=max(10, args.jobs), backend=args.backend) as generator:
+        renderer = SectionRenderer(generator, max_workers=args.jobs)
+        for path in paths:
+            relative = path.relative_to(root)
+            try:
+                output_path = renderer.render(
+                    pipeline.section_documents(path.read_text(encoding="utf-8")),
+                    str(relative.with_suffix(".pdf")),
+                    page_format=args.page_format,
+                )
+                print(f"✅ {relative.as_posix()} → {output_path.name}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ {relative.as_posix()}: {e}")
+        stats = renderer.stats
+        print(
+            f"\nSections: {stats['rendered']} rendered, {stats['cached']} from cache, "
+            f"{stats['failed']} failed"
+        )
+    return 1 if failed else 0
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Convert Markdown files to PDF through a rule-driven pipeline."
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="Markdown files, directories or globs (e.g. 'notes/**/*.md'); "
+        "without any, converts the course transcript to the carousel PDF",
+    )
+    parser.add_argument(
+        "--preset",
+        choices=sorted(PRESETS),
+        default="document",
+        help="Page shell and default rules (default: document)",
+    )
+    parser.add_argument(
+        "--rules",
+        type=Path,
+        help="JSON rule set (drop_lines, skip_sections, stop_at, replace, "
+        "replace_words, html_replace); replaces the preset's rules",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=4,
+        help="Number of PDFs rendered concurrently (default: 4)",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        nargs="?",
+        const=os.cpu_count() or 1,
+        default=0,
+        help="Convert Markdown in N worker processes; without N, one per core (default: off)",
+    )
+    parser.add_argument(
+        "--page-format", default="A4", help="Page format (default: A4)"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["doppio", "local", "auto"],
+        help="Rendering backend (default: $PDF_BACKEND or doppio)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-render files the batch manifest records as up to date",
+    )
+    parser.add_argument(
+        "--split",
+        action="store_true",
+        help="Render each <h2> section separately (-j at a time, cached per "
+        "section) and merge them with bookmarks; needs pypdf",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Main entry point."""
+    args = parse_args(argv)
+    configure_logging()
+
+    if not args.inputs:
+        convert_course(split=args.split)
+        return 0
+
+    # Imported here: batch_convert loads .env and sets up its own paths
+    from batch_convert import BatchPDFGenerator
+
+    shell, rules = PRESETS[args.preset]
+    if args.rules:
+        rules = RuleSet.from_file(args.rules)
+    pipeline = MarkdownPipeline(rules, shell)
+
+    if args.split:
+        return convert_split(pipeline, args.inputs, args)
+
+    with BatchPDFGenerator(
+        jobs=args.jobs,
+        backend=args.backend,
+        force=args.force,
+        processes=args.processes,
+        preprocessor=pipeline,
+    ) as batch_gen:
+        root, paths = iter_inputs(args.inputs)
+        batch_gen.batch_convert(paths, root=root, page_format=args.page_format)
+        batch_gen.print_summary()
+    return 1 if batch_gen.failure_count else 0
+
+
+if __name__ == "__main__":
+    # Usage:
+    #   python convert_md_to_pdf.py                       # Course transcript -> carousel PDF
+    #   python convert_md_to_pdf.py notes/ -j 8 --processes
+    #   python convert_md_to_pdf.py 'posts/**/*.md' --preset carousel --rules rules.json
+    #   python convert_md_to_pdf.py --split               # Carousel, one render per slide
+    sys.exit(main())
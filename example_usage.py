@@ -20,7 +20,7 @@ except ImportError:
 import sys
 
 sys.path.insert(0, str(Path(__file__).parent / "src"))
-from generator import PDFGenerator
+from generator import PDFGenerator, configure_logging
 
 
 def example_1_basic_usage():
@@ -133,313 +133,115 @@ def example_3_different_formats():
 
     formats = ["A4", "Letter", "Legal", "A5"]
 
-    for fmt in formats:
-        output_path = generator.generate_pdf(
-            html_content=html,
-            output_filename=f"example3_{fmt.lower()}.pdf",
-            page_format=fmt,
-        )
-        print(f"✓ Generated {fmt}: {output_path.name}")
+    # Render all formats concurrently from one encoded document
+    results = generator.generate_variants(html, formats, output_filename="example3.pdf")
+    for fmt, result in results.items():
+        if isinstance(result, Exception):
+            print(f"✗ Failed {fmt}: {result}")
+        else:
+            print(f"✓ Generated {fmt}: {result.name}")
 
 
 def example_4_invoice_template():
-    """Example 4: Generate a professional invoice."""
+    """Example 4: Generate a professional invoice from templates/invoice.html."""
     print("\n" + "=" * 60)
     print("Example 4: Invoice Template")
     print("=" * 60)
 
-    invoice_html = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <title>Invoice</title>
-        <style>
-            * { margin: 0; padding: 0; box-sizing: border-box; }
-            body {
-                font-family: 'Segoe UI', Arial, sans-serif;
-                padding: 20mm;
-                color: #333;
-            }
-            .header {
-                display: flex;
-                justify-content: space-between;
-                margin-bottom: 30px;
-                padding-bottom: 20px;
-                border-bottom: 3px solid #2c3e50;
-            }
-            .company-name {
-                font-size: 28px;
-                font-weight: bold;
-                color: #2c3e50;
-            }
-            .invoice-title {
-                font-size: 24px;
-                color: #7f8c8d;
-                text-align: right;
-            }
-            .info-section {
-                margin: 20px 0;
-            }
-            .info-label {
-                font-weight: bold;
-                color: #2c3e50;
-            }
-            table {
-                width: 100%;
-                border-collapse: collapse;
-                margin: 30px 0;
-            }
-            th {
-                background-color: #2c3e50;
-                color: white;
-                padding: 12px;
-                text-align: left;
-            }
-            td {
-                padding: 10px 12px;
-                border-bottom: 1px solid #ddd;
-            }
-            .total-row {
-                background-color: #ecf0f1;
-                font-weight: bold;
-                font-size: 18px;
-            }
-            .footer {
-                margin-top: 50px;
-                padding-top: 20px;
-                border-top: 1px solid #ddd;
-                text-align: center;
-                color: #7f8c8d;
-                font-size: 12px;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <div>
-                <div class="company-name">ACME Corporation</div>
-                <p>123 Business Street<br>New York, NY 10001<br>Phone: (555) 123-4567</p>
-            </div>
-            <div class="invoice-title">INVOICE</div>
-        </div>
-
-        <div class="info-section">
-            <p><span class="info-label">Invoice #:</span> INV-2025-001</p>
-            <p><span class="info-label">Date:</span> January 15, 2025</p>
-            <p><span class="info-label">Due Date:</span> February 15, 2025</p>
-        </div>
-
-        <div class="info-section">
-            <p class="info-label">Bill To:</p>
-            <p>John Smith<br>456 Client Avenue<br>Los Angeles, CA 90001</p>
-        </div>
-
-        <table>
-            <thead>
-                <tr>
-                    <th>Description</th>
-                    <th style="text-align: right;">Quantity</th>
-                    <th style="text-align: right;">Unit Price</th>
-                    <th style="text-align: right;">Total</th>
-                </tr>
-            </thead>
-            <tbody>
-                <tr>
-                    <td>Web Development Services</td>
-                    <td style="text-align: right;">40 hrs</td>
-                    <td style="text-align: right;">$150.00</td>
-                    <td style="text-align: right;">$6,000.00</td>
-                </tr>
-                <tr>
-                    <td>UI/UX Design</td>
-                    <td style="text-align: right;">20 hrs</td>
-                    <td style="text-align: right;">$100.00</td>
-                    <td style="text-align: right;">$2,000.00</td>
-                </tr>
-                <tr>
-                    <td>API Integration</td>
-                    <td style="text-align: right;">15 hrs</td>
-                    <td style="text-align: right;">$150.00</td>
-                    <td style="text-align: right;">$2,250.00</td>
-                </tr>
-                <tr class="total-row">
-                    <td colspan="3" style="text-align: right;">TOTAL DUE:</td>
-                    <td style="text-align: right;">$10,250.00</td>
-                </tr>
-            </tbody>
-        </table>
-
-        <div class="footer">
-            <p>Thank you for your business!</p>
-            <p>Payment terms: Net 30 days | Bank Transfer or Check</p>
-        </div>
-    </body>
-    </html>
-    """
+    invoice = {
+        "invoice_number": "INV-2025-001",
+        "date": "January 15, 2025",
+        "due_date": "February 15, 2025",
+        "currency": "$",
+        "company": {
+            "name": "ACME Corporation",
+            "address": ["123 Business Street", "New York, NY 10001"],
+            "phone": "(555) 123-4567",
+        },
+        "bill_to": {
+            "name": "John Smith",
+            "address": ["456 Client Avenue", "Los Angeles, CA 90001"],
+        },
+        "items": [
+            {"description": "Web Development Services", "quantity": 40, "unit": "hrs", "unit_price": 150},
+            {"description": "UI/UX Design", "quantity": 20, "unit": "hrs", "unit_price": 100},
+            {"description": "API Integration", "quantity": 15, "unit": "hrs", "unit_price": 150},
+        ],
+        "payment_terms": "Net 30 days | Bank Transfer or Check",
+    }
 
     generator = PDFGenerator()
-    output_path = generator.generate_pdf(
-        html_content=invoice_html, output_filename="example4_invoice.pdf"
+    output_path = generator.generate_from_template(
+        "invoice.html", output_filename="example4_invoice.pdf", data=invoice
     )
     print(f"✓ Generated: {output_path}")
 
+    # Many invoices: one JSON object per line, streamed and rendered concurrently
+    #   bulk_generate(generator, "invoice.html", "invoices.jsonl",
+    #                 "invoices/{invoice_number}.pdf", results_path="output/invoices.results.jsonl")
+    # or: python batch_convert.py merge invoice.html invoices.jsonl -o "invoices/{invoice_number}.pdf"
+
 
 def example_5_resume():
-    """Example 5: Generate a professional resume."""
+    """Example 5: Generate a professional resume from templates/resume.html."""
     print("\n" + "=" * 60)
     print("Example 5: Professional Resume")
     print("=" * 60)
 
-    resume_html = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <title>Resume</title>
-        <style>
-            * { margin: 0; padding: 0; box-sizing: border-box; }
-            body {
-                font-family: 'Helvetica', Arial, sans-serif;
-                line-height: 1.6;
-                color: #333;
+    resume = {
+        "name": "Jane Doe",
+        "contact": {
+            "Email": "jane.doe@email.com",
+            "Phone": "(555) 987-6543",
+            "LinkedIn": "linkedin.com/in/janedoe",
+        },
+        "summary": (
+            "Results-driven Software Engineer with 5+ years of experience in full-stack "
+            "development. Expertise in building scalable web applications and leading "
+            "cross-functional teams. Passionate about clean code and innovative solutions."
+        ),
+        "experience": [
+            {
+                "title": "Senior Software Engineer",
+                "company": "Tech Innovations Inc.",
+                "dates": "Jan 2022 - Present",
+                "highlights": [
+                    "Led development of microservices architecture serving 1M+ users",
+                    "Improved application performance by 40% through optimization",
+                    "Mentored junior developers and conducted code reviews",
+                ],
+            },
+            {
+                "title": "Software Engineer",
+                "company": "StartUp Solutions",
+                "dates": "Jun 2019 - Dec 2021",
+                "highlights": [
+                    "Built RESTful APIs using Python/Django and Node.js",
+                    "Implemented CI/CD pipelines reducing deployment time by 60%",
+                    "Collaborated with UX team to deliver responsive web applications",
+                ],
+            },
+        ],
+        "education": [
+            {
+                "degree": "Bachelor of Science in Computer Science",
+                "school": "University of Technology",
+                "dates": "2015 - 2019",
             }
-            .container { max-width: 800px; margin: 0 auto; padding: 20mm; }
-            .header {
-                text-align: center;
-                margin-bottom: 30px;
-                padding-bottom: 20px;
-                border-bottom: 2px solid #2c3e50;
-            }
-            .name {
-                font-size: 32px;
-                font-weight: bold;
-                color: #2c3e50;
-                margin-bottom: 5px;
-            }
-            .contact {
-                color: #7f8c8d;
-                font-size: 14px;
-            }
-            .section {
-                margin: 25px 0;
-            }
-            .section-title {
-                font-size: 20px;
-                color: #2c3e50;
-                border-bottom: 2px solid #3498db;
-                padding-bottom: 5px;
-                margin-bottom: 15px;
-                font-weight: bold;
-            }
-            .job-title {
-                font-weight: bold;
-                color: #2c3e50;
-                font-size: 16px;
-            }
-            .company {
-                color: #3498db;
-                font-style: italic;
-            }
-            .date {
-                color: #7f8c8d;
-                font-size: 14px;
-            }
-            .description {
-                margin: 10px 0 20px 20px;
-            }
-            ul { margin-left: 20px; }
-            li { margin: 5px 0; }
-            .skills {
-                display: flex;
-                flex-wrap: wrap;
-                gap: 10px;
-            }
-            .skill-tag {
-                background-color: #ecf0f1;
-                padding: 5px 15px;
-                border-radius: 15px;
-                font-size: 14px;
-                color: #2c3e50;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <div class="name">JANE DOE</div>
-                <div class="contact">
-                    Email: jane.doe@email.com | Phone: (555) 987-6543 | LinkedIn: linkedin.com/in/janedoe
-                </div>
-            </div>
-
-            <div class="section">
-                <div class="section-title">PROFESSIONAL SUMMARY</div>
-                <p>Results-driven Software Engineer with 5+ years of experience in full-stack development.
-                Expertise in building scalable web applications and leading cross-functional teams.
-                Passionate about clean code and innovative solutions.</p>
-            </div>
-
-            <div class="section">
-                <div class="section-title">EXPERIENCE</div>
-
-                <div class="job-title">Senior Software Engineer</div>
-                <div class="company">Tech Innovations Inc.</div>
-                <div class="date">Jan 2022 - Present</div>
-                <div class="description">
-                    <ul>
-                        <li>Led development of microservices architecture serving 1M+ users</li>
-                        <li>Improved application performance by 40% through optimization</li>
-                        <li>Mentored junior developers and conducted code reviews</li>
-                    </ul>
-                </div>
-
-                <div class="job-title">Software Engineer</div>
-                <div class="company">StartUp Solutions</div>
-                <div class="date">Jun 2019 - Dec 2021</div>
-                <div class="description">
-                    <ul>
-                        <li>Built RESTful APIs using Python/Django and Node.js</li>
-                        <li>Implemented CI/CD pipelines reducing deployment time by 60%</li>
-                        <li>Collaborated with UX team to deliver responsive web applications</li>
-                    </ul>
-                </div>
-            </div>
-
-            <div class="section">
-                <div class="section-title">EDUCATION</div>
-                <div class="job-title">Bachelor of Science in Computer Science</div>
-                <div class="company">University of Technology</div>
-                <div class="date">2015 - 2019</div>
-            </div>
-
-            <div class="section">
-                <div class="section-title">SKILLS</div>
-                <div class="skills">
-                    <span class="skill-tag">Python</span>
-                    <span class="skill-tag">JavaScript</span>
-                    <span class="skill-tag">React</span>
-                    <span class="skill-tag">Node.js</span>
-                    <span class="skill-tag">Docker</span>
-                    <span class="skill-tag">AWS</span>
-                    <span class="skill-tag">PostgreSQL</span>
-                    <span class="skill-tag">Git</span>
-                </div>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
+        ],
+        "skills": ["Python", "JavaScript", "React", "Node.js", "Docker", "AWS", "PostgreSQL", "Git"],
+    }
 
     generator = PDFGenerator()
-    output_path = generator.generate_pdf(
-        html_content=resume_html, output_filename="example5_resume.pdf"
+    output_path = generator.generate_from_template(
+        "resume.html", output_filename="example5_resume.pdf", data=resume
     )
     print(f"✓ Generated: {output_path}")
 
 
 def main():
     """Run all examples."""
+    configure_logging()
     print("\n" + "=" * 60)
     print("PDF GENERATOR - EXAMPLE USAGE")
     print("=" * 60)
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Asynchronous HTML to PDF Generator using Doppio API
+Non-blocking counterpart of PDFGenerator for asyncio applications.
+"""
+
+import os
+import asyncio
+import logging
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+try:
+    import httpx
+except ImportError:
+    # httpx is only required for the async generator
+    httpx = None
+
+try:
+    from .backends import DOPPIO_API_URL, DoppioAPIError, PDFStreamWriter, build_render_body
+    from .cache import render_key
+    from .generator import PDFGenerator, resolve_api_key
+    from .retry import RetryPolicy, parse_retry_after
+    from .singleflight import AsyncSingleFlight, copy_output
+    from .templates import TemplateStore
+except ImportError:
+    from backends import DOPPIO_API_URL, DoppioAPIError, PDFStreamWriter, build_render_body
+    from cache import render_key
+    from generator import PDFGenerator, resolve_api_key
+    from retry import RetryPolicy, parse_retry_after
+    from singleflight import AsyncSingleFlight, copy_output
+    from templates import TemplateStore
+
+logger = logging.getLogger("pdf_generator.async")
+
+
+class AsyncPDFGenerator:
+    """
+    Handles non-blocking PDF generation using the Doppio API.
+
+    Failed renders are retried with the same RetryPolicy as PDFGenerator.
+    There is no RateLimiter support: it blocks threads, so throttle async
+    callers with agenerate_many()'s concurrency cap instead.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_url: Optional[str] = None,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 60.0,
+        chunk_size: int = 64 * 1024,
+        coalesce: bool = True,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
+        """
+        Initialize the async PDF generator.
+
+        Args:
+            api_key: Doppio API key. If None, reads from DOPPIO_API_KEY environment variable.
+            api_url: Render endpoint. If None, reads from DOPPIO_API_URL or
+                uses the public Doppio direct-render endpoint.
+            max_connections: Maximum concurrent connections in the shared pool.
+            max_keepalive_connections: Idle connections kept open for reuse.
+            keepalive_expiry: Seconds an idle connection stays in the pool.
+            timeout: Per-request timeout in seconds.
+            chunk_size: Bytes read per chunk when streaming PDFs to disk.
+            coalesce: While a render is in flight, identical requests (same
+                HTML and options) wait for it and get a copy of its PDF
+                instead of rendering again. Counts are in coalesce_stats.
+            retry_policy: Retry behavior for throttled or transient failures
+                (defaults to RetryPolicy() with httpx's network errors).
+        """
+        if httpx is None:
+            raise ImportError(
+                "AsyncPDFGenerator requires httpx.\n"
+                "Install it with: pip install httpx"
+            )
+
+        self.api_key = resolve_api_key(api_key)
+        self.api_url = api_url or os.getenv("DOPPIO_API_URL", DOPPIO_API_URL)
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.base_dir = Path(__file__).parent.parent
+        self.template_dir = self.base_dir / "src"
+        self.output_dir = self.base_dir / "output"
+        self._html_sources = TemplateStore(self.template_dir)
+        self.flights = AsyncSingleFlight() if coalesce else None
+        self.retry_policy = retry_policy or RetryPolicy(
+            retryable_exceptions=(httpx.TimeoutException, httpx.NetworkError)
+        )
+
+        # Ensure output directory exists
+        self.output_dir.mkdir(exist_ok=True)
+
+        # Shared connection pool for every render from this generator
+        self.client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=timeout,
+        )
+
+    @property
+    def coalesce_stats(self) -> dict:
+        """Renders run (leaders), calls served by another caller's render (coalesced) and renders in flight."""
+        if self.flights is None:
+            return {"leaders": 0, "coalesced": 0, "in_flight": 0}
+        return self.flights.stats()
+
+    async def aclose(self):
+        """Close the shared HTTP client and release its connections."""
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    # Same cached lookup in src/ as the sync generator
+    load_html_template = PDFGenerator.load_html_template
+
+    async def generate_pdf(
+        self,
+        html_content: str,
+        output_filename: str = "output.pdf",
+        page_format: str = "A4",
+        print_background: bool = True,
+        wait_for: str = "networkidle0",
+    ) -> Path:
+        """
+        Generate a PDF from HTML content without blocking the event loop.
+
+        Args:
+            html_content: HTML content to convert.
+            output_filename: Name of the output PDF file.
+            page_format: Page format (A4, Letter, etc.).
+            print_background: Whether to print background graphics.
+            wait_for: Wait condition before rendering (networkidle0, load, domcontentloaded).
+
+        Returns:
+            Path to the generated PDF file.
+
+        Raises:
+            DoppioAPIError: If the API answers with an error status.
+            httpx.HTTPError: If the API request fails.
+        """
+        output_path = self.output_dir / output_filename
+        if self.flights is None:
+            return await self._render(html_content, output_path, page_format, print_background)
+
+        key = render_key(html_content, page_format, print_background, wait_for)
+        rendered_path, coalesced = await self.flights.do(
+            key, lambda: self._render(html_content, output_path, page_format, print_background)
+        )
+        if coalesced:
+            # Another task rendered the same document: take a copy of its PDF
+            await asyncio.get_running_loop().run_in_executor(
+                None, copy_output, rendered_path, output_path
+            )
+            logger.info("🔗 Coalesced with an identical render in flight")
+            logger.info("   Saved to: %s", output_path)
+        return output_path
+
+    async def _render(
+        self, html_content: str, output_path: Path, page_format: str, print_background: bool
+    ) -> Path:
+        """Render one document, without coalescing, retrying per retry_policy."""
+        policy = self.retry_policy
+        number = 1
+        while True:
+            try:
+                return await self._render_attempt(
+                    html_content, output_path, page_format, print_background
+                )
+            except Exception as e:
+                if number >= policy.max_attempts or not policy.is_retryable(e):
+                    raise
+                delay = policy.compute_delay(number, getattr(e, "retry_after", None))
+                logger.warning("🔁 Attempt %d failed, retrying in %.1fs...", number, delay)
+                await asyncio.sleep(delay)
+                number += 1
+
+    async def _render_attempt(
+        self, html_content: str, output_path: Path, page_format: str, print_background: bool
+    ) -> Path:
+        """Send one render request and stream the PDF to output_path."""
+        logger.info("🚀 Sending HTML to Doppio.sh for PDF rendering...")
+        logger.info("   Format: %s", page_format)
+        logger.info("   Output: %s", output_path)
+        logger.info("   HTML size: %s characters", f"{len(html_content):,}")
+
+        try:
+            # Stream the body so large PDFs never sit fully in memory
+            async with self.client.stream(
+                "POST",
+                self.api_url,
+                headers={"Content-Type": "application/json"},
+                content=build_render_body(
+                    html_content.encode("utf-8"), page_format, print_background
+                ),
+            ) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    try:
+                        error_data = response.json()
+                        logger.error("❌ Error: HTTP %s", response.status_code)
+                        logger.error("   Message: %s", error_data.get("message", "Unknown error"))
+                        if "error" in error_data:
+                            logger.error("   Error: %s", error_data["error"])
+                    except ValueError:
+                        logger.error("❌ Error: HTTP %s", response.status_code)
+                        logger.error("   Response: %s", response.text[:500])
+
+                    raise DoppioAPIError(
+                        response.status_code,
+                        retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                        body=response.text[:500],
+                    )
+
+                # Disk I/O runs in worker threads so a slow disk never
+                # stalls the event loop; chunks are written in order
+                loop = asyncio.get_running_loop()
+                writer = await loop.run_in_executor(None, PDFStreamWriter, output_path)
+                try:
+                    async for chunk in response.aiter_bytes(self.chunk_size):
+                        await loop.run_in_executor(None, writer.write, chunk)
+                    await loop.run_in_executor(None, writer.commit)
+                except BaseException:
+                    # Closing and unlinking the temp file is quick, and must
+                    # happen even if this task is being cancelled
+                    writer.abort()
+                    raise
+        except httpx.TimeoutException:
+            logger.error("❌ Error: Request timed out after %g seconds", self.timeout)
+            raise
+        except httpx.ConnectError:
+            logger.error("❌ Error: Could not connect to Doppio API")
+            logger.error("   Check your internet connection")
+            raise
+        except httpx.HTTPError as e:
+            logger.error("❌ Error: Request failed: %s", e)
+            raise
+
+        file_size = writer.bytes_written / 1024  # KB
+        logger.info("✅ Success! PDF generated (%.1f KB)", file_size)
+        logger.info("   Saved to: %s", output_path)
+
+        return output_path
+
+    async def generate_from_template(
+        self,
+        template_name: str = "template.html",
+        output_filename: str = "output.pdf",
+        **kwargs,
+    ) -> Path:
+        """
+        Generate PDF from a template file.
+
+        Args:
+            template_name: Name of the template file.
+            output_filename: Name of the output PDF file.
+            **kwargs: Additional arguments passed to generate_pdf().
+
+        Returns:
+            Path to the generated PDF file.
+        """
+        logger.info("📄 Loading template: %s", template_name)
+        html_content = await asyncio.get_running_loop().run_in_executor(
+            None, self.load_html_template, template_name
+        )
+
+        return await self.generate_pdf(html_content, output_filename, **kwargs)
+
+    async def agenerate_many(
+        self, documents: Iterable[dict], concurrency: int = 4
+    ) -> List[Union[Path, BaseException]]:
+        """
+        Render many documents concurrently.
+
+        Args:
+            documents: Keyword-argument dicts for generate_pdf(), e.g.
+                {"html_content": html, "output_filename": "a.pdf"}.
+            concurrency: Maximum number of renders in flight at once.
+
+        Returns:
+            One entry per document, in input order: the output Path on
+            success or the raised exception on failure.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def render(document: dict) -> Path:
+            async with semaphore:
+                return await self.generate_pdf(**document)
+
+        return await asyncio.gather(
+            *(render(document) for document in documents), return_exceptions=True
+        )
@@ -0,0 +1,641 @@
+#!/usr/bin/env python3
+"""
+Rendering backends for PDFGenerator.
+DoppioBackend renders through the Doppio API; LocalBackend renders simple
+documents in-process with no network round trip.
+"""
+
+import os
+import gzip
+import json
+import time
+import base64
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    from .local_renderer import local_render_blockers, render_html_to_pdf
+    from .metrics import RenderTimings, stage_timer
+    from .retry import parse_retry_after
+except ImportError:
+    from local_renderer import local_render_blockers, render_html_to_pdf
+    from metrics import RenderTimings, stage_timer
+    from retry import parse_retry_after
+
+
+DOPPIO_API_URL = "https://api.doppio.sh/v1/render/pdf/direct"
+
+# Ways of sending a document to the render endpoint:
+#   json  - base64 HTML inside a JSON body (the format the Doppio API documents)
+#   gzip  - the json body, gzip-compressed with Content-Encoding: gzip
+#   asset - HTML uploaded once through an asset uploader, rendered by URL
+UPLOAD_MODES = ("json", "gzip", "asset")
+
+# Tie-break order: an extra upload round trip last
+_MODE_PREFERENCE = ("gzip", "json", "asset")
+
+logger = logging.getLogger("pdf_generator.backends")
+
+# Timings of the render in progress on this thread, for connection setup
+_active_render = threading.local()
+
+
+class DoppioAPIError(Exception):
+    """Raised when the Doppio API answers with a non-200 status."""
+
+    def __init__(
+        self, status_code: int, retry_after: Optional[float] = None, body: Optional[str] = None
+    ):
+        super().__init__(f"Doppio API error: HTTP {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+        # Start of the response body, for diagnostics
+        self.body = body
+
+
+def build_render_payload(
+    html_content: str, page_format: str = "A4", print_background: bool = True
+) -> dict:
+    """Build the JSON body for a Doppio direct render request."""
+    # Encode HTML as base64 for Doppio API
+    encoded_html = base64.b64encode(html_content.encode("utf-8")).decode("utf-8")
+    return {
+        "page": {
+            "pdf": {
+                "printBackground": print_background,
+                "format": page_format,
+            },
+            "setContent": {"html": encoded_html},
+        }
+    }
+
+
+def _pdf_options(page_format: str, print_background: bool) -> bytes:
+    return json.dumps({"printBackground": print_background, "format": page_format}).encode(
+        "utf-8"
+    )
+
+
+def build_render_body(
+    html_bytes: bytes,
+    page_format: str = "A4",
+    print_background: bool = True,
+    encoded_html: Optional[bytes] = None,
+) -> bytes:
+    """
+    Build the JSON render request as bytes in a single buffer.
+
+    Equivalent to serializing build_render_payload(), but the base64 text is
+    spliced straight into the body without decoding it to str or passing
+    it through the JSON encoder (base64 needs no escaping). Pass
+    encoded_html to reuse an existing base64 encoding of html_bytes.
+    """
+    if encoded_html is None:
+        encoded_html = base64.b64encode(html_bytes)
+    return b"".join(
+        (
+            b'{"page": {"pdf": ',
+            _pdf_options(page_format, print_background),
+            b', "setContent": {"html": "',
+            encoded_html,
+            b'"}}}',
+        )
+    )
+
+
+def _asset_body(asset_url: str, page_format: str, print_background: bool) -> bytes:
+    """JSON render request for a document already uploaded to asset_url."""
+    return json.dumps(
+        {
+            "page": {
+                "pdf": {"printBackground": print_background, "format": page_format},
+                "goto": {"url": asset_url},
+            }
+        }
+    ).encode("utf-8")
+
+
+def render_body_size(html_size: int, page_format: str, print_background: bool) -> int:
+    """Size of build_render_body() for a document of html_size bytes, without building it."""
+    envelope = len(build_render_body(b"", page_format, print_background, b""))
+    return envelope + 4 * ((html_size + 2) // 3)
+
+
+class EncodedDocument:
+    """
+    A document encoded for upload, shared by renders with different options.
+
+    The UTF-8 bytes are produced up front; the base64 text and the asset
+    upload are made on first use and then reused, from any thread.
+    """
+
+    def __init__(self, html_bytes: bytes):
+        self.html_bytes = html_bytes
+        self._base64 = None
+        self._asset_url = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.html_bytes)
+
+    def base64(self, timings: Optional[RenderTimings] = None) -> bytes:
+        """Base64 encoding of the HTML bytes."""
+        with self._lock:
+            if self._base64 is None:
+                with stage_timer(timings, "serialize"):
+                    self._base64 = base64.b64encode(self.html_bytes)
+            return self._base64
+
+    def asset_url(
+        self,
+        uploader: Callable[[bytes, str], str],
+        timings: Optional[RenderTimings] = None,
+    ) -> str:
+        """URL of the HTML uploaded through uploader (uploaded once)."""
+        with self._lock:
+            if self._asset_url is None:
+                with stage_timer(timings, "asset"):
+                    self._asset_url = uploader(self.html_bytes, "text/html; charset=utf-8")
+                if timings is not None:
+                    timings.add_bytes("asset", len(self.html_bytes))
+            return self._asset_url
+
+    @property
+    def uploaded_url(self) -> Optional[str]:
+        """URL from an earlier asset upload, or None if not uploaded yet."""
+        with self._lock:
+            return self._asset_url
+
+
+class RenderRequest:
+    """A prepared render call: body bytes plus the headers to send them with."""
+
+    __slots__ = ("mode", "body", "headers")
+
+    def __init__(self, mode: str, body: bytes, headers: dict):
+        self.mode = mode
+        self.body = body
+        self.headers = headers
+
+    def __len__(self):
+        return len(self.body)
+
+    def __repr__(self):
+        return f"RenderRequest({self.mode}, {len(self.body):,} bytes)"
+
+
+class _TimedConnectMixin:
+    """Adds new-connection setup time to the active render's timings."""
+
+    def connect(self):
+        timings = getattr(_active_render, "timings", None)
+        if timings is None:
+            return super().connect()
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            timings.add("connect", time.perf_counter() - started)
+
+
+class _TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections report their setup time."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class PDFStreamWriter:
+    """
+    Writes a PDF response to disk chunk by chunk.
+
+    Chunks go to a temp file next to the destination, which is renamed into
+    place on commit() so readers never see a partial PDF. The %PDF- header is
+    checked as soon as the first bytes arrive. With timed=True the time spent
+    in disk I/O is accumulated in write_time.
+    """
+
+    PDF_MAGIC = b"%PDF-"
+
+    def __init__(self, output_path: Path, timed: bool = False):
+        self.output_path = Path(output_path)
+        self.bytes_written = 0
+        self.write_time = 0.0
+        self._timed = timed
+        self._head = b""
+        fd, self._tmp_name = tempfile.mkstemp(
+            dir=self.output_path.parent, prefix=".", suffix=".part"
+        )
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes):
+        """Append a chunk, validating the PDF header on the first bytes."""
+        if not chunk:
+            return
+        if len(self._head) < len(self.PDF_MAGIC):
+            self._head += chunk[: len(self.PDF_MAGIC) - len(self._head)]
+            if not self.PDF_MAGIC.startswith(self._head[: len(self.PDF_MAGIC)]):
+                raise Exception("Response is not a PDF (missing %PDF- header)")
+        if self._timed:
+            started = time.perf_counter()
+            self._file.write(chunk)
+            self.write_time += time.perf_counter() - started
+        else:
+            self._file.write(chunk)
+        self.bytes_written += len(chunk)
+
+    def commit(self) -> Path:
+        """Finish the file and atomically move it to output_path."""
+        started = time.perf_counter()
+        self._file.close()
+        if self.bytes_written == 0:
+            self.abort()
+            raise Exception("Empty response from API")
+        if self._head != self.PDF_MAGIC:
+            self.abort()
+            raise Exception("Response is not a PDF (missing %PDF- header)")
+        os.replace(self._tmp_name, self.output_path)
+        self.write_time += time.perf_counter() - started
+        return self.output_path
+
+    def abort(self):
+        """Discard the partial file."""
+        self._file.close()
+        try:
+            os.unlink(self._tmp_name)
+        except FileNotFoundError:
+            pass
+
+
+class RenderBackend:
+    """
+    Interface for turning HTML into a PDF file.
+
+    prepare() does the per-document work once (e.g. encoding the payload);
+    render() may then be called several times, e.g. by the retry loop.
+    Remote backends go through the cache, retry policy and rate limiter.
+    Both receive the render's RenderTimings when instrumentation is enabled,
+    and None otherwise.
+
+    To render one document with several option sets, encode() it once and
+    pass the result to prepare() in place of the HTML string.
+    """
+
+    name = "base"
+    remote = False
+
+    def supports(self, html_content: str, page_format: Optional[str] = None) -> bool:
+        """Return True if this backend can render the document faithfully."""
+        return True
+
+    def encode(self, html_content: str, timings: Optional[RenderTimings] = None):
+        """Do the option-independent part of prepare() (default: nothing)."""
+        return html_content
+
+    def prepare(
+        self,
+        html_content: str,
+        page_format: str = "A4",
+        print_background: bool = True,
+        wait_for: str = "networkidle0",
+        timings: Optional[RenderTimings] = None,
+    ):
+        """Build the backend-specific request for a document."""
+        raise NotImplementedError
+
+    def render(
+        self, prepared, output_path: Path, timings: Optional[RenderTimings] = None
+    ) -> int:
+        """
+        Render a prepared request to output_path.
+
+        Returns:
+            Number of bytes written.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the backend."""
+
+
+class DoppioBackend(RenderBackend):
+    """Renders through the Doppio direct-render API over a pooled session."""
+
+    name = "doppio"
+    remote = True
+
+    def __init__(
+        self,
+        api_key: str,
+        api_url: Optional[str] = None,
+        pool_connections: int = 4,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        chunk_size: int = 64 * 1024,
+        timeout: float = 60,
+        upload_modes: Optional[Iterable[str]] = None,
+        asset_uploader: Optional[Callable[[bytes, str], str]] = None,
+        gzip_level: int = 1,
+        gzip_min_size: int = 4096,
+    ):
+        """
+        Initialize the Doppio backend.
+
+        Args:
+            api_key: Doppio API key.
+            api_url: Render endpoint. If None, reads from DOPPIO_API_URL or
+                uses the public Doppio direct-render endpoint.
+            pool_connections: Number of per-host connection pools to keep.
+            pool_maxsize: Maximum connections kept open per host.
+            pool_block: Block when the per-host limit is reached instead of
+                opening extra, non-pooled connections.
+            keep_alive: Reuse connections across renders.
+            chunk_size: Bytes read per chunk when streaming PDFs to disk.
+            timeout: Per-request timeout in seconds.
+            upload_modes: Upload modes the endpoint accepts (see UPLOAD_MODES);
+                each document is sent with whichever yields the fewest bytes.
+                If None, reads the comma-separated DOPPIO_UPLOAD_MODES
+                (default "json", the only format the public API documents).
+            asset_uploader: Required for the "asset" mode. Called with the
+                HTML bytes and content type; returns a URL the renderer can load.
+            gzip_level: Compression level for the "gzip" mode. Level 1 is
+                within a few percent of level 6 on HTML at about half the CPU.
+            gzip_min_size: Documents smaller than this are not compressed.
+
+        Raises:
+            ValueError: If an upload mode is unknown, or "asset" is enabled
+                without an asset_uploader.
+        """
+        self.api_url = api_url or os.getenv("DOPPIO_API_URL", DOPPIO_API_URL)
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        if upload_modes is None:
+            upload_modes = os.getenv("DOPPIO_UPLOAD_MODES", "json").split(",")
+        self.upload_modes = tuple(mode.strip() for mode in upload_modes if mode.strip())
+        for mode in self.upload_modes:
+            if mode not in UPLOAD_MODES:
+                raise ValueError(f"Unknown upload mode: {mode!r}")
+        if not self.upload_modes:
+            raise ValueError("At least one upload mode is required")
+        if "asset" in self.upload_modes and asset_uploader is None:
+            raise ValueError('The "asset" upload mode requires an asset_uploader')
+        self.asset_uploader = asset_uploader
+        self.gzip_level = gzip_level
+        self.gzip_min_size = gzip_min_size
+
+        # Pooled session shared by every render from this backend
+        self.session = requests.Session()
+        adapter = _TimedHTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Authorization"] = f"Bearer {api_key}"
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+
+    def close(self):
+        """Close the pooled HTTP session and release its connections."""
+        self.session.close()
+
+    def encode(
+        self, html_content: str, timings: Optional[RenderTimings] = None
+    ) -> EncodedDocument:
+        """Encode the HTML to UTF-8 once for any number of option sets."""
+        with stage_timer(timings, "encode"):
+            document = EncodedDocument(html_content.encode("utf-8"))
+        if timings is not None:
+            timings.add_bytes("html", len(document))
+        return document
+
+    def prepare(
+        self,
+        html_content: Union[str, EncodedDocument],
+        page_format: str = "A4",
+        print_background: bool = True,
+        wait_for: str = "networkidle0",
+        timings: Optional[RenderTimings] = None,
+    ) -> RenderRequest:
+        """
+        Build the render request in the smallest accepted upload mode.
+
+        Candidates are compared by the request bodies they send, without
+        building the ones that cannot win: the json size is computed
+        arithmetically, asset costs its small render request plus, until
+        the document has been uploaded once, the upload of the HTML, and
+        only gzip has to be tried (per option set, as the options are
+        inside the compressed body).
+        """
+        if isinstance(html_content, EncodedDocument):
+            document = html_content
+        else:
+            document = self.encode(html_content, timings)
+        html_bytes = document.html_bytes
+
+        sizes = {}
+        for mode in self.upload_modes:
+            if mode == "json":
+                sizes[mode] = render_body_size(len(html_bytes), page_format, print_background)
+            elif mode == "asset":
+                asset_url = document.uploaded_url
+                if asset_url is None:
+                    # Still to upload; the URL it gets is short next to the HTML
+                    sizes[mode] = len(html_bytes) + len(
+                        _asset_body("", page_format, print_background)
+                    )
+                else:
+                    sizes[mode] = len(_asset_body(asset_url, page_format, print_background))
+
+        compressed = None
+        if "gzip" in self.upload_modes:
+            if len(html_bytes) >= self.gzip_min_size:
+                body = build_render_body(
+                    html_bytes, page_format, print_background, document.base64(timings)
+                )
+                with stage_timer(timings, "compress"):
+                    compressed = gzip.compress(body, compresslevel=self.gzip_level)
+                del body
+                sizes["gzip"] = len(compressed)
+            else:
+                # Too small to be worth compressing: send the plain JSON body
+                sizes.setdefault(
+                    "json", render_body_size(len(html_bytes), page_format, print_background)
+                )
+
+        mode = min(sizes, key=lambda m: (sizes[m], _MODE_PREFERENCE.index(m)))
+        logger.debug("Upload mode %s (%s bytes; candidates %s)", mode, sizes[mode], sizes)
+
+        if mode == "gzip":
+            return RenderRequest(
+                mode,
+                compressed,
+                {"Content-Type": "application/json", "Content-Encoding": "gzip"},
+            )
+        if mode == "asset":
+            asset_url = document.asset_url(self.asset_uploader, timings)
+            body = _asset_body(asset_url, page_format, print_background)
+            return RenderRequest(mode, body, {"Content-Type": "application/json"})
+
+        body = build_render_body(
+            html_bytes, page_format, print_background, document.base64(timings)
+        )
+        return RenderRequest(mode, body, {"Content-Type": "application/json"})
+
+    def render(
+        self,
+        prepared: RenderRequest,
+        output_path: Path,
+        timings: Optional[RenderTimings] = None,
+    ) -> int:
+        """
+        Make one render request and stream the PDF to output_path.
+
+        Returns:
+            Number of bytes written.
+        """
+        if timings is not None:
+            _active_render.timings = timings
+            connect_before = timings.stages.get("connect", 0.0)
+            started = time.perf_counter()
+        try:
+            # Stream the body so large PDFs never sit fully in memory
+            with self.session.post(
+                self.api_url,
+                headers=prepared.headers,
+                data=prepared.body,
+                timeout=self.timeout,
+                stream=True,
+            ) as response:
+                if timings is not None:
+                    # Time to response headers, less any new-connection setup
+                    connect = timings.stages.get("connect", 0.0) - connect_before
+                    timings.add("server", time.perf_counter() - started - connect)
+                    timings.add_bytes("request", len(prepared))
+
+                # Check if response is successful
+                if response.status_code == 200:
+                    # Doppio direct render returns raw PDF binary on success
+                    writer = PDFStreamWriter(output_path, timed=timings is not None)
+                    download_started = time.perf_counter()
+                    try:
+                        for chunk in response.iter_content(chunk_size=self.chunk_size):
+                            writer.write(chunk)
+                        writer.commit()
+                    except BaseException:
+                        writer.abort()
+                        raise
+
+                    if timings is not None:
+                        elapsed = time.perf_counter() - download_started
+                        timings.add("download", elapsed - writer.write_time)
+                        timings.add("write", writer.write_time)
+                        timings.add_bytes("pdf", writer.bytes_written)
+                    return writer.bytes_written
+                else:
+                    # Handle error responses
+                    try:
+                        # Try to parse JSON error response
+                        error_data = response.json()
+                        logger.error("❌ Error: HTTP %s", response.status_code)
+                        logger.error("   Message: %s", error_data.get("message", "Unknown error"))
+                        if "error" in error_data:
+                            logger.error("   Error: %s", error_data["error"])
+                    except:
+                        # If not JSON, show text response
+                        logger.error("❌ Error: HTTP %s", response.status_code)
+                        logger.error("   Response: %s", response.text[:500])  # Limit output length
+
+                    raise DoppioAPIError(
+                        response.status_code,
+                        retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                        body=response.text[:500],
+                    )
+
+        except DoppioAPIError:
+            raise
+        except requests.exceptions.Timeout:
+            logger.error("❌ Error: Request timed out after %g seconds", self.timeout)
+            raise
+        except requests.exceptions.ConnectionError:
+            logger.error("❌ Error: Could not connect to Doppio API")
+            logger.error("   Check your internet connection")
+            raise
+        except requests.exceptions.RequestException as e:
+            logger.error("❌ Error: Request failed: %s", e)
+            raise
+        except Exception as e:
+            logger.error("❌ Unexpected error: %s", e)
+            raise
+        finally:
+            if timings is not None:
+                _active_render.timings = None
+
+
+class LocalBackend(RenderBackend):
+    """Renders simple HTML in-process with the built-in layout engine."""
+
+    name = "local"
+    remote = False
+
+    def supports(self, html_content: str, page_format: Optional[str] = None) -> bool:
+        return not local_render_blockers(html_content, page_format)
+
+    def prepare(
+        self,
+        html_content: str,
+        page_format: str = "A4",
+        print_background: bool = True,
+        wait_for: str = "networkidle0",
+        timings: Optional[RenderTimings] = None,
+    ) -> tuple:
+        return html_content, page_format
+
+    def render(
+        self, prepared: tuple, output_path: Path, timings: Optional[RenderTimings] = None
+    ) -> int:
+        html_content, page_format = prepared
+        with stage_timer(timings, "layout"):
+            pdf_bytes = render_html_to_pdf(html_content, page_format)
+        writer = PDFStreamWriter(output_path, timed=timings is not None)
+        try:
+            writer.write(pdf_bytes)
+            writer.commit()
+        except BaseException:
+            writer.abort()
+            raise
+        if timings is not None:
+            timings.add("write", writer.write_time)
+            timings.add_bytes("pdf", writer.bytes_written)
+        return writer.bytes_written
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Mail-merge bulk generation: one template, one PDF per data record.
+Records are streamed from a CSV or JSON Lines file through a bounded render
+window, so memory stays flat however many rows the input has, and every
+outcome is appended to a results file that lets failed rows be re-run.
+"""
+
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Union
+
+try:
+    from .manifest import DONE, FAILED
+    from .templates import load_records
+except ImportError:
+    from manifest import DONE, FAILED
+    from templates import load_records
+
+logger = logging.getLogger("pdf_generator.bulk")
+
+
+def failed_indexes(results_path: Union[str, Path]) -> Set[int]:
+    """
+    Return the indexes of the records whose latest result is a failure.
+
+    The results file is a journal: re-runs append to it, and the last line
+    for an index wins. A torn final line from an interrupted run is ignored.
+    """
+    failed = set()
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry["status"] == FAILED:
+                failed.add(entry["index"])
+            else:
+                failed.discard(entry["index"])
+    return failed
+
+
+class BulkProgress:
+    """Counts bulk results and logs progress and throughput at an interval."""
+
+    def __init__(self, interval: float = 5.0):
+        """
+        Initialize the counters.
+
+        Args:
+            interval: Seconds between progress lines (0 logs every record).
+        """
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+        self._lock = threading.Lock()
+
+    def record(self, ok: bool):
+        """Count one result, logging progress if the interval has passed."""
+        with self._lock:
+            if ok:
+                self.done += 1
+            else:
+                self.failed += 1
+            now = time.perf_counter()
+            if now - self._last_report < self.interval:
+                return
+            self._last_report = now
+        self.report()
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            elapsed = max(time.perf_counter() - self.started, 1e-9)
+            records = self.done + self.failed
+            return {
+                "records": records,
+                "done": self.done,
+                "failed": self.failed,
+                "elapsed": elapsed,
+                "throughput": records / elapsed,
+            }
+
+    def report(self):
+        stats = self.as_dict()
+        logger.info(
+            "📬 %d record(s): %d done, %d failed, %.1f/s",
+            stats["records"],
+            stats["done"],
+            stats["failed"],
+            stats["throughput"],
+        )
+
+
+def bulk_generate(
+    generator,
+    template_name: str,
+    records: Union[str, Path, Iterable[dict]],
+    output_filename: str = "{index:05d}.pdf",
+    results_path: Optional[Union[str, Path]] = None,
+    retry_failed: bool = False,
+    max_workers: Optional[int] = None,
+    progress_interval: float = 5.0,
+    **kwargs,
+) -> Dict[str, float]:
+    """
+    Render a template once per record and record every outcome.
+
+    Args:
+        generator: PDFGenerator used for rendering.
+        template_name: Jinja2 template in templates/.
+        records: CSV, JSON Lines or JSON file (see templates.load_records()),
+            or an iterable of dicts. Read lazily, one window at a time.
+        output_filename: Output name pattern, formatted with the record's
+            fields and its position as "index", e.g. "invoices/{customer_id}.pdf".
+        results_path: JSON Lines file receiving one line per record:
+            {"index", "status", "output"} or {"index", "status", "error"}.
+        retry_failed: Re-render only the records results_path lists as
+            failed, appending their new results to it.
+        max_workers: Concurrent renders (defaults to the connection pool size).
+        progress_interval: Seconds between progress lines.
+        **kwargs: Additional arguments passed to generate_pdf().
+
+    Returns:
+        Counts of records, done and failed, elapsed seconds and throughput.
+
+    Raises:
+        ValueError: If retry_failed is set without results_path.
+    """
+    only = None
+    if retry_failed:
+        if results_path is None:
+            raise ValueError("retry_failed needs the results_path of the previous run")
+        only = failed_indexes(results_path)
+        logger.info("🔁 Re-running %d failed record(s)", len(only))
+
+    if isinstance(records, (str, Path)):
+        records = load_records(records)
+
+    progress = BulkProgress(progress_interval)
+    results = None
+    if results_path is not None:
+        results_path = Path(results_path)
+        results_path.parent.mkdir(parents=True, exist_ok=True)
+        results = open(results_path, "a" if retry_failed else "w", encoding="utf-8")
+    try:
+        if only is not None and not only:
+            return progress.as_dict()
+        for index, result in generator.generate_from_records(
+            template_name,
+            records,
+            output_filename,
+            max_workers=max_workers,
+            only=only,
+            **kwargs,
+        ):
+            ok = not isinstance(result, BaseException)
+            if results is not None:
+                entry = {"index": index, "status": DONE if ok else FAILED}
+                if ok:
+                    entry["output"] = str(result)
+                else:
+                    entry["error"] = str(result) or type(result).__name__
+                results.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                results.flush()
+            progress.record(ok)
+    finally:
+        if results is not None:
+            results.close()
+
+    progress.report()
+    return progress.as_dict()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Content-addressed on-disk cache for rendered PDFs.
+Identical HTML rendered with identical options is served from disk instead of the API.
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+try:
+    from .singleflight import copy_output
+except ImportError:
+    from singleflight import copy_output
+
+
+def render_key(
+    html_content: str,
+    page_format: str = "A4",
+    print_background: bool = True,
+    wait_for: str = "networkidle0",
+) -> str:
+    """
+    Return the cache key for a render request.
+
+    The key is a SHA-256 over the UTF-8 HTML bytes and the render options,
+    so any change to either produces a different entry.
+    """
+    digest = hashlib.sha256()
+    digest.update(html_content.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(f"{page_format}|{int(bool(print_background))}|{wait_for}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """Size-bounded LRU cache of rendered PDFs, keyed by render_key()."""
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize the render cache.
+
+        Args:
+            cache_dir: Directory holding cached PDFs (defaults to .pdf_cache/ in the project root).
+            max_bytes: Total size above which least recently used entries are evicted.
+        """
+        if cache_dir is None:
+            cache_dir = Path(__file__).parent.parent / ".pdf_cache"
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key -> size in bytes, least recently used first
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the LRU order from the files already on disk."""
+        found = []
+        for path in self.cache_dir.glob("*/*.pdf"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            found.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    def _path_for(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.pdf"
+
+    @property
+    def total_bytes(self) -> int:
+        """Total size of all cached PDFs."""
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, output_path: Path) -> bool:
+        """
+        Copy a cached PDF to output_path.
+
+        The copy goes through a temporary file renamed into place, so
+        readers of output_path never see a partial PDF.
+
+        Args:
+            key: Cache key from render_key().
+            output_path: Destination for the cached PDF.
+
+        Returns:
+            True on a hit, False on a miss.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return False
+            self._entries.move_to_end(key)
+
+        cached_path = self._path_for(key)
+        try:
+            copy_output(cached_path, output_path)
+            # mtime doubles as the LRU timestamp across restarts
+            os.utime(cached_path)
+        except FileNotFoundError:
+            # Removed behind our back; treat as a miss
+            with self._lock:
+                self._forget(key)
+                self.misses += 1
+            return False
+
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def put(self, key: str, pdf_path: Path):
+        """
+        Store a rendered PDF under key, evicting old entries if over budget.
+
+        Args:
+            key: Cache key from render_key().
+            pdf_path: Rendered PDF to copy into the cache.
+        """
+        cached_path = self._path_for(key)
+        cached_path.parent.mkdir(exist_ok=True)
+
+        # Write to a temp file first so readers never see a partial PDF
+        fd, tmp_name = tempfile.mkstemp(dir=cached_path.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(pdf_path, tmp_name)
+            os.replace(tmp_name, cached_path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+        size = cached_path.stat().st_size
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict()
+
+    def _forget(self, key: str):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self):
+        """Drop least recently used entries until under max_bytes."""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                self._path_for(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """Remove every cached PDF."""
+        with self._lock:
+            for key in list(self._entries):
+                try:
+                    self._path_for(key).unlink()
+                except FileNotFoundError:
+                    pass
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current usage."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -5,11 +5,39 @@ Converts HTML templates to professionally formatted PDF documents.
 """
 
 import os
+import re
 import sys
-import requests
-import base64
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Container, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    from .backends import DoppioAPIError, DoppioBackend, LocalBackend, RenderBackend
+    from .cache import RenderCache, render_key
+    from .local_renderer import PAGE_SIZES
+    from .metrics import CACHE_HIT, COALESCED, ERROR, SUCCESS, RenderMetrics, RenderTimings, stage_timer
+    from .optimizer import HTMLOptimizer, OptimizationReport
+    from .ratelimit import RateLimiter
+    from .retry import RenderAttempt, RetryPolicy
+    from .singleflight import SingleFlight, copy_output
+    from .storage import OutputStorage
+    from .templates import TEMPLATE_DIR, TemplateStore
+except ImportError:
+    from backends import DoppioAPIError, DoppioBackend, LocalBackend, RenderBackend
+    from cache import RenderCache, render_key
+    from local_renderer import PAGE_SIZES
+    from metrics import CACHE_HIT, COALESCED, ERROR, SUCCESS, RenderMetrics, RenderTimings, stage_timer
+    from optimizer import HTMLOptimizer, OptimizationReport
+    from ratelimit import RateLimiter
+    from retry import RenderAttempt, RetryPolicy
+    from singleflight import SingleFlight, copy_output
+    from storage import OutputStorage
+    from templates import TEMPLATE_DIR, TemplateStore
 
 # Try to load .env file if python-dotenv is available
 try:
@@ -20,40 +48,278 @@ except ImportError:
     # python-dotenv not installed, will use system environment variables only
     pass
 
+logger = logging.getLogger("pdf_generator")
+
+
+def configure_logging(level: int = logging.INFO, stream=None) -> logging.Logger:
+    """
+    Print the generator's status messages, as the command-line scripts do.
+
+    Library users who configure logging themselves can skip this; all
+    messages go to the "pdf_generator" logger and its children.
+
+    Args:
+        level: Minimum level to show.
+        stream: Output stream (defaults to stdout).
+
+    Returns:
+        The configured "pdf_generator" logger.
+    """
+    logger.setLevel(level)
+    if not logger.handlers:
+        handler = logging.StreamHandler(stream or sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+    return logger
+
+
+def resolve_api_key(api_key: Optional[str] = None) -> str:
+    """
+    Return the Doppio API key, falling back to DOPPIO_API_KEY.
+
+    Raises:
+        EnvironmentError: If no API key is available.
+    """
+    api_key = api_key or os.getenv("DOPPIO_API_KEY")
+    if not api_key:
+        raise EnvironmentError(
+            "DOPPIO_API_KEY environment variable is not set.\n"
+            "Please set your API key or sign up for free at https://doppio.sh\n\n"
+            "Quick Fix:\n"
+            "  1. Get free API key: https://doppio.sh\n"
+            "  2. Windows: Run set_api_key.bat\n"
+            "     Mac/Linux: Run python3 set_api_key.py\n"
+            "  3. Or see FIX_API_KEY.md for detailed help"
+        )
+    return api_key
+
+
+class _SharedDocument:
+    """
+    One document rendered with several option sets by generate_variants().
+
+    The first variant that needs it optimizes the document (at the widest
+    variant page format, so downscaled images suit every variant) and
+    encodes it for its backend; the other variants reuse the results.
+    """
+
+    def __init__(self, html_content: str, page_format: str):
+        self.source = html_content
+        self.page_format = page_format
+        self.html_content = None
+        self.report = None
+        self._encoded = {}
+        self._lock = threading.Lock()
+
+    def optimized(self, generator: "PDFGenerator", timings: Optional[RenderTimings]) -> str:
+        """Return the optimized document, optimizing it on first use."""
+        with self._lock:
+            if self.html_content is None:
+                self.html_content = generator._optimize(self.source, self.page_format, timings)
+                self.report = generator.last_optimization
+            else:
+                generator._local.optimization = self.report
+            return self.html_content
+
+    def encoded(self, backend: RenderBackend, html_content: str, timings: Optional[RenderTimings]):
+        """Return html_content encoded for backend, encoding it on first use."""
+        with self._lock:
+            key = id(backend)
+            if key not in self._encoded:
+                self._encoded[key] = backend.encode(html_content, timings)
+            return self._encoded[key]
+
 
 class PDFGenerator:
     """Handles PDF generation using the Doppio API."""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_url: Optional[str] = None,
+        pool_connections: int = 4,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        cache: Optional[RenderCache] = None,
+        chunk_size: int = 64 * 1024,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        backend: Union[str, RenderBackend, None] = None,
+        metrics: Optional[RenderMetrics] = None,
+        render_hooks: Optional[List[Callable[[RenderTimings], None]]] = None,
+        upload_modes: Optional[List[str]] = None,
+        asset_uploader: Optional[Callable[[bytes, str], str]] = None,
+        optimizer: Union[HTMLOptimizer, bool, None] = None,
+        coalesce: bool = True,
+        storage: Optional[OutputStorage] = None,
+    ):
         """
         Initialize the PDF generator.
 
         Args:
             api_key: Doppio API key. If None, reads from DOPPIO_API_KEY environment variable.
+            api_url: Render endpoint. If None, reads from DOPPIO_API_URL or
+                uses the public Doppio direct-render endpoint.
+            pool_connections: Number of per-host connection pools to keep.
+            pool_maxsize: Maximum connections kept open per host.
+            pool_block: Block when the per-host limit is reached instead of
+                opening extra, non-pooled connections.
+            keep_alive: Reuse connections across renders. If False, every
+                request asks the server to close the connection.
+            cache: Optional RenderCache. When set, identical renders are
+                served from disk without calling the API.
+            chunk_size: Bytes read per chunk when streaming PDFs to disk.
+            retry_policy: Retry behavior for throttled or transient failures.
+                Defaults to RetryPolicy(); pass RetryPolicy(max_attempts=1)
+                to fail on the first error.
+            rate_limiter: Optional RateLimiter capping requests per second
+                and renders in flight. Share one instance to share a budget.
+            backend: "doppio" renders every document through the API;
+                "local" renders in-process; "auto" renders documents the
+                local engine supports in-process and the rest through the
+                API. A RenderBackend instance may also be passed. If None,
+                reads PDF_BACKEND (default "doppio").
+            metrics: Optional RenderMetrics that aggregates every render's
+                stage timings, e.g. for a Prometheus endpoint.
+            render_hooks: Callables invoked with the RenderTimings of every
+                finished render. Timings are only collected when metrics or
+                at least one hook is set.
+            upload_modes: Request formats the endpoint accepts: "json"
+                (base64 JSON), "gzip" or "asset". Each document is sent
+                in whichever is smallest. If None, reads
+                DOPPIO_UPLOAD_MODES (default "json").
+            asset_uploader: Callable(html_bytes, content_type) -> URL, used by
+                the "asset" mode to pre-upload documents.
+            optimizer: HTMLOptimizer applied to documents before upload
+                (minification, <style> dedup, image downscaling). True uses
+                the defaults. If None, enabled when PDF_OPTIMIZE is set to 1.
+            coalesce: While a render is in flight, identical requests (same
+                HTML and options) from other threads wait for it and get a
+                copy of its PDF instead of rendering again. Counts are in
+                coalesce_stats.
+            storage: Optional OutputStorage managing the output directory.
+                When set, PDFs are written to its sharded layout and added
+                to its index, so its sweeper can expire them; output_dir
+                becomes its root.
         """
-        self.api_key = api_key or os.getenv("DOPPIO_API_KEY")
-        if not self.api_key:
-            raise EnvironmentError(
-                "DOPPIO_API_KEY environment variable is not set.\n"
-                "Please set your API key or sign up for free at https://doppio.sh\n\n"
-                "Quick Fix:\n"
-                "  1. Get free API key: https://doppio.sh\n"
-                "  2. Windows: Run set_api_key.bat\n"
-                "     Mac/Linux: Run python3 set_api_key.py\n"
-                "  3. Or see FIX_API_KEY.md for detailed help"
-            )
-
-        self.api_url = "https://api.doppio.sh/v1/render/pdf/direct"
+        self.api_key = resolve_api_key(api_key)
         self.base_dir = Path(__file__).parent.parent
         self.template_dir = self.base_dir / "src"
-        self.output_dir = self.base_dir / "output"
+        # Plain HTML documents in src/, and Jinja2 templates in templates/
+        self._html_sources = TemplateStore(self.template_dir)
+        self.templates = TemplateStore(TEMPLATE_DIR)
+        self.storage = storage
+        self.output_dir = storage.root if storage is not None else self.base_dir / "output"
+        self.cache = cache
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.render_hooks = list(render_hooks or [])
+        if metrics is not None:
+            self.render_hooks.append(metrics.observe)
+        self.retry_stats = {"renders": 0, "attempts": 0, "retries": 0, "retry_wait": 0.0}
+        self.optimization_stats = {
+            "documents": 0,
+            "original_bytes": 0,
+            "optimized_bytes": 0,
+            "images_resized": 0,
+        }
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self.flights = SingleFlight() if coalesce else None
 
         # Ensure output directory exists
         self.output_dir.mkdir(exist_ok=True)
 
+        self.doppio_backend = DoppioBackend(
+            self.api_key,
+            api_url=api_url,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            keep_alive=keep_alive,
+            chunk_size=chunk_size,
+            upload_modes=upload_modes,
+            asset_uploader=asset_uploader,
+        )
+        self.local_backend = LocalBackend()
+        if optimizer is None:
+            optimizer = os.getenv("PDF_OPTIMIZE", "").lower() in ("1", "true", "yes", "on")
+        if optimizer is True:
+            optimizer = HTMLOptimizer()
+        self.optimizer = optimizer or None
+        if backend is None:
+            backend = os.getenv("PDF_BACKEND", "doppio")
+        if isinstance(backend, RenderBackend):
+            self.backend = backend
+        elif backend in ("doppio", "local", "auto"):
+            self.backend = backend
+        else:
+            raise ValueError(f"Unknown backend: {backend!r}")
+
+    @property
+    def session(self):
+        """Pooled requests session used for Doppio API calls."""
+        return self.doppio_backend.session
+
+    @property
+    def api_url(self) -> str:
+        return self.doppio_backend.api_url
+
+    @api_url.setter
+    def api_url(self, value: str):
+        self.doppio_backend.api_url = value
+
+    def select_backend(self, html_content: str, page_format: Optional[str] = None) -> RenderBackend:
+        """Return the backend that will render html_content (in page_format, if given)."""
+        if isinstance(self.backend, RenderBackend):
+            return self.backend
+        if self.backend == "local":
+            return self.local_backend
+        if self.backend == "auto" and self.local_backend.supports(html_content, page_format):
+            return self.local_backend
+        return self.doppio_backend
+
+    def add_render_hook(self, hook: Callable[[RenderTimings], None]):
+        """Call hook with the RenderTimings of every subsequent render."""
+        self.render_hooks.append(hook)
+
+    def close(self):
+        """Close the pooled HTTP session and release its connections."""
+        self.doppio_backend.close()
+        if isinstance(self.backend, RenderBackend):
+            self.backend.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def last_attempts(self) -> List[RenderAttempt]:
+        """Per-attempt timings of the last render made on this thread."""
+        return getattr(self._local, "attempts", [])
+
+    @property
+    def last_optimization(self) -> Optional[OptimizationReport]:
+        """Optimization report of the last render made on this thread, if optimized."""
+        return getattr(self._local, "optimization", None)
+
+    @property
+    def coalesce_stats(self) -> dict:
+        """Renders run (leaders), calls served by another caller's render (coalesced) and renders in flight."""
+        if self.flights is None:
+            return {"leaders": 0, "coalesced": 0, "in_flight": 0}
+        return self.flights.stats()
+
     def load_html_template(self, template_name: str = "template.html") -> str:
         """
-        Load HTML content from a template file.
+        Load HTML content from a plain HTML file in src/.
+
+        The file is read once and kept in memory until it changes on disk.
 
         Args:
             template_name: Name of the template file to load.
@@ -64,13 +330,42 @@ class PDFGenerator:
         Raises:
             FileNotFoundError: If template file doesn't exist.
         """
-        template_path = self.template_dir / template_name
+        return self._html_sources.source(template_name)
+
+    def render_template(self, template_name: str, data: Optional[dict] = None) -> str:
+        """
+        Render a Jinja2 template from the templates/ directory with data.
+
+        Templates are compiled once and recompiled when the file changes.
+        Values are HTML-escaped; a variable missing from data raises.
 
-        if not template_path.exists():
-            raise FileNotFoundError(f"Template not found: {template_path}")
+        Args:
+            template_name: Name of the template file.
+            data: Values available to the template.
 
-        with open(template_path, "r", encoding="utf-8") as f:
-            return f.read()
+        Returns:
+            The rendered HTML.
+        """
+        return self.templates.render(template_name, data)
+
+    def output_path(self, output_filename: Union[str, Path]) -> Path:
+        """
+        Return where a PDF named output_filename is written, creating its directory.
+
+        Names are relative to the output directory, or placed in the output
+        storage's sharded layout when one is set; absolute paths are kept.
+
+        Raises:
+            ValueError: If storage is set and the name contains "." or "..".
+        """
+        path = Path(output_filename)
+        if not path.is_absolute():
+            if self.storage is not None:
+                path = self.storage.path_for(output_filename)
+            else:
+                path = self.output_dir / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
 
     def generate_pdf(
         self,
@@ -79,136 +374,446 @@ class PDFGenerator:
         page_format: str = "A4",
         print_background: bool = True,
         wait_for: str = "networkidle0",
+        use_cache: bool = True,
     ) -> Path:
         """
         Generate a PDF from HTML content using Doppio API.
 
+        Retryable failures (see RetryPolicy) are retried with backoff before
+        being raised; per-attempt timings are available from last_attempts.
+
         Args:
             html_content: HTML content to convert.
-            output_filename: Name of the output PDF file.
+            output_filename: Name of the output PDF file (see output_path()).
             page_format: Page format (A4, Letter, etc.).
             print_background: Whether to print background graphics.
             wait_for: Wait condition before rendering (networkidle0, load, domcontentloaded).
+            use_cache: Consult and fill the render cache, if one is configured.
 
         Returns:
             Path to the generated PDF file.
 
         Raises:
-            requests.HTTPError: If the API request fails.
+            DoppioAPIError: If the API answers with an error status.
+            requests.RequestException: If the request fails at the network level.
         """
-        output_path = self.output_dir / output_filename
+        return self._render(
+            html_content, output_filename, page_format, print_background, wait_for, use_cache
+        )
 
-        print(f"🚀 Sending HTML to Doppio.sh for PDF rendering...")
-        print(f"   Format: {page_format}")
-        print(f"   Output: {output_path}")
-        print(f"   HTML size: {len(html_content):,} characters")
+    def generate_variants(
+        self,
+        html_content: str,
+        variants: Iterable[Union[str, dict]],
+        output_filename: str = "output.pdf",
+        max_workers: Optional[int] = None,
+        **options,
+    ) -> Dict[str, Union[Path, BaseException]]:
+        """
+        Render one document with several option sets concurrently.
 
-        try:
-            # Encode HTML as base64 for Doppio API
-            encoded_html = base64.b64encode(html_content.encode("utf-8")).decode(
-                "utf-8"
-            )
+        The document is optimized and encoded once and the renders share the
+        connection pool. A failed variant does not stop the others.
 
-            response = requests.post(
-                self.api_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "page": {
-                        "pdf": {
-                            "printBackground": print_background,
-                            "format": page_format,
-                        },
-                        "setContent": {"html": encoded_html},
-                    }
-                },
-                timeout=60,
-            )
+        Args:
+            html_content: HTML content to convert.
+            variants: Page formats ("A4") or dicts of generate_pdf() options
+                ({"page_format": "Letter", "print_background": False}). A
+                dict may set "name" (the result key) and "output_filename".
+            output_filename: Base name of the output files; each variant is
+                written to <stem>_<name><suffix>, e.g. output_letter.pdf.
+            max_workers: Maximum renders in flight (default: one per
+                variant, up to the connection pool size).
+            **options: generate_pdf() options applied to every variant
+                (print_background, wait_for, use_cache).
 
-            # Check if response is successful
-            if response.status_code == 200:
-                # Doppio direct render returns raw PDF binary on success
-                if len(response.content) > 0:
-                    # Save PDF content
-                    with open(output_path, "wb") as f:
-                        f.write(response.content)
+        Returns:
+            Variant name -> output Path on success or the raised exception
+            on failure, in input order. Names are the "name" option or the
+            page format followed by any other options, e.g. "Letter" or
+            "A4-print_background=False".
 
-                    file_size = output_path.stat().st_size / 1024  # KB
-                    print(f"✅ Success! PDF generated ({file_size:.1f} KB)")
-                    print(f"   Saved to: {output_path}")
+        Raises:
+            ValueError: If two variants have the same name.
+        """
+        jobs = {}
+        for variant in variants:
+            if isinstance(variant, str):
+                variant = {"page_format": variant}
+            variant = dict(variant)
+            name = variant.pop("name", None)
+            filename = variant.pop("output_filename", None)
+            if name is None:
+                extra = sorted((key, value) for key, value in variant.items() if key != "page_format")
+                name = "-".join(
+                    [variant.get("page_format", "A4")] + [f"{key}={value}" for key, value in extra]
+                )
+            if name in jobs:
+                raise ValueError(f"Duplicate variant: {name!r}")
+            if filename is None:
+                base = Path(output_filename)
+                slug = re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+                filename = str(base.with_name(f"{base.stem}_{slug}{base.suffix or '.pdf'}"))
+            jobs[name] = (filename, {**options, **variant})
+        if not jobs:
+            return {}
+
+        formats = [job.get("page_format", "A4") for _, job in jobs.values()]
+        widest = max(formats, key=lambda fmt: PAGE_SIZES.get(fmt.lower(), PAGE_SIZES["a4"])[0])
+        shared = _SharedDocument(html_content, widest)
+
+        def render(job):
+            filename, kwargs = job
+            return self._render(html_content, filename, shared=shared, **kwargs)
+
+        if max_workers is None:
+            max_workers = min(len(jobs), self.doppio_backend.pool_maxsize)
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {name: pool.submit(render, job) for name, job in jobs.items()}
+            for name, future in futures.items():
+                error = future.exception()
+                if error is not None:
+                    logger.error("❌ Variant %s failed: %s", name, error)
+                results[name] = error if error is not None else future.result()
+        return results
+
+    def _render(
+        self,
+        html_content: str,
+        output_filename: str = "output.pdf",
+        page_format: str = "A4",
+        print_background: bool = True,
+        wait_for: str = "networkidle0",
+        use_cache: bool = True,
+        shared: Optional[_SharedDocument] = None,
+    ) -> Path:
+        """Render one document; see generate_pdf(). shared is set by generate_variants()."""
+        output_path = self.output_path(output_filename)
+        if self.flights is None:
+            self._render_once(
+                html_content, output_path, page_format, print_background, wait_for, use_cache, shared
+            )
+        else:
+            key = render_key(html_content, page_format, print_background, wait_for)
+            started = time.perf_counter()
+            rendered_path, coalesced = self.flights.do(
+                key,
+                lambda: self._render_once(
+                    html_content,
+                    output_path,
+                    page_format,
+                    print_background,
+                    wait_for,
+                    use_cache,
+                    shared,
+                    key,
+                ),
+            )
+            if coalesced:
+                # Another thread rendered the same document: take a copy of its PDF
+                self._local.attempts = []
+                self._local.optimization = None
+                copy_output(rendered_path, output_path)
+                logger.info("🔗 Coalesced with an identical render in flight")
+                logger.info("   Saved to: %s", output_path)
+                if self.render_hooks:
+                    backend = self.select_backend(html_content, page_format)
+                    timings = RenderTimings(backend.name, output_path)
+                    timings.add("coalesce", time.perf_counter() - started)
+                    self._emit_timings(timings, COALESCED)
+
+        if self.storage is not None and not Path(output_filename).is_absolute():
+            self.storage.add(output_filename)
+        return output_path
+
+    def _render_once(
+        self,
+        html_content: str,
+        output_path: Path,
+        page_format: str,
+        print_background: bool,
+        wait_for: str,
+        use_cache: bool,
+        shared: Optional[_SharedDocument],
+        key: Optional[str] = None,
+    ) -> Path:
+        """Render one document, without coalescing. key is its render_key(), if known."""
+        attempts = []
+        self._local.attempts = attempts
+        self._local.optimization = None
+        backend = self.select_backend(html_content, page_format)
+        # Collect stage timings only when someone is listening
+        timings = RenderTimings(backend.name, output_path) if self.render_hooks else None
 
+        try:
+            if not backend.remote:
+                # In-process render: no cache, retries or rate limiting needed
+                started = time.perf_counter()
+                bytes_written = backend.render(
+                    backend.prepare(
+                        html_content, page_format, print_background, wait_for, timings=timings
+                    ),
+                    output_path,
+                    timings=timings,
+                )
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    "✅ Success! PDF rendered locally (%.1f KB in %.0f ms)",
+                    bytes_written / 1024,
+                    elapsed * 1000,
+                )
+                logger.info("   Saved to: %s", output_path)
+                self._emit_timings(timings, SUCCESS, attempts=1)
+                return output_path
+
+            cache_key = None
+            if self.cache is not None and use_cache:
+                with stage_timer(timings, "cache"):
+                    cache_key = key or render_key(
+                        html_content, page_format, print_background, wait_for
+                    )
+                    cache_hit = self.cache.get(cache_key, output_path)
+                if cache_hit:
+                    file_size = output_path.stat().st_size / 1024  # KB
+                    logger.info("♻️  Cache hit: reused rendered PDF (%.1f KB)", file_size)
+                    logger.info("   Saved to: %s", output_path)
+                    self._emit_timings(timings, CACHE_HIT)
                     return output_path
+
+            if self.optimizer is not None:
+                # After the cache lookup, so cache hits never pay for it
+                if shared is not None:
+                    html_content = shared.optimized(self, timings)
                 else:
-                    print("❌ Error: Empty response from Doppio API")
-                    raise Exception("Empty response from API")
-            else:
-                # Handle error responses
+                    html_content = self._optimize(html_content, page_format, timings)
+
+            logger.info("🚀 Sending HTML to Doppio.sh for PDF rendering...")
+            logger.info("   Format: %s", page_format)
+            logger.info("   Output: %s", output_path)
+            logger.info("   HTML size: %s characters", f"{len(html_content):,}")
+
+            document = html_content
+            if shared is not None:
+                document = shared.encoded(backend, html_content, timings)
+            prepared = backend.prepare(
+                document, page_format, print_background, wait_for, timings=timings
+            )
+            policy = self.retry_policy
+
+            while True:
+                number = len(attempts) + 1
+                slot = self.rate_limiter.slot() if self.rate_limiter else nullcontext()
+                started = time.perf_counter()
                 try:
-                    # Try to parse JSON error response
-                    error_data = response.json()
-                    print(f"❌ Error: HTTP {response.status_code}")
-                    print(f"   Message: {error_data.get('message', 'Unknown error')}")
-                    if "error" in error_data:
-                        print(f"   Error: {error_data['error']}")
-                except:
-                    # If not JSON, show text response
-                    print(f"❌ Error: HTTP {response.status_code}")
-                    print(f"   Response: {response.text[:500]}")  # Limit output length
-
-                raise Exception(f"Doppio API error: HTTP {response.status_code}")
-
-        except requests.exceptions.Timeout:
-            print("❌ Error: Request timed out after 60 seconds")
-            raise
-        except requests.exceptions.ConnectionError:
-            print("❌ Error: Could not connect to Doppio API")
-            print("   Check your internet connection")
-            raise
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Error: Request failed: {str(e)}")
-            raise
+                    with slot:
+                        # Time the request itself, not the wait for a rate-limit slot
+                        acquired = time.perf_counter()
+                        if timings is not None and self.rate_limiter is not None:
+                            timings.add("rate_limit", acquired - started)
+                        started = acquired
+                        bytes_written = backend.render(prepared, output_path, timings=timings)
+                except Exception as e:
+                    duration = time.perf_counter() - started
+                    retry = number < policy.max_attempts and policy.is_retryable(e)
+                    delay = (
+                        policy.compute_delay(number, getattr(e, "retry_after", None))
+                        if retry
+                        else 0.0
+                    )
+                    attempts.append(
+                        RenderAttempt(
+                            number, duration, str(e), getattr(e, "status_code", None), delay
+                        )
+                    )
+                    if not retry:
+                        self._record_attempts(attempts)
+                        raise
+                    if self.rate_limiter is not None and getattr(e, "status_code", None) == 429:
+                        # Throttled despite the limiter: pause everyone sharing the budget
+                        self.rate_limiter.backoff(delay)
+                    logger.warning("🔁 Attempt %d failed, retrying in %.1fs...", number, delay)
+                    with stage_timer(timings, "retry_wait"):
+                        time.sleep(delay)
+                    continue
+
+                attempts.append(RenderAttempt(number, time.perf_counter() - started))
+                self._record_attempts(attempts)
+                break
+
+            file_size = bytes_written / 1024  # KB
+            logger.info("✅ Success! PDF generated (%.1f KB)", file_size)
+            logger.info("   Saved to: %s", output_path)
+            if len(attempts) > 1:
+                logger.info("   Attempts: %d", len(attempts))
+
+            if cache_key is not None:
+                with stage_timer(timings, "cache"):
+                    self.cache.put(cache_key, output_path)
+
         except Exception as e:
-            print(f"❌ Unexpected error: {str(e)}")
+            self._emit_timings(timings, ERROR, e, attempts=len(attempts))
             raise
 
+        self._emit_timings(timings, SUCCESS, attempts=len(attempts))
+        return output_path
+
+    def _optimize(self, html_content: str, page_format: str, timings: Optional[RenderTimings]) -> str:
+        """Run the optimizer over a document and record what it saved."""
+        with stage_timer(timings, "optimize"):
+            html_content, report = self.optimizer.optimize(html_content, page_format)
+        self._record_optimization(report)
+        if timings is not None:
+            timings.add_bytes("saved", report.bytes_saved)
+        logger.info(
+            "🗜️  Optimized HTML: %.1f KB -> %.1f KB (saved %.1f%%)",
+            report.original_bytes / 1024,
+            report.optimized_bytes / 1024,
+            report.ratio * 100,
+        )
+        return html_content
+
+    def _record_optimization(self, report: OptimizationReport):
+        """Keep a render's optimization report and fold it into the totals."""
+        self._local.optimization = report
+        with self._stats_lock:
+            self.optimization_stats["documents"] += 1
+            self.optimization_stats["original_bytes"] += report.original_bytes
+            self.optimization_stats["optimized_bytes"] += report.optimized_bytes
+            self.optimization_stats["images_resized"] += report.images_resized
+
+    def _emit_timings(
+        self,
+        timings: Optional[RenderTimings],
+        outcome: str,
+        error: Optional[BaseException] = None,
+        attempts: int = 0,
+    ):
+        """Finish a render's timings and hand them to every render hook."""
+        if timings is None:
+            return
+        timings.attempts = attempts
+        timings.finish(outcome, error)
+        for hook in self.render_hooks:
+            try:
+                hook(timings)
+            except Exception:
+                logger.exception("Render hook %r failed", hook)
+
+    def _record_attempts(self, attempts: List[RenderAttempt]):
+        """Fold one render's attempts into the cumulative retry stats."""
+        with self._stats_lock:
+            self.retry_stats["renders"] += 1
+            self.retry_stats["attempts"] += len(attempts)
+            self.retry_stats["retries"] += len(attempts) - 1
+            self.retry_stats["retry_wait"] += sum(a.delay for a in attempts)
+
     def generate_from_template(
         self,
         template_name: str = "template.html",
         output_filename: str = "output.pdf",
+        data: Optional[dict] = None,
         **kwargs,
     ) -> Path:
         """
         Generate PDF from a template file.
 
         Args:
-            template_name: Name of the template file.
+            template_name: Name of the template file: a Jinja2 template in
+                templates/ when data is given, else a plain HTML file in src/.
             output_filename: Name of the output PDF file.
+            data: Values to render the template with (see render_template()).
+                If None, the file is used as-is.
             **kwargs: Additional arguments passed to generate_pdf().
 
         Returns:
             Path to the generated PDF file.
         """
-        print(f"📄 Loading template: {template_name}")
-        html_content = self.load_html_template(template_name)
+        logger.info("📄 Loading template: %s", template_name)
+        if data is None:
+            html_content = self.load_html_template(template_name)
+        else:
+            html_content = self.render_template(template_name, data)
 
         return self.generate_pdf(html_content, output_filename, **kwargs)
 
+    def generate_from_records(
+        self,
+        template_name: str,
+        records: Iterable[dict],
+        output_filename: str = "{index:05d}.pdf",
+        max_workers: Optional[int] = None,
+        only: Optional[Container[int]] = None,
+        **kwargs,
+    ) -> Iterator[Tuple[int, Union[Path, BaseException]]]:
+        """
+        Render one template against many data records concurrently.
+
+        Records are consumed lazily (e.g. from templates.load_records()),
+        with at most 2 * max_workers rendering or waiting at a time, so
+        memory does not grow with the number of records.
+
+        Args:
+            template_name: Name of a Jinja2 template in templates/.
+            records: Data dicts, one per PDF.
+            output_filename: Output name pattern, formatted with the record's
+                fields and its position as "index", e.g.
+                "invoice_{invoice_number}.pdf".
+            max_workers: Concurrent renders (defaults to the connection pool size).
+            only: Render only the records at these positions; the others are
+                read and skipped, so indexes stay those of the full input.
+            **kwargs: Additional arguments passed to generate_pdf().
+
+        Yields:
+            (index, output Path) for each rendered record in input order, or
+            (index, exception) if rendering that record failed.
+        """
+        template = self.templates.get(template_name)
+        output_root = self.output_dir.resolve()
+
+        def render(index: int, record: dict) -> Path:
+            filename = output_filename.format_map({**record, "index": index})
+            output_path = (self.output_dir / filename).resolve()
+            if output_root not in output_path.parents:
+                raise ValueError(f"Output path escapes the output directory: {filename}")
+            return self.generate_pdf(template.render(record), filename, **kwargs)
+
+        if max_workers is None:
+            max_workers = self.doppio_backend.pool_maxsize
+        max_workers = max(1, max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = deque()
+            for index, record in enumerate(records):
+                if only is not None and index not in only:
+                    continue
+                pending.append((index, pool.submit(render, index, record)))
+                if len(pending) >= 2 * max_workers:
+                    yield self._record_result(*pending.popleft())
+            while pending:
+                yield self._record_result(*pending.popleft())
+
+    @staticmethod
+    def _record_result(index: int, future) -> Tuple[int, Union[Path, BaseException]]:
+        error = future.exception()
+        if error is not None:
+            logger.error("❌ Record %d failed: %s", index, error)
+            return index, error
+        return index, future.result()
+
 
 def main():
     """Main entry point for the script."""
+    configure_logging()
     try:
         # Initialize generator
-        generator = PDFGenerator()
-
-        # Generate PDF from template
-        output_path = generator.generate_from_template(
-            template_name="template.html",
-            output_filename="acp-101-guide.pdf",
-            page_format="A4",
-            print_background=True,
-        )
+        with PDFGenerator() as generator:
+            # Generate PDF from template
+            output_path = generator.generate_from_template(
+                template_name="template.html",
+                output_filename="acp-101-guide.pdf",
+                page_format="A4",
+                print_background=True,
+            )
 
         print(f"\n🎉 PDF generation complete!")
         print(f"   Open: {output_path.absolute()}")
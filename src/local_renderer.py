@@ -0,0 +1,753 @@
+#!/usr/bin/env python3
+"""
+Minimal in-process HTML to PDF renderer.
+Lays out simple text documents (headings, paragraphs, lists, quotes, code)
+with the PDF standard fonts. No network, browser or third-party packages.
+"""
+
+import re
+import html
+import zlib
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+# Page sizes in PDF points (1/72 inch)
+PAGE_SIZES = {
+    "a3": (841.89, 1190.55),
+    "a4": (595.28, 841.89),
+    "a5": (419.53, 595.28),
+    "letter": (612.0, 792.0),
+    "legal": (612.0, 1008.0),
+    "tabloid": (792.0, 1224.0),
+}
+
+PAGE_MARGIN = 56.0  # ~2 cm
+BASE_FONT_SIZE = 11.0
+LINE_SPACING = 1.4
+
+# Standard 14 fonts used by the renderer: resource name -> base font
+FONTS = {
+    "F1": "Helvetica",
+    "F2": "Helvetica-Bold",
+    "F3": "Helvetica-Oblique",
+    "F4": "Helvetica-BoldOblique",
+    "F5": "Courier",
+}
+
+# Glyph widths (1/1000 em) for ASCII 32..126 from the Adobe core font metrics
+_HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+_HELVETICA_BOLD_WIDTHS = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+# Widths of common WinAnsi punctuation above ASCII
+_EXTRA_WIDTHS = {0x85: 1000, 0x91: 222, 0x92: 222, 0x93: 333, 0x94: 333, 0x95: 350, 0x96: 556, 0x97: 1000}
+
+BLOCK_TAGS = {
+    "p", "div", "h1", "h2", "h3", "h4", "h5", "h6", "li", "pre", "blockquote",
+    "ul", "ol", "section", "article", "header", "footer", "main", "nav", "aside",
+    "hr", "br", "dl", "dt", "dd", "figure", "figcaption", "address",
+}
+SKIP_TAGS = {"head", "style", "script", "title", "noscript", "template"}
+BOLD_TAGS = {"b", "strong", "th", "dt"}
+ITALIC_TAGS = {"i", "em", "cite", "var", "blockquote"}
+MONO_TAGS = {"code", "kbd", "samp", "tt", "pre"}
+
+# Per-tag defaults: font size (relative to base), bold, spacing before/after (pt)
+_TAG_DEFAULTS = {
+    "h1": (2.0, True, 14, 10),
+    "h2": (1.6, True, 14, 8),
+    "h3": (1.3, True, 10, 6),
+    "h4": (1.1, True, 8, 4),
+    "h5": (1.0, True, 6, 4),
+    "h6": (0.9, True, 6, 4),
+    "pre": (0.85, False, 6, 8),
+    "li": (1.0, False, 0, 3),
+}
+
+# Tags that never appear in documents the local engine can handle
+UNSUPPORTED_TAGS = {
+    "img", "script", "iframe", "object", "embed", "video", "audio", "svg",
+    "canvas", "link", "table", "form", "input", "math", "picture", "source",
+}
+
+# CSS the renderer honors, plus cosmetic properties it can safely ignore
+LOCAL_CSS_PROPERTIES = {
+    "color", "font-size", "font-weight", "font-style", "text-align",
+    "page-break-before", "break-before", "page-break-after", "break-after",
+    "page-break-inside", "break-inside", "font-family", "line-height",
+    "background", "background-color", "box-sizing", "max-width", "width",
+    "letter-spacing", "text-decoration", "overflow", "overflow-x", "overflow-y",
+    "word-wrap", "overflow-wrap", "font-variant", "orphans", "widows",
+}
+LOCAL_CSS_PREFIXES = ("--", "margin", "padding", "border", "list-style", "font-")
+
+_NAMED_COLORS = {
+    "black": (0, 0, 0), "white": (1, 1, 1), "red": (1, 0, 0), "green": (0, 0.5, 0),
+    "blue": (0, 0, 1), "gray": (0.5, 0.5, 0.5), "grey": (0.5, 0.5, 0.5),
+    "navy": (0, 0, 0.5), "maroon": (0.5, 0, 0), "purple": (0.5, 0, 0.5),
+    "teal": (0, 0.5, 0.5), "orange": (1, 0.65, 0), "silver": (0.75, 0.75, 0.75),
+}
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_STYLE_BLOCK = re.compile(r"<style[^>]*>(.*?)</style>", re.S | re.I)
+_STYLE_ATTR = re.compile(r"""\sstyle\s*=\s*("([^"]*)"|'([^']*)')""", re.I)
+_TAG_NAME = re.compile(r"<\s*([a-zA-Z][a-zA-Z0-9]*)")
+_CLASS_ATTR = re.compile(r"""\sclass\s*=\s*("([^"]*)"|'([^']*)')""", re.I)
+_VAR = re.compile(r"var\(\s*(--[\w-]+)\s*(?:,\s*([^)]*))?\)")
+
+
+def _strip_at_rules(css: str) -> str:
+    """Drop @media/@page/... blocks (and their nested rules) from a stylesheet."""
+    out = []
+    i = 0
+    while i < len(css):
+        if css[i] == "@":
+            brace = css.find("{", i)
+            semi = css.find(";", i)
+            if semi != -1 and (brace == -1 or semi < brace):
+                i = semi + 1
+                continue
+            if brace == -1:
+                break
+            depth = 0
+            j = brace
+            while j < len(css):
+                if css[j] == "{":
+                    depth += 1
+                elif css[j] == "}":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                j += 1
+            i = j + 1
+            continue
+        out.append(css[i])
+        i += 1
+    return "".join(out)
+
+
+def parse_declarations(text: str) -> Dict[str, str]:
+    """Parse 'prop: value; ...' into a dict with lower-cased property names."""
+    declarations = {}
+    for part in text.split(";"):
+        if ":" not in part:
+            continue
+        name, value = part.split(":", 1)
+        name = name.strip()
+        if not name.startswith("--"):
+            name = name.lower()
+        value = value.replace("!important", "").strip()
+        if name:
+            declarations[name] = value
+    return declarations
+
+
+# Selectors the renderer matches: element names, a single class with or
+# without an element name (.note, p.note), *, :root and html
+_SIMPLE_SELECTOR = re.compile(r"(?:[a-z][a-z0-9]*)?\.-?[a-z_][\w-]*|[a-z][a-z0-9]*|\*|:root|html")
+_COMPOUND_TAG = re.compile(r"^[a-z][a-z0-9]*")
+_COMPOUND_CLASS = re.compile(r"\.(-?[a-z_][\w-]*)")
+
+
+def _may_match(selector: str, tags: set, classes: set) -> bool:
+    """
+    Return False if a selector cannot match anything in a document.
+
+    Only the rightmost compound (the element the rule styles) is checked:
+    a rule for td, or for .note, is moot in a document without one.
+    """
+    subject = re.split(r"[\s>+~]+", selector.strip())[-1]
+    tag = _COMPOUND_TAG.match(subject)
+    if tag and tag.group(0) not in tags:
+        return False
+    return all(name in classes for name in _COMPOUND_CLASS.findall(subject))
+
+
+def parse_stylesheet(css: str) -> Dict[str, Dict[str, str]]:
+    """
+    Parse a stylesheet into {selector: declarations} for simple selectors.
+
+    Only element, single-class, universal and :root selectors are kept
+    (see _SIMPLE_SELECTOR); at-rules are skipped because paged output has no media queries to evaluate.
+    """
+    css = _strip_at_rules(_CSS_COMMENT.sub("", css))
+    rules = {}
+    for selectors, body in re.findall(r"([^{}]+)\{([^{}]*)\}", css):
+        declarations = parse_declarations(body)
+        for selector in selectors.split(","):
+            selector = selector.strip().lower()
+            if _SIMPLE_SELECTOR.fullmatch(selector):
+                rules.setdefault(selector, {}).update(declarations)
+    return rules
+
+
+def local_render_blockers(html_content: str, page_format: Optional[str] = None) -> List[str]:
+    """
+    List the reasons a document needs a full browser engine.
+
+    An empty list means the local renderer can lay it out faithfully: no
+    external resources, no scripts or media, no CSS outside the supported
+    subset (properties, and selectors beyond element and single-class
+    ones that could match the document), text that fits the standard fonts' WinAnsi encoding, and a page format
+    it knows, when one is given.
+    """
+    blockers = []
+
+    if page_format is not None and page_format.lower() not in PAGE_SIZES:
+        blockers.append(f"unsupported page format '{page_format}'")
+
+    tags = {name.lower() for name in _TAG_NAME.findall(html_content)}
+    for tag in sorted(tags & UNSUPPORTED_TAGS):
+        blockers.append(f"unsupported element <{tag}>")
+
+    inline_styles = [m.group(2) or m.group(3) or "" for m in _STYLE_ATTR.finditer(html_content)]
+    stylesheet = _CSS_COMMENT.sub("", "\n".join(_STYLE_BLOCK.findall(html_content)))
+    css = stylesheet + "\n" + _CSS_COMMENT.sub("", "\n".join(inline_styles))
+    if re.search(r"url\s*\(|@import|@font-face", css, re.I):
+        blockers.append("external CSS resources")
+
+    # Rules with id, attribute, pseudo-class or descendant selectors would
+    # be ignored, which matters only if they could apply to this document
+    classes = set()
+    for match in _CLASS_ATTR.finditer(html_content):
+        classes.update((match.group(2) or match.group(3) or "").lower().split())
+    selectors = set()
+    for group in re.findall(r"([^{}]+)\{[^{}]*\}", _strip_at_rules(stylesheet)):
+        selectors.update(selector.strip().lower() for selector in group.split(","))
+    for selector in sorted(selectors):
+        if not selector or _SIMPLE_SELECTOR.fullmatch(selector):
+            continue
+        if _may_match(selector, tags, classes):
+            blockers.append(f"unsupported CSS selector '{selector}'")
+
+    properties = set()
+    for block in re.findall(r"\{([^{}]*)\}", css) + inline_styles:
+        properties.update(parse_declarations(block))
+    for prop in sorted(properties):
+        if prop in LOCAL_CSS_PROPERTIES or prop.startswith(LOCAL_CSS_PREFIXES):
+            continue
+        blockers.append(f"unsupported CSS property '{prop}'")
+
+    text = re.sub(r"<[^>]*>", "", _STYLE_BLOCK.sub("", html_content))
+    try:
+        html.unescape(text).encode("cp1252")
+    except UnicodeEncodeError:
+        blockers.append("characters outside the standard font encoding")
+
+    return blockers
+
+
+def _parse_color(value: str) -> Optional[Tuple[float, float, float]]:
+    value = value.strip().lower()
+    if value in _NAMED_COLORS:
+        return _NAMED_COLORS[value]
+    match = re.fullmatch(r"#([0-9a-f]{3}|[0-9a-f]{6})", value)
+    if match:
+        digits = match.group(1)
+        if len(digits) == 3:
+            digits = "".join(c * 2 for c in digits)
+        return tuple(int(digits[i : i + 2], 16) / 255 for i in (0, 2, 4))
+    match = re.fullmatch(r"rgba?\(([^)]*)\)", value)
+    if match:
+        parts = [p.strip() for p in match.group(1).replace("/", ",").split(",")]
+        try:
+            return tuple(min(255.0, float(p)) / 255 for p in parts[:3])
+        except ValueError:
+            return None
+    return None
+
+
+def _parse_length(value: str, reference: float) -> Optional[float]:
+    """Convert a CSS length to points; em/rem/% are relative to `reference`."""
+    match = re.fullmatch(r"(-?[\d.]+)\s*(px|pt|em|rem|%)?", value.strip().lower())
+    if not match:
+        return None
+    number = float(match.group(1))
+    unit = match.group(2) or "px"
+    if unit == "px":
+        return number * 0.75
+    if unit == "pt":
+        return number
+    if unit == "%":
+        return reference * number / 100
+    return reference * number
+
+
+class _Block:
+    """A laid-out unit: one paragraph, heading, list item or code block."""
+
+    def __init__(self, tag: str, style: dict, indent: float, prefix: str = ""):
+        self.tag = tag
+        self.style = style
+        self.indent = indent
+        self.prefix = prefix
+        self.runs = []  # (text, font, size, color)
+        self.rule = tag == "hr"
+        self.bar = False
+
+    @property
+    def empty(self) -> bool:
+        return not self.rule and not any(text.strip() for text, *_ in self.runs)
+
+
+class _DocumentParser(HTMLParser):
+    """Turns HTML into a flat list of styled blocks."""
+
+    def __init__(self, rules: Dict[str, Dict[str, str]]):
+        super().__init__(convert_charrefs=True)
+        self.rules = rules
+        self.variables = {}
+        for selector in (":root", "html", "*", "body"):
+            for name, value in rules.get(selector, {}).items():
+                if name.startswith("--"):
+                    self.variables[name] = value
+        self.base = self._body_style()
+        self.blocks = []
+        self.title = ""
+        self._stack = []  # (tag, style)
+        self._skip = 0
+        self._in_title = False
+        self._lists = []  # [tag, counter]
+        self._quote_depth = 0
+        self._block = None
+
+    def _resolve(self, value: str) -> str:
+        for _ in range(5):
+            if "var(" not in value:
+                break
+            value = _VAR.sub(
+                lambda m: self.variables.get(m.group(1), m.group(2) or ""), value
+            )
+        return value
+
+    def _body_style(self) -> dict:
+        style = {"size": BASE_FONT_SIZE, "color": (0.1, 0.1, 0.1), "align": "left"}
+        for selector in ("html", "body"):
+            self._apply(style, self.rules.get(selector, {}), BASE_FONT_SIZE)
+        style.update(bold=False, italic=False, mono=False, break_before=False)
+        return style
+
+    def _apply(self, style: dict, declarations: Dict[str, str], reference: float):
+        for name, raw in declarations.items():
+            value = self._resolve(raw).strip()
+            if name == "color":
+                color = _parse_color(value)
+                if color is not None:
+                    style["color"] = color
+            elif name == "font-size":
+                size = _parse_length(value, reference)
+                if size:
+                    style["size"] = size
+            elif name == "font-weight":
+                style["bold"] = value in ("bold", "bolder") or (
+                    value.isdigit() and int(value) >= 600
+                )
+            elif name == "font-style":
+                style["italic"] = value in ("italic", "oblique")
+            elif name == "text-align" and value in ("left", "center", "right", "justify"):
+                style["align"] = "left" if value == "justify" else value
+            elif name in ("page-break-before", "break-before"):
+                style["break_before"] = value in ("always", "page")
+
+    def _style_for(self, tag: str, attrs: dict) -> dict:
+        parent = self._stack[-1][1] if self._stack else self.base
+        style = dict(parent, break_before=False)
+        size_factor, bold, space_before, space_after = _TAG_DEFAULTS.get(
+            tag, (None, None, 0, 0)
+        )
+        if size_factor is not None:
+            style["size"] = self.base["size"] * size_factor
+        if bold is not None:
+            style["bold"] = bold
+        style["space_before"] = space_before
+        style["space_after"] = space_after
+        if tag in BOLD_TAGS:
+            style["bold"] = True
+        if tag in ITALIC_TAGS:
+            style["italic"] = True
+        if tag in MONO_TAGS:
+            style["mono"] = True
+        if tag == "a":
+            style["color"] = (0.05, 0.35, 0.75)
+        if tag not in ("html", "body"):
+            # Root styles are already folded into self.base
+            self._apply(style, self.rules.get(tag, {}), parent["size"])
+        # Class rules override element rules, as their specificity is higher
+        for name in (attrs.get("class") or "").lower().split():
+            self._apply(style, self.rules.get(f".{name}", {}), parent["size"])
+            self._apply(style, self.rules.get(f"{tag}.{name}", {}), parent["size"])
+        if attrs.get("style"):
+            self._apply(style, parse_declarations(attrs["style"]), parent["size"])
+        return style
+
+    # -- block management -------------------------------------------------
+
+    def _indent(self) -> float:
+        return 18.0 * (len(self._lists) + self._quote_depth)
+
+    def _close_block(self):
+        if self._block is not None and not self._block.empty:
+            self.blocks.append(self._block)
+        self._block = None
+
+    def _open_block(self, tag: str, style: dict, prefix: str = ""):
+        self._close_block()
+        self._block = _Block(tag, style, self._indent(), prefix)
+        self._block.bar = self._quote_depth > 0
+
+    # -- HTMLParser callbacks ---------------------------------------------
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            if tag == "title":
+                self._in_title = True
+            self._skip += 1
+            return
+        if self._skip:
+            return
+
+        style = self._style_for(tag, dict(attrs))
+        if tag == "br":
+            if self._block is not None:
+                self._block.runs.append(("\n", "F1", style["size"], style["color"]))
+            return
+        if tag == "hr":
+            self._open_block("hr", style)
+            self._close_block()
+            return
+
+        if tag not in ("img", "meta", "input"):
+            self._stack.append((tag, style))
+
+        if tag in ("ul", "ol"):
+            self._close_block()
+            self._lists.append([tag, 0])
+        elif tag == "blockquote":
+            self._close_block()
+            self._quote_depth += 1
+        elif tag == "li":
+            prefix = "\u2022"
+            if self._lists and self._lists[-1][0] == "ol":
+                self._lists[-1][1] += 1
+                prefix = f"{self._lists[-1][1]}."
+            self._open_block("li", style, prefix)
+        elif tag in BLOCK_TAGS:
+            self._open_block(tag, style)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+            self._in_title = False
+            return
+        if self._skip:
+            return
+
+        # Pop up to the matching open tag, tolerating unclosed inline tags
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                del self._stack[index:]
+                break
+        else:
+            return
+
+        if tag in ("ul", "ol"):
+            self._close_block()
+            if self._lists:
+                self._lists.pop()
+        elif tag == "blockquote":
+            self._close_block()
+            self._quote_depth = max(0, self._quote_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._close_block()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+            return
+        if self._skip:
+            return
+
+        style = self._stack[-1][1] if self._stack else self.base
+        in_pre = any(tag == "pre" for tag, _ in self._stack)
+        if not in_pre:
+            data = re.sub(r"\s+", " ", data)
+            if self._block is None and not data.strip():
+                return
+        if self._block is None:
+            container = self._stack[-1][0] if self._stack else "body"
+            self._open_block(container, style)
+
+        if style["mono"]:
+            font = "F5"
+        else:
+            font = "F%d" % (1 + int(style["bold"]) + 2 * int(style["italic"]))
+        size = style["size"] * (0.9 if style["mono"] and not in_pre else 1.0)
+        self._block.runs.append((data, font, size, style["color"]))
+
+    def close(self):
+        super().close()
+        self._close_block()
+
+
+def _text_width(text: bytes, font: str, size: float) -> float:
+    if font == "F5":
+        return 0.6 * size * len(text)
+    table = _HELVETICA_BOLD_WIDTHS if font in ("F2", "F4") else _HELVETICA_WIDTHS
+    total = 0
+    for byte in text:
+        if 32 <= byte <= 126:
+            total += table[byte - 32]
+        else:
+            total += _EXTRA_WIDTHS.get(byte, 556)
+    return total * size / 1000
+
+
+def _encode(text: str) -> bytes:
+    return text.encode("cp1252", errors="replace")
+
+
+def _pdf_string(data: bytes) -> bytes:
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _wrap(block: _Block, width: float) -> List[List[tuple]]:
+    """Break a block's runs into lines of (bytes, font, size, color, width)."""
+    lines = [[]]
+    line_width = 0.0
+    preformatted = block.tag == "pre"
+
+    for text, font, size, color in block.runs:
+        pieces = re.split(r"(\n)", text) if preformatted or text == "\n" else [text]
+        for piece in pieces:
+            if piece == "\n":
+                lines.append([])
+                line_width = 0.0
+                continue
+            tokens = [piece] if preformatted else re.findall(r"\S+|\s+", piece)
+            for token in tokens:
+                if not preformatted and token.isspace():
+                    token = " "
+                    if not lines[-1]:
+                        continue
+                data = _encode(token)
+                token_width = _text_width(data, font, size)
+                if line_width + token_width > width and lines[-1]:
+                    if token == " ":
+                        continue
+                    lines.append([])
+                    line_width = 0.0
+                # Hard-break tokens wider than the whole line
+                while token_width > width and len(data) > 1:
+                    cut = max(1, int(len(data) * width / token_width))
+                    while cut > 1 and _text_width(data[:cut], font, size) > width:
+                        cut -= 1
+                    head = data[:cut]
+                    lines[-1].append((head, font, size, color, _text_width(head, font, size)))
+                    lines.append([])
+                    data = data[cut:]
+                    token_width = _text_width(data, font, size)
+                lines[-1].append((data, font, size, color, token_width))
+                line_width += token_width
+
+    # Drop trailing spaces so alignment is measured on visible text
+    for line in lines:
+        while line and line[-1][0] == b" ":
+            line.pop()
+    return [line for line in lines if line] or []
+
+
+class _PageWriter:
+    """Accumulates content-stream operators page by page."""
+
+    def __init__(self, width: float, height: float, margin: float):
+        self.width = width
+        self.height = height
+        self.margin = margin
+        self.pages = []
+        self.new_page()
+
+    def new_page(self):
+        self.ops = []
+        self.pages.append(self.ops)
+        self.y = self.height - self.margin
+        self.at_top = True
+
+    def ensure(self, height: float):
+        if self.y - height < self.margin and not self.at_top:
+            self.new_page()
+
+    def text(self, x: float, y: float, data: bytes, font: str, size: float, color):
+        r, g, b = color
+        self.ops.append(
+            b"BT %.3f %.3f %.3f rg /%s %.2f Tf %.2f %.2f Td %s Tj ET"
+            % (r, g, b, font.encode(), size, x, y, _pdf_string(data))
+        )
+        self.at_top = False
+
+    def line(self, x1: float, y1: float, x2: float, y2: float, color, width: float = 0.75):
+        r, g, b = color
+        self.ops.append(
+            b"%.3f %.3f %.3f RG %.2f w %.2f %.2f m %.2f %.2f l S"
+            % (r, g, b, width, x1, y1, x2, y2)
+        )
+        self.at_top = False
+
+
+def _layout(blocks: List[_Block], page_size: Tuple[float, float]) -> List[List[bytes]]:
+    width, height = page_size
+    margin = min(PAGE_MARGIN, width / 8)
+    writer = _PageWriter(width, height, margin)
+    content_width = width - 2 * margin
+
+    for block in blocks:
+        style = block.style
+        if style.get("break_before") and not writer.at_top:
+            writer.new_page()
+        if not writer.at_top:
+            writer.y -= style.get("space_before", 0)
+
+        if block.rule:
+            writer.ensure(12)
+            writer.y -= 6
+            writer.line(margin, writer.y, width - margin, writer.y, (0.8, 0.8, 0.8))
+            writer.y -= 6
+            continue
+
+        x0 = margin + block.indent
+        available = max(content_width - block.indent, 36.0)
+        lines = _wrap(block, available)
+        block_top = writer.y
+
+        for index, line in enumerate(lines):
+            size = max(item[2] for item in line)
+            line_height = size * LINE_SPACING
+            if writer.y - line_height < writer.margin and not writer.at_top:
+                if block.bar:
+                    writer.line(x0 - 9, block_top, x0 - 9, writer.y, style["color"], 2)
+                writer.new_page()
+                block_top = writer.y
+            writer.y -= line_height
+            baseline = writer.y + (line_height - size) / 2 + size * 0.22
+
+            line_width = sum(item[4] for item in line)
+            x = x0
+            if style.get("align") == "center":
+                x = x0 + (available - line_width) / 2
+            elif style.get("align") == "right":
+                x = x0 + available - line_width
+
+            if index == 0 and block.prefix:
+                prefix = _encode(block.prefix)
+                prefix_width = _text_width(prefix, "F1", size)
+                writer.text(x0 - prefix_width - 5, baseline, prefix, "F1", size, style["color"])
+
+            for data, font, item_size, color, item_width in line:
+                if data.strip():
+                    writer.text(x, baseline, data, font, item_size, color)
+                x += item_width
+
+        if block.bar and lines:
+            writer.line(x0 - 9, block_top, x0 - 9, writer.y, style["color"], 2)
+        writer.y -= style.get("space_after", 0) or style["size"] * 0.6
+
+    return writer.pages
+
+
+def _build_pdf(pages: List[List[bytes]], page_size: Tuple[float, float], title: str) -> bytes:
+    """Serialize laid-out pages into a PDF 1.4 file."""
+    objects = [None, None]  # 1: catalog, 2: page tree
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font_refs = []
+    for name, base_font in FONTS.items():
+        number = add(
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+            % base_font.encode()
+        )
+        font_refs.append(b"/%s %d 0 R" % (name.encode(), number))
+    resources = b"<< /Font << " + b" ".join(font_refs) + b" >> >>"
+
+    page_refs = []
+    width, height = page_size
+    for ops in pages:
+        stream = zlib.compress(b"\n".join(ops))
+        content = add(
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream)
+            + stream
+            + b"\nendstream"
+        )
+        page = add(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] /Resources %s /Contents %d 0 R >>"
+            % (width, height, resources, content)
+        )
+        page_refs.append(b"%d 0 R" % page)
+
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(page_refs), len(page_refs))
+    info = add(
+        b"<< /Producer (pdfcon local renderer) /Title %s >>"
+        % _pdf_string(_encode(title.strip() or "Document"))
+    )
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        info,
+        xref,
+    )
+    return bytes(out)
+
+
+def render_html_to_pdf(html_content: str, page_format: str = "A4") -> bytes:
+    """
+    Render simple HTML to PDF bytes in-process.
+
+    Args:
+        html_content: HTML document; see local_render_blockers() for what
+            the renderer supports.
+        page_format: Page format (A3, A4, A5, Letter, Legal, Tabloid).
+
+    Returns:
+        The PDF document as bytes.
+
+    Raises:
+        ValueError: If the page format is unknown.
+    """
+    page_size = PAGE_SIZES.get(page_format.lower())
+    if page_size is None:
+        raise ValueError(f"Unsupported page format for local rendering: {page_format}")
+
+    rules = {}
+    for css in _STYLE_BLOCK.findall(html_content):
+        for selector, declarations in parse_stylesheet(css).items():
+            rules.setdefault(selector, {}).update(declarations)
+
+    parser = _DocumentParser(rules)
+    parser.feed(html_content)
+    parser.close()
+
+    pages = _layout(parser.blocks, page_size)
+    return _build_pdf(pages, page_size, parser.title)
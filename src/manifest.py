@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Batch manifest for incremental, resumable conversions.
+Records the source hash, render options, output path and status of every
+input so re-runs only render what changed or failed.
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+DONE = "done"
+FAILED = "failed"
+RUNNING = "running"
+
+
+def source_digest(data: bytes) -> str:
+    """Return the SHA-256 hex digest of a source file's bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def read_source(path: Union[str, Path]) -> Tuple[bytes, Tuple[int, int]]:
+    """
+    Read a source file.
+
+    Returns:
+        Tuple of (bytes, (st_size, st_mtime_ns)), the stat taken from the
+        open file before reading, so a later edit never matches it.
+    """
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        data = f.read()
+    return data, (stat.st_size, stat.st_mtime_ns)
+
+
+class BatchManifest:
+    """
+    Per-input record of a batch, kept as a JSON Lines journal.
+
+    Every status change appends one line, so recording a file costs the
+    same however large the batch is, and a crash loses at most the line
+    being written. The last line for a source wins; the journal is
+    rewritten without superseded lines when loaded and on close().
+
+    Usage:
+        manifest = BatchManifest(Path("output/batch_manifest.jsonl"))
+        if not manifest.is_up_to_date(source, options, output_path):
+            data, stat = read_source(source)
+            ...render data...
+            manifest.record(source, DONE, options, output_path, source_digest(data), source_stat=stat)
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Open (or create) a manifest.
+
+        Args:
+            path: Journal file; its directory is created if needed.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._journal = None
+        self._load()
+
+    def _load(self):
+        lines = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn final line from an interrupted run
+                        continue
+                    self.entries[entry["source"]] = entry
+        except FileNotFoundError:
+            pass
+        if lines > len(self.entries):
+            self._compact()
+
+    @staticmethod
+    def key(source: Path) -> str:
+        """Manifest key of a source file."""
+        return str(Path(source).resolve())
+
+    def lookup(self, source: Path) -> Optional[dict]:
+        """Return the latest record for source, or None."""
+        with self._lock:
+            return self.entries.get(self.key(source))
+
+    def is_up_to_date(
+        self,
+        source: Path,
+        options: dict,
+        output_path: Path,
+        digest: Optional[str] = None,
+    ) -> bool:
+        """
+        Check whether source's last render is still valid.
+
+        A render is valid if it succeeded with the same options into the
+        same output path, the output still exists, and the source is
+        unchanged. Without digest, the source counts as unchanged when its
+        size and modification time match the record (no read needed);
+        with digest, the content hash is compared instead.
+        """
+        entry = self.lookup(source)
+        if entry is None or entry["status"] != DONE:
+            return False
+        if entry["options"] != options or entry["output"] != str(output_path):
+            return False
+        if not Path(output_path).exists():
+            return False
+        if digest is not None:
+            return entry["source_hash"] == digest
+        try:
+            stat = Path(source).stat()
+        except OSError:
+            return False
+        return entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+
+    def record(
+        self,
+        source: Path,
+        status: str,
+        options: dict,
+        output_path: Path,
+        digest: Optional[str] = None,
+        error: Optional[str] = None,
+        source_stat: Optional[Tuple[int, int]] = None,
+    ):
+        """
+        Append a status change for source to the journal.
+
+        Args:
+            source: Input file.
+            status: RUNNING, DONE or FAILED.
+            options: Render options used.
+            output_path: Output PDF path.
+            digest: source_digest() of the rendered bytes.
+            error: Failure message, for FAILED.
+            source_stat: (st_size, st_mtime_ns) from read_source(), taken
+                with the bytes digest was computed from; the source is
+                stat'ed now if omitted.
+        """
+        if source_stat is not None:
+            size, mtime_ns = source_stat
+        else:
+            try:
+                stat = Path(source).stat()
+                size, mtime_ns = stat.st_size, stat.st_mtime_ns
+            except OSError:
+                size = mtime_ns = None
+        entry = {
+            "source": self.key(source),
+            "status": status,
+            "source_hash": digest,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "options": options,
+            "output": str(output_path),
+            "error": error,
+            "updated": time.time(),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.entries[entry["source"]] = entry
+            if self._journal is None:
+                self._journal = open(self.path, "a", encoding="utf-8")
+            self._journal.write(line)
+            self._journal.flush()
+
+    def summary(self) -> Dict[str, int]:
+        """Count records by status."""
+        counts = {}
+        with self._lock:
+            for entry in self.entries.values():
+                counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
+
+    def _compact(self):
+        """Rewrite the journal with only the latest record per source."""
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+    def close(self):
+        """Flush and compact the journal."""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+                self._compact()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Rule-driven Markdown to HTML pipeline for batch PDF rendering.
+A RuleSet declares which lines to drop and which text to rewrite; each
+rewrite stage is compiled into a single regular expression pass.
+"""
+
+import os
+import re
+import glob
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    from .markdown_renderer import DOCUMENT_SHELL, MarkdownRenderer, PageShell
+    from .sections import split_sections
+except ImportError:
+    from markdown_renderer import DOCUMENT_SHELL, MarkdownRenderer, PageShell
+    from sections import split_sections
+
+
+def compile_replacements(
+    replace: Optional[Dict[str, str]] = None, replace_words: Optional[Dict[str, str]] = None
+):
+    """
+    Compile literal replacements into one function that scans the text once.
+
+    Longer keys win over shorter ones starting at the same position, so
+    "<h2>Intro</h2>" is replaced before a generic "<h2>" rule can match it.
+
+    Args:
+        replace: Literal substitutions applied anywhere.
+        replace_words: Literal substitutions applied only where the key is
+            not part of a longer word ("wha" matches "wha", not "what").
+
+    Returns:
+        A callable str -> str, or None when there is nothing to replace.
+    """
+    entries = [(key, value, False) for key, value in (replace or {}).items()]
+    entries += [(key, value, True) for key, value in (replace_words or {}).items()]
+    entries = [entry for entry in entries if entry[0]]
+    if not entries:
+        return None
+    entries.sort(key=lambda entry: len(entry[0]), reverse=True)
+
+    alternatives = []
+    for key, _, words in entries:
+        pattern = re.escape(key)
+        if words:
+            pattern = rf"(?<!\w){pattern}(?!\w)"
+        alternatives.append(f"({pattern})")
+    regex = re.compile("|".join(alternatives))
+    values = [value for _, value, _ in entries]
+
+    def rewrite(text: str) -> str:
+        return regex.sub(lambda match: values[match.lastindex - 1], text)
+
+    return rewrite
+
+
+class RuleSet:
+    """
+    Declarative filter and rewrite rules for Markdown documents.
+
+    Rules are applied in this order: line filtering (drop_lines,
+    skip_sections, stop_at) on the Markdown source, replace/replace_words
+    on the filtered source, and html_replace on the converted HTML. All
+    matching is by literal substring.
+
+    Example (JSON, see from_dict()):
+        {
+          "drop_lines": ["<img src=\\"https://cdn.example.com/"],
+          "skip_sections": [{"start": ["transcript", "Cole Medin"], "end": "***"}],
+          "stop_at": ["[^1]:"],
+          "replace_words": {"couarse": "course"},
+          "html_replace": {"<h2>": "<h2 class=\\"slide-header\\">"}
+        }
+    """
+
+    def __init__(
+        self,
+        drop_lines: Sequence[str] = (),
+        skip_sections: Sequence[dict] = (),
+        stop_at: Sequence[str] = (),
+        replace: Optional[Dict[str, str]] = None,
+        replace_words: Optional[Dict[str, str]] = None,
+        html_replace: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Initialize the rule set.
+
+        Args:
+            drop_lines: Lines containing any of these are removed.
+            skip_sections: Sections to remove, as {"start": ..., "end": ...}.
+                A line matching start (a substring, or a list of substrings
+                that must all be present) begins the section; it ends after
+                the next line containing end. Both lines are removed.
+            stop_at: The document is cut at the first line containing any of these.
+            replace: Literal substitutions in the Markdown source.
+            replace_words: Whole-word substitutions in the Markdown source.
+            html_replace: Literal substitutions in the converted HTML.
+        """
+        self.drop_lines = list(drop_lines)
+        self.skip_sections = []
+        for section in skip_sections:
+            start = section["start"]
+            start = [start] if isinstance(start, str) else list(start)
+            self.skip_sections.append({"start": start, "end": section["end"]})
+        self.stop_at = list(stop_at)
+        self.replace = dict(replace or {})
+        self.replace_words = dict(replace_words or {})
+        self.html_replace = dict(html_replace or {})
+        self._drop = self._any(self.drop_lines)
+        self._stop = self._any(self.stop_at)
+        self._rewrite_text = compile_replacements(self.replace, self.replace_words)
+        self._rewrite_html = compile_replacements(self.html_replace)
+
+    @staticmethod
+    def _any(needles: List[str]):
+        """Compile substrings into one regex (None when there are none)."""
+        if not needles:
+            return None
+        return re.compile("|".join(re.escape(needle) for needle in needles))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RuleSet":
+        """Build a RuleSet from a dict with the __init__ argument names as keys."""
+        unknown = set(data) - {
+            "drop_lines",
+            "skip_sections",
+            "stop_at",
+            "replace",
+            "replace_words",
+            "html_replace",
+        }
+        if unknown:
+            raise ValueError(f"Unknown rule(s): {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "RuleSet":
+        """Load a RuleSet from a JSON file."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def as_dict(self) -> dict:
+        return {
+            "drop_lines": self.drop_lines,
+            "skip_sections": self.skip_sections,
+            "stop_at": self.stop_at,
+            "replace": self.replace,
+            "replace_words": self.replace_words,
+            "html_replace": self.html_replace,
+        }
+
+    def filter_lines(self, text: str) -> str:
+        """Apply drop_lines, skip_sections and stop_at to Markdown source."""
+        if not (self._drop or self._stop or self.skip_sections):
+            return text
+        kept = []
+        section_end = None
+        for line in text.split("\n"):
+            if self._drop is not None and self._drop.search(line):
+                continue
+            if section_end is None:
+                for section in self.skip_sections:
+                    if all(needle in line for needle in section["start"]):
+                        section_end = section["end"]
+                        break
+            if section_end is not None:
+                if section_end in line:
+                    section_end = None
+                continue
+            if self._stop is not None and self._stop.search(line):
+                break
+            kept.append(line)
+        return "\n".join(kept)
+
+    def rewrite_text(self, text: str) -> str:
+        """Apply replace and replace_words in one pass."""
+        return self._rewrite_text(text) if self._rewrite_text else text
+
+    def rewrite_html(self, html_content: str) -> str:
+        """Apply html_replace in one pass."""
+        return self._rewrite_html(html_content) if self._rewrite_html else html_content
+
+    def __getstate__(self):
+        return self.as_dict()
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class MarkdownPipeline:
+    """
+    Markdown file -> complete HTML document, driven by a RuleSet.
+
+    Instances are callable with (bytes, path), so they can be passed as the
+    preprocessor of BatchPDFGenerator, including in multi-process mode.
+
+    Usage:
+        pipeline = MarkdownPipeline(RuleSet.from_file("rules.json"))
+        with BatchPDFGenerator(jobs=8, preprocessor=pipeline) as batch:
+            batch.batch_convert(Path("notes").glob("*.md"))
+    """
+
+    def __init__(
+        self,
+        rules: Optional[RuleSet] = None,
+        shell: PageShell = DOCUMENT_SHELL,
+        extensions: Optional[list] = None,
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            rules: Filter and rewrite rules (default: none).
+            shell: Page shell wrapped around every converted document.
+            extensions: Markdown extensions to enable.
+        """
+        self.rules = rules or RuleSet()
+        self.shell = shell
+        self.extensions = list(extensions or [])
+        self._renderer = MarkdownRenderer(
+            extensions=self.extensions, shells={"page": shell}, default_shell="page"
+        )
+        digest = hashlib.sha256()
+        digest.update(json.dumps(self.rules.as_dict(), sort_keys=True).encode("utf-8"))
+        digest.update(shell.prefix.encode("utf-8"))
+        digest.update(shell.suffix.encode("utf-8"))
+        digest.update(json.dumps(self.extensions, default=str).encode("utf-8"))
+        # Lets the batch manifest re-render outputs when the rules change
+        self.fingerprint = digest.hexdigest()
+
+    def body_html(self, text: str) -> str:
+        """Filter, rewrite and convert Markdown to an HTML fragment."""
+        text = self.rules.rewrite_text(self.rules.filter_lines(text))
+        return self.rules.rewrite_html(self._renderer.to_html(text))
+
+    def to_html(self, text: str) -> str:
+        """Convert Markdown text to a complete HTML document."""
+        return self.shell.wrap(self.body_html(text))
+
+    def section_documents(self, text: str, tag: str = "h2") -> List[Tuple[Optional[str], str]]:
+        """
+        Convert Markdown text to one complete HTML document per section.
+
+        The document is split before every <tag> heading. The shell header
+        and any content before the first heading form the first document;
+        the shell footer goes at the end of the last one.
+
+        Returns:
+            (bookmark title, HTML document) pairs for SectionRenderer.
+        """
+        sections = split_sections(self.body_html(text), tag)
+        parts = []
+        if sections and sections[0][0] is None:
+            parts.append((self.shell.title, sections.pop(0)[1], True))
+        elif self.shell.header.strip():
+            parts.append((self.shell.title, "", True))
+        parts += [(title, body, False) for title, body in sections]
+        last = len(parts) - 1
+        return [
+            (title, self.shell.wrap(body, header=header, footer=index == last))
+            for index, (title, body, header) in enumerate(parts)
+        ]
+
+    def convert_file(self, path: Union[str, Path]) -> str:
+        """Convert a Markdown file to a complete HTML document."""
+        return self.to_html(Path(path).read_text(encoding="utf-8"))
+
+    def __call__(self, data: bytes, path: Path) -> str:
+        return self.to_html(data.decode("utf-8"))
+
+    def __getstate__(self):
+        # The renderer keeps per-thread Markdown instances; rebuild it instead
+        return {"rules": self.rules, "shell": self.shell, "extensions": self.extensions}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+def expand_inputs(patterns: Iterable[str]) -> Iterable[Path]:
+    """
+    Lazily expand file names, directories and globs into Markdown files.
+
+    Directories yield every .md file below them (sorted); globs support "**".
+    """
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            yield from sorted(path.rglob("*.md"))
+        elif any(char in pattern for char in "*?["):
+            for match in glob.iglob(pattern, recursive=True):
+                if Path(match).is_file():
+                    yield Path(match)
+        else:
+            yield path
+
+
+def input_root(patterns: Iterable[str]) -> Path:
+    """
+    Return the deepest directory containing everything expand_inputs() yields.
+
+    Computed from the patterns alone (a directory, a glob's directory
+    before its first wildcard, a file's parent), so the inputs are not
+    expanded twice. The result is absolute; relate paths to it with
+    os.path.abspath().
+    """
+    bases = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            bases.append(path)
+        elif any(char in pattern for char in "*?["):
+            static = []
+            for part in path.parts:
+                if any(char in part for char in "*?["):
+                    break
+                static.append(part)
+            bases.append(Path(*static) if static else Path("."))
+        else:
+            bases.append(path.parent)
+    if not bases:
+        return Path(os.path.abspath("."))
+    return Path(os.path.commonpath([os.path.abspath(base) for base in bases]))
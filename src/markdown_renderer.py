@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Markdown to HTML rendering with reusable page shells.
+Keeps one configured Markdown instance per thread and precompiled page
+shells (header, inlined CSS, footer) so each render only converts the body.
+"""
+
+import threading
+from typing import Dict, Optional
+
+import markdown
+
+# Shared stylesheet for generated documents (green AI/tech theme)
+DOCUMENT_CSS = """\
+:root {
+  --bg: #ffffff;
+  --text: #1a1a1a;
+  --accent: #10b981;
+  --accent-light: #d1fae5;
+  --border: #e5e7eb;
+  --code-bg: #f9fafb;
+  --shadow: rgba(0, 0, 0, 0.05);
+  --font-main: 'Segoe UI', system-ui, -apple-system, sans-serif;
+  --font-mono: 'SF Mono', 'Monaco', 'Inconsolata', monospace;
+}
+
+* {
+  margin: 0;
+  padding: 0;
+  box-sizing: border-box;
+}
+
+body {
+  font-family: var(--font-main);
+  line-height: 1.6;
+  color: var(--text);
+  background: var(--bg);
+  padding: 2rem;
+  max-width: 800px;
+  margin: 0 auto;
+}
+
+@media print {
+  body {
+    padding: 1.5rem;
+    max-width: 100%;
+  }
+  h1, h2, h3 {
+    page-break-after: avoid;
+    page-break-inside: avoid;
+  }
+  pre, code {
+    page-break-inside: avoid;
+  }
+}
+
+h1 {
+  font-size: 2.8rem;
+  font-weight: 800;
+  margin: 1rem 0 2rem;
+  color: var(--accent);
+  text-align: center;
+  letter-spacing: -0.02em;
+}
+
+h2 {
+  font-size: 2rem;
+  font-weight: 700;
+  margin: 3rem 0 1.5rem;
+  padding: 1rem;
+  background: var(--accent-light);
+  color: var(--text);
+  border-radius: 8px;
+  text-align: center;
+}
+
+h3 {
+  font-size: 1.4rem;
+  font-weight: 600;
+  margin: 2rem 0 1rem;
+  color: var(--accent);
+}
+
+p, li {
+  margin-bottom: 1rem;
+  font-size: 1.1rem;
+}
+
+ul, ol {
+  padding-left: 1.5rem;
+  margin-bottom: 1.2rem;
+}
+
+li {
+  margin-bottom: 0.8rem;
+}
+
+blockquote {
+  background: var(--accent-light);
+  border-left: 4px solid var(--accent);
+  padding: 1rem 1.2rem;
+  margin: 1.5rem 0;
+  font-style: italic;
+  border-radius: 0 6px 6px 0;
+  font-weight: 500;
+}
+
+code {
+  font-family: var(--font-mono);
+  background: var(--code-bg);
+  padding: 0.3rem 0.5rem;
+  border-radius: 4px;
+  font-size: 0.95em;
+}
+
+pre {
+  background: var(--code-bg);
+  padding: 1.2rem;
+  border-radius: 8px;
+  overflow-x: auto;
+  margin: 1.5rem 0;
+  font-family: var(--font-mono);
+  font-size: 0.9em;
+  border: 1px solid var(--border);
+}
+
+table {
+  width: 100%;
+  border-collapse: collapse;
+  margin: 1.5rem 0;
+}
+
+th, td {
+  padding: 0.8rem 1rem;
+  text-align: left;
+  border-bottom: 1px solid var(--border);
+}
+
+th {
+  background: var(--accent-light);
+  font-weight: 700;
+  color: var(--accent);
+}
+
+tr:last-child td {
+  border-bottom: none;
+}
+
+.highlight {
+  background: #fffbeb;
+  padding: 0.2rem 0.4rem;
+  border-radius: 4px;
+  font-weight: 600;
+}
+
+.footer {
+  margin-top: 3rem;
+  padding-top: 1.5rem;
+  border-top: 1px solid var(--border);
+  font-size: 0.9rem;
+  color: #666;
+  text-align: center;
+}
+"""
+
+# Carousel variant: every section (<h2>) starts on a new page
+CAROUSEL_CSS = DOCUMENT_CSS + """
+h2 {
+  page-break-before: always; /* Each section on new page for carousel */
+}
+
+.emoji {
+  font-size: 1.5rem;
+}
+"""
+
+
+class PageShell:
+    """HTML document wrapper compiled once into a prefix and a suffix."""
+
+    def __init__(self, title: str, css: str, header: str = "", footer: str = ""):
+        """
+        Build the shell.
+
+        Args:
+            title: Document <title>.
+            css: Stylesheet inlined into the <head>.
+            header: HTML placed at the top of <body>, before the content.
+            footer: HTML placed after the content.
+        """
+        self.title = title
+        self.header = header
+        self.footer = footer
+        self.head = (
+            "<!DOCTYPE html>\n"
+            '<html lang="en">\n'
+            "<head>\n"
+            '  <meta charset="UTF-8" />\n'
+            '  <meta name="viewport" content="width=device-width, initial-scale=1.0"/>\n'
+            f"  <title>{title}</title>\n"
+            f"  <style>\n{css}  </style>\n"
+            "</head>\n"
+            "<body>\n"
+        )
+        self.prefix = self.head + header
+        self.suffix = f"{footer}</body>\n</html>\n"
+
+    def wrap(self, body_html: str, header: bool = True, footer: bool = True) -> str:
+        """
+        Return a complete HTML document around body_html.
+
+        Args:
+            body_html: Document content.
+            header: Include the shell's header before the content.
+            footer: Include the shell's footer after the content.
+        """
+        if header and footer:
+            return self.prefix + body_html + self.suffix
+        return (
+            (self.prefix if header else self.head)
+            + body_html
+            + (self.suffix if footer else "</body>\n</html>\n")
+        )
+
+
+# Web app shell for Markdown mode. The shells stay within what the local
+# renderer supports (no emoji, element and single-class selectors), so
+# plain documents can skip the network with backend="auto"
+DOCUMENT_SHELL = PageShell(
+    title="Generated PDF Document",
+    css=DOCUMENT_CSS,
+    header=(
+        "<h1>Generated Document</h1>\n"
+        '<p style="text-align: center; font-size: 1.2rem; color: #666; '
+        'margin-bottom: 3rem;">Created with PDF Generation Agent</p>\n'
+    ),
+    footer=(
+        "\n"
+        '<div class="footer">\n'
+        "  <p>Generated by PDF Generation Agent</p>\n"
+        "  <p>Powered by Doppio API</p>\n"
+        "</div>\n"
+    ),
+)
+
+# Web app shell for prompt mode: free-form prose rather than a structured
+# document, so its own heading and justified paragraphs
+PROMPT_SHELL = PageShell(
+    title="Generated PDF Document",
+    css=DOCUMENT_CSS
+    + """
+.prompt {
+  text-align: justify;
+}
+""",
+    header=(
+        "<h1>Generated from Prompt</h1>\n"
+        '<p style="text-align: center; font-size: 1.2rem; color: #666; '
+        'margin-bottom: 3rem;">Created with PDF Generation Agent</p>\n'
+        '<div class="prompt">\n'
+    ),
+    footer=(
+        "</div>\n"
+        '<div class="footer">\n'
+        "  <p>Generated by PDF Generation Agent</p>\n"
+        "  <p>Powered by Doppio API</p>\n"
+        "</div>\n"
+    ),
+)
+
+
+class MarkdownRenderer:
+    """
+    Converts Markdown to HTML and wraps it in a named page shell.
+
+    Building a Markdown instance loads and configures every extension, so
+    each thread keeps one and resets it between documents. Safe to share
+    between threads.
+    """
+
+    def __init__(
+        self,
+        extensions: Optional[list] = None,
+        extension_configs: Optional[dict] = None,
+        shells: Optional[Dict[str, PageShell]] = None,
+        default_shell: str = "markdown",
+    ):
+        """
+        Initialize the renderer.
+
+        Args:
+            extensions: Markdown extensions to enable.
+            extension_configs: Per-extension configuration.
+            shells: Page shells by name (defaults to DOCUMENT_SHELL for
+                "markdown" and PROMPT_SHELL for "prompt").
+            default_shell: Shell used for unknown shell names.
+        """
+        self.extensions = list(extensions or [])
+        self.extension_configs = dict(extension_configs or {})
+        self.shells = dict(shells or {"markdown": DOCUMENT_SHELL, "prompt": PROMPT_SHELL})
+        self.default_shell = default_shell
+        self._local = threading.local()
+
+    def register_shell(self, name: str, shell: PageShell):
+        """Add or replace a named page shell."""
+        self.shells[name] = shell
+
+    def _markdown(self) -> markdown.Markdown:
+        md = getattr(self._local, "md", None)
+        if md is None:
+            md = markdown.Markdown(
+                extensions=self.extensions, extension_configs=self.extension_configs
+            )
+            self._local.md = md
+        return md
+
+    def to_html(self, text: str) -> str:
+        """Convert Markdown text to an HTML fragment."""
+        return self._markdown().reset().convert(text)
+
+    def render(self, text: str, shell: Optional[str] = None) -> str:
+        """
+        Convert Markdown text to a complete HTML document.
+
+        Args:
+            text: Markdown source.
+            shell: Name of the page shell (defaults to default_shell).
+        """
+        page = self.shells.get(shell or self.default_shell) or self.shells[self.default_shell]
+        return page.wrap(self.to_html(text))
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Render instrumentation for PDFGenerator.
+RenderTimings records per-stage durations and byte counts of one render;
+RenderMetrics aggregates them and exports Prometheus text format.
+"""
+
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+# Stages in the order they happen during a render
+STAGES = (
+    "coalesce",  # waiting for an identical render already in flight
+    "cache",  # render cache lookup and store
+    "optimize",  # pre-upload HTML optimization
+    "encode",  # UTF-8 encoding of the HTML
+    "serialize",  # base64 JSON request body
+    "compress",  # gzip upload mode
+    "asset",  # asset upload mode: uploading the HTML
+    "rate_limit",  # waiting for a rate limiter slot
+    "connect",  # TCP/TLS connection setup (new connections only)
+    "server",  # upload and server-side render, until response headers
+    "download",  # reading the PDF body
+    "write",  # writing the PDF to disk
+    "retry_wait",  # backoff sleeps between attempts
+    "layout",  # in-process rendering by the local backend
+)
+
+# Upper bounds (seconds) of the render duration histogram buckets
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+SUCCESS = "success"
+CACHE_HIT = "cache_hit"
+COALESCED = "coalesced"
+ERROR = "error"
+
+_NULL_STAGE = nullcontext()
+
+
+class RenderTimings:
+    """Per-stage durations and byte counts of one render."""
+
+    __slots__ = (
+        "backend",
+        "output_path",
+        "stages",
+        "bytes",
+        "attempts",
+        "outcome",
+        "error",
+        "duration",
+        "_started",
+    )
+
+    def __init__(self, backend: str, output_path: Optional[Path] = None):
+        self.backend = backend
+        self.output_path = output_path
+        self.stages: Dict[str, float] = {}
+        self.bytes: Dict[str, int] = {}
+        self.attempts = 0
+        self.outcome = None
+        self.error = None
+        self.duration = 0.0
+        self._started = time.perf_counter()
+
+    def add(self, stage: str, seconds: float):
+        """Add seconds to a stage (stages may run once per attempt)."""
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_bytes(self, kind: str, count: int):
+        """Add to a byte counter, e.g. "request" or "pdf"."""
+        self.bytes[kind] = self.bytes.get(kind, 0) + count
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block into stage `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def finish(self, outcome: str, error: Optional[BaseException] = None):
+        """Mark the render complete and record its total duration."""
+        self.duration = time.perf_counter() - self._started
+        self.outcome = outcome
+        self.error = str(error) if error is not None else None
+
+    def as_dict(self) -> dict:
+        return {
+            "backend": self.backend,
+            "output_path": str(self.output_path) if self.output_path else None,
+            "outcome": self.outcome,
+            "error": self.error,
+            "duration": self.duration,
+            "attempts": self.attempts,
+            "stages": dict(self.stages),
+            "bytes": dict(self.bytes),
+        }
+
+    def __repr__(self):
+        stages = ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.stages.items())
+        return f"RenderTimings({self.backend}, {self.outcome}, {self.duration * 1000:.1f}ms: {stages})"
+
+
+def stage_timer(timings: Optional[RenderTimings], name: str):
+    """Time a block into timings, or do nothing when instrumentation is off."""
+    if timings is None:
+        return _NULL_STAGE
+    return timings.stage(name)
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    return "{" + pairs + "}"
+
+
+def format_metric(
+    name: str, metric_type: str, help_text: str, samples: Iterable[Tuple[dict, float]]
+) -> str:
+    """
+    Format one metric family in the Prometheus text exposition format.
+
+    Args:
+        name: Metric name.
+        metric_type: "counter", "gauge", "histogram" or "summary".
+        help_text: HELP line text.
+        samples: (labels, value) pairs; labels may contain "__name__" to
+            override the sample name (e.g. for _bucket/_sum/_count series).
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        labels = dict(labels)
+        sample_name = labels.pop("__name__", name)
+        lines.append(f"{sample_name}{_labels(**labels)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+class RenderMetrics:
+    """
+    Thread-safe aggregate of RenderTimings, exportable to Prometheus.
+
+    Usage:
+        metrics = RenderMetrics()
+        generator = PDFGenerator(metrics=metrics)
+        ...
+        print(metrics.render_prometheus())
+    """
+
+    def __init__(self, prefix: str = "pdf", buckets: Iterable[float] = DURATION_BUCKETS):
+        """
+        Initialize the aggregate.
+
+        Args:
+            prefix: Prefix for exported metric names.
+            buckets: Upper bounds in seconds of the render duration histogram.
+        """
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.renders: Dict[Tuple[str, str], int] = {}
+        self.attempts = 0
+        self.stage_seconds: Dict[str, float] = {}
+        self.stage_count: Dict[str, int] = {}
+        self.bytes: Dict[str, int] = {}
+        self.duration_sum = 0.0
+        self.duration_count = 0
+        self._bucket_counts = [0] * len(self.buckets)
+
+    def observe(self, timings: RenderTimings):
+        """Fold one finished render in; usable directly as a render hook."""
+        with self._lock:
+            key = (timings.backend, timings.outcome)
+            self.renders[key] = self.renders.get(key, 0) + 1
+            self.attempts += timings.attempts
+            for stage, seconds in timings.stages.items():
+                self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+                self.stage_count[stage] = self.stage_count.get(stage, 0) + 1
+            for kind, count in timings.bytes.items():
+                self.bytes[kind] = self.bytes.get(kind, 0) + count
+            self.duration_sum += timings.duration
+            self.duration_count += 1
+            for index, bound in enumerate(self.buckets):
+                if timings.duration <= bound:
+                    self._bucket_counts[index] += 1
+
+    __call__ = observe
+
+    def snapshot(self) -> dict:
+        """Return a JSON-serializable copy of the aggregates."""
+        with self._lock:
+            return {
+                "renders": [
+                    {"backend": backend, "outcome": outcome, "count": count}
+                    for (backend, outcome), count in sorted(self.renders.items())
+                ],
+                "attempts": self.attempts,
+                "stage_seconds": dict(self.stage_seconds),
+                "stage_count": dict(self.stage_count),
+                "bytes": dict(self.bytes),
+                "duration_sum": self.duration_sum,
+                "duration_count": self.duration_count,
+            }
+
+    def render_prometheus(self) -> str:
+        """Return the aggregates in the Prometheus text exposition format."""
+        p = self.prefix
+        with self._lock:
+            renders = sorted(self.renders.items())
+            stage_seconds = [(stage, self.stage_seconds[stage]) for stage in self._stage_order()]
+            stage_count = dict(self.stage_count)
+            byte_counts = sorted(self.bytes.items())
+            attempts = self.attempts
+            duration_sum = self.duration_sum
+            duration_count = self.duration_count
+            bucket_counts = list(self._bucket_counts)
+
+        buckets = [
+            ({"__name__": f"{p}_render_duration_seconds_bucket", "le": f"{bound:g}"}, count)
+            for bound, count in zip(self.buckets, bucket_counts)
+        ]
+        buckets.append(
+            ({"__name__": f"{p}_render_duration_seconds_bucket", "le": "+Inf"}, duration_count)
+        )
+        buckets.append(({"__name__": f"{p}_render_duration_seconds_sum"}, duration_sum))
+        buckets.append(({"__name__": f"{p}_render_duration_seconds_count"}, duration_count))
+
+        stages = []
+        for stage, seconds in stage_seconds:
+            stages.append(({"__name__": f"{p}_render_stage_seconds_sum", "stage": stage}, seconds))
+            stages.append(
+                ({"__name__": f"{p}_render_stage_seconds_count", "stage": stage}, stage_count[stage])
+            )
+
+        return "".join(
+            [
+                format_metric(
+                    f"{p}_renders_total",
+                    "counter",
+                    "Renders by backend and outcome.",
+                    (({"backend": b, "outcome": o}, count) for (b, o), count in renders),
+                ),
+                format_metric(
+                    f"{p}_render_attempts_total",
+                    "counter",
+                    "Render attempts, including retries.",
+                    [({}, attempts)],
+                ),
+                format_metric(
+                    f"{p}_render_duration_seconds",
+                    "histogram",
+                    "End-to-end render duration.",
+                    buckets,
+                ),
+                format_metric(
+                    f"{p}_render_stage_seconds",
+                    "summary",
+                    "Time spent per render stage.",
+                    stages,
+                ),
+                format_metric(
+                    f"{p}_render_bytes_total",
+                    "counter",
+                    "Bytes by kind: html (document), saved (by optimization), "
+                    "request (sent per attempt), asset (pre-uploaded), pdf (received).",
+                    (({"kind": kind}, count) for kind, count in byte_counts),
+                ),
+            ]
+        )
+
+    def _stage_order(self):
+        known = [stage for stage in STAGES if stage in self.stage_seconds]
+        return known + sorted(set(self.stage_seconds) - set(STAGES))
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Pre-upload HTML optimization.
+Shrinks documents before they are sent for rendering: minifies HTML and CSS
+(leaving <pre>, <textarea> and <script> untouched), drops duplicate <style>
+blocks and downscales oversized data-URI images.
+"""
+
+import io
+import re
+import base64
+import binascii
+import logging
+from typing import Optional, Tuple
+
+try:
+    from PIL import Image
+except ImportError:
+    # Pillow is only required for image downscaling
+    Image = None
+
+try:
+    from .local_renderer import PAGE_SIZES
+except ImportError:
+    from local_renderer import PAGE_SIZES
+
+logger = logging.getLogger("pdf_generator.optimizer")
+
+# Comments, and elements whose content must not be touched by HTML minification
+_SEGMENT = re.compile(
+    r"(<!--.*?-->)|(<(pre|textarea|script|style)\b[^>]*>)(.*?)(</\3\s*>)",
+    re.IGNORECASE | re.DOTALL,
+)
+_TAG = re.compile(r"(<[^>]*>)")
+_TAG_NAME = re.compile(r"<\s*/?\s*([a-zA-Z0-9!]+)")
+_STYLE_ATTR = re.compile(r"""(\sstyle\s*=\s*)("[^"]*"|'[^']*')""", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+# Whitespace next to these tags is never rendered
+_BLOCK_TAGS = frozenset(
+    """
+    !doctype address article aside blockquote body caption col colgroup dd
+    details div dl dt fieldset figcaption figure footer form h1 h2 h3 h4 h5 h6
+    head header hr html li link main meta nav ol p pre section style summary
+    table tbody td tfoot th thead title tr ul
+    """.split()
+)
+
+_CSS_STRING_OR_COMMENT = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)""", re.DOTALL
+)
+_CSS_PUNCTUATION = re.compile(r"\s*([{};,])\s*")
+_CSS_COLON = re.compile(r":\s+")
+
+_DATA_URI = re.compile(r"data:image/(png|jpe?g|webp);base64,([A-Za-z0-9+/]+={0,2})")
+_IMG_TAG = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+_WIDTH_ATTR = re.compile(r"""\swidth\s*=\s*["']?(\d+(?:\.\d+)?)(px)?["'\s>/]""", re.IGNORECASE)
+_WIDTH_STYLE = re.compile(r"(?<![-\w])width\s*:\s*(\d+(?:\.\d+)?)(px|in|cm|mm)", re.IGNORECASE)
+
+CSS_PX_PER_INCH = 96.0
+_UNIT_INCHES = {"px": 1 / CSS_PX_PER_INCH, "in": 1.0, "cm": 1 / 2.54, "mm": 1 / 25.4}
+
+
+def minify_css(css: str) -> str:
+    """
+    Remove comments and insignificant whitespace from CSS.
+
+    Strings are kept verbatim. Whitespace is only removed around braces,
+    semicolons and commas and after colons, so descendant selectors such
+    as "a :hover" and expressions such as calc(1px + 2px) are unchanged.
+    """
+    parts = []
+    position = 0
+    for match in _CSS_STRING_OR_COMMENT.finditer(css):
+        parts.append(_squeeze_css(css[position : match.start()]))
+        if match.group(1):
+            parts.append(match.group(1))
+        position = match.end()
+    parts.append(_squeeze_css(css[position:]))
+    return "".join(parts).strip()
+
+
+def _squeeze_css(css: str) -> str:
+    css = _WHITESPACE.sub(" ", css)
+    css = _CSS_PUNCTUATION.sub(r"\1", css)
+    css = _CSS_COLON.sub(":", css)
+    return css.replace(";}", "}")
+
+
+def _tag_name(tag: str) -> str:
+    match = _TAG_NAME.match(tag)
+    return match.group(1).lower() if match else ""
+
+
+def _minify_text(text: str, after_block: bool, before_block: bool) -> str:
+    """Collapse whitespace in markup outside protected elements."""
+    parts = _TAG.split(text)
+    out = []
+    for index, part in enumerate(parts):
+        if index % 2:
+            # Tag: only its inline style is rewritten
+            out.append(
+                _STYLE_ATTR.sub(
+                    lambda m: m.group(1) + m.group(2)[0] + minify_css(m.group(2)[1:-1]) + m.group(2)[0],
+                    part,
+                )
+            )
+            continue
+        if not part:
+            continue
+        previous_block = (
+            _tag_name(parts[index - 1]) in _BLOCK_TAGS if index > 0 else after_block
+        )
+        next_block = (
+            _tag_name(parts[index + 1]) in _BLOCK_TAGS
+            if index + 1 < len(parts)
+            else before_block
+        )
+        part = _WHITESPACE.sub(" ", part)
+        if previous_block:
+            part = part.lstrip(" ")
+        if next_block:
+            part = part.rstrip(" ")
+        out.append(part)
+    return "".join(out)
+
+
+class OptimizationReport:
+    """Bytes saved by each optimization step for one document."""
+
+    __slots__ = ("original_bytes", "optimized_bytes", "saved", "images_resized")
+
+    def __init__(self, original_bytes: int):
+        self.original_bytes = original_bytes
+        self.optimized_bytes = original_bytes
+        self.saved = {"images": 0, "styles": 0, "minify": 0}
+        self.images_resized = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - self.optimized_bytes
+
+    @property
+    def ratio(self) -> float:
+        """Fraction of the original size removed."""
+        return self.bytes_saved / self.original_bytes if self.original_bytes else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "original_bytes": self.original_bytes,
+            "optimized_bytes": self.optimized_bytes,
+            "bytes_saved": self.bytes_saved,
+            "saved": dict(self.saved),
+            "images_resized": self.images_resized,
+        }
+
+    def __repr__(self):
+        return (
+            f"OptimizationReport({self.original_bytes:,} -> {self.optimized_bytes:,} bytes, "
+            f"-{self.ratio:.1%})"
+        )
+
+
+class HTMLOptimizer:
+    """
+    Shrinks HTML before upload without changing how it renders.
+
+    Usage:
+        optimizer = HTMLOptimizer(max_image_dpi=150)
+        html, report = optimizer.optimize(html, page_format="A4")
+        print(report.bytes_saved)
+    """
+
+    def __init__(
+        self,
+        minify: bool = True,
+        dedupe_styles: bool = True,
+        max_image_dpi: Optional[float] = 150,
+        jpeg_quality: int = 85,
+        min_image_bytes: int = 32 * 1024,
+    ):
+        """
+        Initialize the optimizer.
+
+        Args:
+            minify: Strip comments and collapse whitespace in HTML and CSS.
+            dedupe_styles: Drop <style> blocks identical to an earlier one.
+            max_image_dpi: Downscale data-URI images wider than this many
+                pixels per inch of their printed width (the img width when
+                given, otherwise the page width). None disables image
+                optimization. Requires Pillow.
+            jpeg_quality: Quality used when re-encoding JPEG and WebP images.
+            min_image_bytes: Images smaller than this are left alone.
+        """
+        self.minify = minify
+        self.dedupe_styles = dedupe_styles
+        self.max_image_dpi = max_image_dpi
+        self.jpeg_quality = jpeg_quality
+        self.min_image_bytes = min_image_bytes
+        if max_image_dpi and Image is None:
+            logger.warning(
+                "Pillow is not installed; data-URI images will not be downscaled "
+                "(pip install Pillow)"
+            )
+
+    def optimize(self, html_content: str, page_format: str = "A4") -> Tuple[str, OptimizationReport]:
+        """
+        Optimize a document.
+
+        Args:
+            html_content: HTML to optimize.
+            page_format: Page format the document will be rendered at, used
+                to size images without an explicit width.
+
+        Returns:
+            Tuple of (optimized HTML, OptimizationReport).
+        """
+        report = OptimizationReport(len(html_content.encode("utf-8")))
+        size = report.original_bytes
+
+        if self.max_image_dpi and Image is not None:
+            html_content = self._optimize_images(html_content, page_format, report)
+            new_size = len(html_content.encode("utf-8"))
+            report.saved["images"] = size - new_size
+            size = new_size
+
+        if self.minify or self.dedupe_styles:
+            html_content, styles_saved = self._minify(html_content)
+            new_size = len(html_content.encode("utf-8"))
+            report.saved["styles"] = styles_saved
+            report.saved["minify"] = size - new_size - styles_saved
+            size = new_size
+
+        report.optimized_bytes = size
+        return html_content, report
+
+    def _minify(self, html_content: str) -> Tuple[str, int]:
+        """Minify markup and styles; returns the HTML and bytes saved by style dedup."""
+        out = []
+        seen_styles = set()
+        styles_saved = 0
+        position = 0
+        after_block = True
+        for match in _SEGMENT.finditer(html_content):
+            comment, open_tag, name, body, close_tag = match.groups()
+            # Comments vanish without separating words; <pre>/<style> are blocks
+            boundary = comment is None and name.lower() in _BLOCK_TAGS
+            text = html_content[position : match.start()]
+            if self.minify:
+                text = _minify_text(text, after_block, boundary)
+                if out and out[-1].endswith(" ") and text.startswith(" "):
+                    # Both sides of a removed comment kept their space
+                    text = text[1:]
+            out.append(text)
+            position = match.end()
+            after_block = boundary
+
+            if comment is not None:
+                # Conditional comments carry markup for old browsers: keep them
+                if not self.minify or comment.startswith("<!--[if"):
+                    out.append(comment)
+                continue
+            if name.lower() != "style":
+                out.append(match.group(0))
+                continue
+
+            css = minify_css(body) if self.minify else body
+            block = open_tag + css + close_tag
+            if self.dedupe_styles:
+                key = (open_tag.lower(), css)
+                if key in seen_styles:
+                    styles_saved += len(block.encode("utf-8"))
+                    continue
+                seen_styles.add(key)
+            out.append(block)
+
+        text = html_content[position:]
+        out.append(_minify_text(text, after_block, True) if self.minify else text)
+        return "".join(out), styles_saved
+
+    def _optimize_images(self, html_content: str, page_format: str, report: OptimizationReport) -> str:
+        page_size = PAGE_SIZES.get(page_format.lower(), PAGE_SIZES["a4"])
+        page_width_in = page_size[0] / 72.0
+        done = set()
+
+        def replace(match, width_in):
+            if match.group(0) in done:
+                return match.group(0)
+            replacement = self._optimize_image(match, width_in, report)
+            done.add(replacement)
+            return replacement
+
+        def replace_in_img(tag_match):
+            tag = tag_match.group(0)
+            return _DATA_URI.sub(lambda m: replace(m, self._display_width(tag, page_width_in)), tag)
+
+        # <img> tags first, where an explicit width tells us the printed size
+        html_content = _IMG_TAG.sub(replace_in_img, html_content)
+        # Remaining data URIs (CSS backgrounds etc.) can span the page width
+        return _DATA_URI.sub(lambda m: replace(m, page_width_in), html_content)
+
+    @staticmethod
+    def _display_width(tag: str, page_width_in: float) -> float:
+        """Printed width in inches of an <img>, capped at the page width."""
+        style = _WIDTH_STYLE.search(tag)
+        if style:
+            return min(page_width_in, float(style.group(1)) * _UNIT_INCHES[style.group(2).lower()])
+        attribute = _WIDTH_ATTR.search(tag)
+        if attribute:
+            return min(page_width_in, float(attribute.group(1)) / CSS_PX_PER_INCH)
+        return page_width_in
+
+    def _optimize_image(self, match, width_in: float, report: OptimizationReport) -> str:
+        """Return a smaller data URI for one image, or the original one."""
+        original = match.group(0)
+        if len(match.group(2)) * 3 // 4 < self.min_image_bytes:
+            return original
+        try:
+            data = base64.b64decode(match.group(2), validate=True)
+            image = Image.open(io.BytesIO(data))
+            image.load()
+        except (binascii.Error, ValueError, OSError) as e:
+            logger.debug("Skipping undecodable data-URI image: %s", e)
+            return original
+
+        image_format = image.format
+        max_width = max(1, int(width_in * self.max_image_dpi))
+        resized = image.width > max_width
+        if resized:
+            height = max(1, round(image.height * max_width / image.width))
+            image = image.resize((max_width, height), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        if image_format == "JPEG":
+            if image.mode not in ("RGB", "L", "CMYK"):
+                image = image.convert("RGB")
+            image.save(buffer, "JPEG", quality=self.jpeg_quality, optimize=True)
+        elif image_format == "WEBP":
+            image.save(buffer, "WEBP", quality=self.jpeg_quality)
+        else:
+            image.save(buffer, "PNG", optimize=True)
+        encoded = buffer.getvalue()
+
+        if len(encoded) >= len(data):
+            return original
+        if resized:
+            report.images_resized += 1
+        mime = {"JPEG": "jpeg", "WEBP": "webp"}.get(image_format, "png")
+        return f"data:image/{mime};base64," + base64.b64encode(encoded).decode("ascii")
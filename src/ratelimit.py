@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Client-side rate limiting for Doppio API calls.
+A token bucket keeps the request rate under the plan's quota, shared by all
+threads in a process and, optionally, by every process on the host.
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: fall back to msvcrt byte-range locks
+    fcntl = None
+    import msvcrt
+
+
+class _FileLock:
+    """Exclusive advisory lock on an open file descriptor."""
+
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        else:
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            msvcrt.locking(self.fd, msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+
+
+class RateLimiter:
+    """
+    Token bucket limiting requests per second and renders in flight.
+
+    Share one instance between generators (and threads) to share one budget.
+    Pass lock_file to keep the bucket in a file guarded by an OS file lock,
+    so several processes on one host draw from the same budget. The
+    in-flight limit always applies per process.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+        lock_file: Optional[Path] = None,
+    ):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            rate: Sustained requests per second.
+            burst: Bucket capacity, i.e. requests allowed back to back
+                (defaults to rate, minimum 1).
+            max_in_flight: Maximum concurrent renders (None for unlimited).
+            lock_file: Path of a state file shared between processes.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst if burst is not None else rate))
+        self.max_in_flight = max_in_flight
+        self.lock_file = Path(lock_file) if lock_file else None
+        self.wait_time = 0.0
+        self.acquired = 0
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        # In-memory bucket state: tokens, last refill time, blocked-until time
+        self._state = {"tokens": self.burst, "updated": time.time(), "blocked_until": 0.0}
+        self._fd = None
+        if self.lock_file is not None:
+            self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(str(self.lock_file), os.O_RDWR | os.O_CREAT, 0o644)
+
+    def close(self):
+        """Release the shared state file, if any."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _read_state(self) -> dict:
+        if self._fd is None:
+            return self._state
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        raw = os.read(self._fd, 4096)
+        try:
+            state = json.loads(raw.decode("utf-8"))
+            return {key: float(state[key]) for key in self._state}
+        except (ValueError, KeyError, TypeError):
+            # First use or a torn write: start from a full bucket
+            return dict(self._state)
+
+    def _write_state(self, state: dict):
+        if self._fd is None:
+            self._state = state
+            return
+        data = json.dumps(state).encode("utf-8")
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.ftruncate(self._fd, 0)
+        os.write(self._fd, data)
+
+    @contextmanager
+    def _locked_state(self):
+        with self._lock:
+            if self._fd is None:
+                yield self._read_state()
+                return
+            with _FileLock(self._fd):
+                state = self._read_state()
+                yield state
+                self._write_state(state)
+
+    def _try_take(self) -> float:
+        """Take a token if one is available; otherwise return the wait needed."""
+        with self._locked_state() as state:
+            now = time.time()
+            # No tokens accrue during a backoff: the bucket backoff() emptied
+            # starts refilling only when the block ends, so the callers it
+            # held back do not all fire at once
+            refill_from = max(state["updated"], state["blocked_until"])
+            elapsed = max(0.0, now - refill_from)
+            state["tokens"] = min(self.burst, state["tokens"] + elapsed * self.rate)
+            state["updated"] = now
+
+            if now < state["blocked_until"]:
+                return state["blocked_until"] - now
+            if state["tokens"] >= 1.0:
+                state["tokens"] -= 1.0
+                return 0.0
+            return (1.0 - state["tokens"]) / self.rate
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        started = time.perf_counter()
+        while True:
+            wait = self._try_take()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+        with self._lock:
+            self.acquired += 1
+            self.wait_time += time.perf_counter() - started
+
+    def backoff(self, seconds: float):
+        """
+        Pause every caller sharing this budget for `seconds`.
+
+        Called when the server throttles us anyway, so that all threads and
+        processes back off together instead of each one hitting a 429.
+        """
+        with self._locked_state() as state:
+            state["blocked_until"] = max(state["blocked_until"], time.time() + seconds)
+            state["tokens"] = min(state["tokens"], 0.0)
+
+    @contextmanager
+    def slot(self):
+        """Hold an in-flight slot and a rate token for the duration of a request."""
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            self.acquire()
+            yield
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def stats(self) -> dict:
+        """Return the number of acquisitions and total time spent waiting."""
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "max_in_flight": self.max_in_flight,
+                "acquired": self.acquired,
+                "wait_time": self.wait_time,
+            }
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Retry policy for Doppio API calls.
+Decides which failures are worth retrying and how long to wait between attempts.
+"""
+
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+
+# Statuses that signal throttling or a transient server-side problem
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# Network-level failures that are usually gone on the next attempt
+RETRYABLE_EXCEPTIONS = (
+    requests.exceptions.Timeout,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header into seconds.
+
+    Accepts both the delay-seconds and HTTP-date forms. Returns None when
+    the header is missing or malformed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RenderAttempt:
+    """Timing and outcome of one attempt at a render request."""
+
+    __slots__ = ("number", "duration", "error", "status_code", "delay")
+
+    def __init__(
+        self,
+        number: int,
+        duration: float,
+        error: Optional[str] = None,
+        status_code: Optional[int] = None,
+        delay: float = 0.0,
+    ):
+        self.number = number
+        self.duration = duration
+        self.error = error
+        self.status_code = status_code
+        self.delay = delay
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+    def as_dict(self) -> dict:
+        return {
+            "attempt": self.number,
+            "duration": self.duration,
+            "error": self.error,
+            "status_code": self.status_code,
+            "delay": self.delay,
+        }
+
+    def __repr__(self):
+        outcome = "ok" if self.succeeded else self.error
+        return f"RenderAttempt(#{self.number}, {self.duration:.3f}s, {outcome})"
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, honoring Retry-After."""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        jitter: bool = True,
+        respect_retry_after: bool = True,
+        max_retry_after: float = 120.0,
+        retryable_statuses=RETRYABLE_STATUSES,
+        retryable_exceptions=RETRYABLE_EXCEPTIONS,
+    ):
+        """
+        Initialize the retry policy.
+
+        Args:
+            max_attempts: Total attempts per render, including the first (1 disables retries).
+            backoff_base: Delay in seconds before the first retry; doubles each attempt.
+            backoff_max: Upper bound for the computed backoff delay.
+            jitter: Randomize each delay between 0 and the backoff value.
+            respect_retry_after: Wait for the server's Retry-After when present.
+            max_retry_after: Upper bound for a server-requested delay.
+            retryable_statuses: HTTP statuses that may be retried.
+            retryable_exceptions: Exception types that may be retried.
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+        self.retryable_statuses = frozenset(retryable_statuses)
+        self.retryable_exceptions = tuple(retryable_exceptions)
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """Return True if a failed attempt should be retried."""
+        status_code = getattr(error, "status_code", None)
+        if status_code is not None:
+            return status_code in self.retryable_statuses
+        return isinstance(error, self.retryable_exceptions)
+
+    def compute_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Return the wait in seconds before the attempt following `attempt`.
+
+        Args:
+            attempt: Number of the attempt that just failed (1-based).
+            retry_after: Delay requested by the server, if any.
+        """
+        if self.respect_retry_after and retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
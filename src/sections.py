@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Section-by-section rendering of long documents.
+A document split at its section headings is rendered as one small PDF per
+section, concurrently and cached per section, then merged locally into a
+single PDF with a bookmark per section.
+"""
+
+import os
+import re
+import html
+import shutil
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    from pypdf import PdfWriter
+except ImportError:
+    # pypdf not installed; merge_pdfs() raises when called
+    PdfWriter = None
+
+try:
+    from .cache import RenderCache, render_key
+except ImportError:
+    from cache import RenderCache, render_key
+
+logger = logging.getLogger("pdf_generator.sections")
+
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def split_sections(body_html: str, tag: str = "h2") -> List[Tuple[Optional[str], str]]:
+    """
+    Split an HTML fragment before every <tag> heading.
+
+    Args:
+        body_html: HTML fragment, e.g. converted Markdown.
+        tag: Heading tag that starts a section.
+
+    Returns:
+        (title, html) pairs in document order. The content before the
+        first heading, if any, comes first with a title of None.
+    """
+    heading = re.compile(rf"<{tag}\b[^>]*>(.*?)</{tag}\s*>", re.IGNORECASE | re.DOTALL)
+    parts = re.split(rf"(?=<{tag}\b)", body_html, flags=re.IGNORECASE)
+    sections = []
+    for part in parts:
+        match = heading.match(part)
+        if match is None:
+            if part.strip():
+                sections.append((None, part))
+            continue
+        title = html.unescape(_TAGS.sub("", match.group(1))).strip()
+        sections.append((title, part))
+    return sections
+
+
+def merge_pdfs(parts: Sequence[Tuple[Optional[str], Path]], output_path: Path) -> int:
+    """
+    Concatenate PDFs into one, adding a bookmark at the start of each titled part.
+
+    Args:
+        parts: (bookmark title or None, PDF path) pairs in page order.
+        output_path: Merged PDF; written atomically.
+
+    Returns:
+        Number of pages in the merged PDF.
+
+    Raises:
+        ImportError: If pypdf is not installed.
+    """
+    if PdfWriter is None:
+        raise ImportError("Merging section PDFs requires pypdf: pip install pypdf")
+
+    writer = PdfWriter()
+    for title, path in parts:
+        first_page = len(writer.pages)
+        writer.append(str(path), import_outline=False)
+        if title and len(writer.pages) > first_page:
+            writer.add_outline_item(title, first_page)
+
+    output_path = Path(output_path)
+    fd, tmp_name = tempfile.mkstemp(dir=output_path.parent, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            writer.write(f)
+        os.replace(tmp_name, output_path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    return len(writer.pages)
+
+
+class SectionRenderError(Exception):
+    """Raised when some sections failed; the others are rendered and cached."""
+
+    def __init__(self, failures: dict):
+        # section index -> (title, exception)
+        self.failures = failures
+        names = ", ".join(
+            title or f"section {index + 1}" for index, (title, _) in failures.items()
+        )
+        super().__init__(f"{len(failures)} section(s) failed to render: {names}")
+
+
+class SectionRenderer:
+    """
+    Renders a list of section documents through a PDFGenerator and merges them.
+
+    Each section is cached by its render key (section HTML plus options),
+    so after editing one section only that section is sent to the API.
+
+    Usage:
+        renderer = SectionRenderer(generator)
+        documents = pipeline.section_documents(markdown_text)
+        renderer.render(documents, "carousel.pdf")
+    """
+
+    def __init__(
+        self,
+        generator,
+        cache: Optional[RenderCache] = None,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Initialize the renderer.
+
+        Args:
+            generator: PDFGenerator used for section renders.
+            cache: Section cache (defaults to the generator's cache, or a
+                RenderCache in .pdf_cache/).
+            max_workers: Sections rendered concurrently (defaults to the
+                generator's connection pool size).
+        """
+        self.generator = generator
+        # Not `or`: an empty RenderCache is falsy
+        if cache is None:
+            cache = generator.cache if generator.cache is not None else RenderCache()
+        self.cache = cache
+        self.max_workers = max_workers or generator.doppio_backend.pool_maxsize
+        self.stats = {"sections": 0, "cached": 0, "rendered": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def render(
+        self,
+        sections: Sequence[Tuple[Optional[str], str]],
+        output_filename: str,
+        page_format: str = "A4",
+        print_background: bool = True,
+        wait_for: str = "networkidle0",
+    ) -> Path:
+        """
+        Render sections concurrently and merge them into one PDF.
+
+        Args:
+            sections: (bookmark title or None, complete HTML document) pairs.
+            output_filename: Name of the merged PDF in the output directory.
+            page_format: Page format (A4, Letter, etc.).
+            print_background: Whether to print background graphics.
+            wait_for: Wait condition before rendering.
+
+        Returns:
+            Path to the merged PDF.
+
+        Raises:
+            SectionRenderError: If any section failed. The sections that
+                succeeded are cached, so a re-run renders only the failures.
+        """
+        options = (page_format, print_background, wait_for)
+        output_path = self.generator.output_path(output_filename)
+        parts_dir = Path(tempfile.mkdtemp(prefix=".sections_", dir=self.generator.output_dir))
+
+        def render_section(index: int, html_content: str) -> Tuple[Path, bool]:
+            part_path = parts_dir / f"{index:04d}.pdf"
+            key = render_key(html_content, *options)
+            if self.cache.get(key, part_path):
+                return part_path, True
+            # An absolute path: parts stay out of the output storage's index
+            self.generator.generate_pdf(html_content, str(part_path), *options, use_cache=False)
+            self.cache.put(key, part_path)
+            return part_path, False
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+                futures = [
+                    pool.submit(render_section, index, html_content)
+                    for index, (_, html_content) in enumerate(sections)
+                ]
+
+            failures = {}
+            parts = []
+            cached = 0
+            for index, ((title, _), future) in enumerate(zip(sections, futures)):
+                if future.exception() is not None:
+                    failures[index] = (title, future.exception())
+                    continue
+                part_path, hit = future.result()
+                parts.append((title, part_path))
+                cached += hit
+            self._record(len(sections), cached, len(failures))
+            if failures:
+                raise SectionRenderError(failures)
+
+            pages = merge_pdfs(parts, output_path)
+            if self.generator.storage is not None:
+                self.generator.storage.add(output_filename)
+        finally:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+
+        logger.info(
+            "📑 Merged %d section(s) into %d page(s) (%d rendered, %d from cache)",
+            len(sections),
+            pages,
+            len(sections) - cached,
+            cached,
+        )
+        logger.info("   Saved to: %s", output_path)
+        return output_path
+
+    def _record(self, sections: int, cached: int, failed: int):
+        with self._lock:
+            self.stats["sections"] += sections
+            self.stats["cached"] += cached
+            self.stats["rendered"] += sections - cached - failed
+            self.stats["failed"] += failed
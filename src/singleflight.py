@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Single-flight coalescing of identical concurrent renders.
+While a render for a key is in flight, later callers with the same key wait
+for its result instead of starting their own.
+"""
+
+import os
+import shutil
+import asyncio
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+def copy_output(source: Path, destination: Path):
+    """
+    Copy a coalesced render's PDF to another caller's output path.
+
+    The copy is written to a temporary file and renamed into place, so
+    readers of destination never see a partial PDF.
+    """
+    source, destination = Path(source), Path(destination)
+    if source.resolve() == destination.resolve():
+        return
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=destination.parent, suffix=".part")
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tmp_name)
+        os.replace(tmp_name, destination)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Thread-safe single-flight group.
+
+    The first caller for a key (the leader) runs the function; callers
+    arriving before it finishes block and receive the same result, or the
+    same exception. The key is forgotten as soon as the leader finishes,
+    so later calls run again.
+
+    Usage:
+        flights = SingleFlight()
+        result, shared = flights.do(key, lambda: render(html))
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn for key, or wait for the call already in flight for key.
+
+        Returns:
+            (result, shared): shared is True when the result came from
+            another caller's call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+
+class AsyncSingleFlight:
+    """
+    Single-flight group for coroutines on one event loop.
+
+    The leader's coroutine runs as a task shielded from cancellation, so a
+    cancelled caller does not fail the others waiting on it.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Await factory() for key, or the call already in flight for key.
+
+        Returns:
+            (result, shared): shared is True when the result came from
+            another caller's call.
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task), True
+
+        self.leaders += 1
+        task = asyncio.ensure_future(factory())
+        self._calls[key] = task
+
+        def forget(_):
+            if self._calls.get(key) is task:
+                del self._calls[key]
+            if not task.cancelled():
+                # Mark the error retrieved even if every waiter was cancelled
+                task.exception()
+
+        task.add_done_callback(forget)
+        return await asyncio.shield(task), False
+
+    def stats(self) -> dict:
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Output storage lifecycle: sharded layout, size/age index and eviction.
+Generated PDFs are spread over hashed subdirectories so no directory grows
+huge, and a background sweeper deletes them by age and total size.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path, PurePosixPath
+from typing import Optional, Tuple, Union
+
+logger = logging.getLogger("pdf_generator.storage")
+
+INDEX_NAME = ".storage_index.jsonl"
+
+# A sweep compacts the index once it has this many lines per live entry
+# (and at least COMPACT_MIN_LINES)
+COMPACT_RATIO = 4
+COMPACT_MIN_LINES = 1024
+
+
+class OutputStorage:
+    """
+    Sharded output directory with an index of every file's size and age.
+
+    A file named "report.pdf" is stored at <root>/<shard>/report.pdf, where
+    shard is the first two hex digits of the name's SHA-256 (256
+    subdirectories per level). The location follows from the name alone,
+    so reading a file back needs no index lookup.
+
+    The index is a JSON Lines journal in the root, one line per added or
+    removed file. It is compacted on load, on close, and by the sweeper
+    once it holds COMPACT_RATIO lines per stored file, and rebuilt from the
+    shards if missing. One process should own a storage directory.
+
+    Usage:
+        storage = OutputStorage("output", ttl=86400, max_bytes=1 << 30).start()
+        generator = PDFGenerator(storage=storage)
+        ...
+        storage.close()
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sweep_interval: float = 60.0,
+        levels: int = 1,
+    ):
+        """
+        Open (or create) a storage directory.
+
+        Args:
+            root: Storage directory; created if needed.
+            ttl: Seconds a file is kept after it was added (None: forever).
+            max_bytes: Total size above which the oldest files are evicted
+                (None: unlimited).
+            sweep_interval: Seconds between background sweeps; a sweep also
+                runs as soon as an added file takes the total over max_bytes.
+            levels: Shard directory levels (1: 256 directories, 2: 65,536).
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.levels = max(1, levels)
+        self.index_path = self.root / INDEX_NAME
+        self.total_bytes = 0
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+        # name -> (size, added), oldest first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._journal = None
+        self._journal_lines = 0
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._load()
+
+    @staticmethod
+    def _key(name: Union[str, Path]) -> str:
+        path = PurePosixPath(Path(name).as_posix())
+        if not path.parts or path.is_absolute() or any(part in ("..", ".") for part in path.parts):
+            raise ValueError(f"Invalid output name: {name}")
+        return str(path)
+
+    def shard(self, name: Union[str, Path]) -> str:
+        """Return the shard directory of a file name, e.g. "3f"."""
+        digest = hashlib.sha256(self._key(name).encode("utf-8")).hexdigest()
+        return "/".join(digest[2 * level : 2 * level + 2] for level in range(self.levels))
+
+    def path_for(self, name: Union[str, Path]) -> Path:
+        """
+        Return where a file name is stored.
+
+        Raises:
+            ValueError: If name is absolute or contains "." or "..".
+        """
+        return self.root / self.shard(name) / self._key(name)
+
+    def _load(self):
+        if not self.index_path.exists():
+            self.rebuild()
+            return
+        lines = 0
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn final line from an interrupted run
+                    continue
+                self._forget(entry["name"])
+                if not entry.get("deleted"):
+                    self._remember(entry["name"], entry["size"], entry["added"])
+        self._journal_lines = lines
+        if lines > len(self._entries):
+            self._compact()
+
+    def rebuild(self):
+        """Rebuild the index by scanning the shard directories."""
+        found = []
+        shard_width = 3 * self.levels - 1
+        with os.scandir(self.root) as top:
+            shard_roots = [
+                entry.path
+                for entry in top
+                if entry.is_dir(follow_symlinks=False) and len(entry.name) == 2
+            ]
+        for shard_root in shard_roots:
+            for directory, _, files in os.walk(shard_root):
+                for filename in files:
+                    if filename.endswith((".part", ".tmp")):
+                        # Leftover of an interrupted write
+                        continue
+                    path = os.path.join(directory, filename)
+                    relative = Path(os.path.relpath(path, self.root)).as_posix()
+                    shard, name = relative[:shard_width], relative[shard_width + 1 :]
+                    if self._shard_of(name) != shard:
+                        continue
+                    stat = os.stat(path)
+                    found.append((stat.st_mtime, name, stat.st_size))
+        found.sort()
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+            for added, name, size in found:
+                self._remember(name, size, added)
+            if found or self.index_path.exists():
+                self._compact()
+        if found:
+            logger.info("🗂️  Indexed %d stored file(s) (%.1f MB)", len(found), self.total_bytes / 1e6)
+
+    def _shard_of(self, name: str) -> Optional[str]:
+        try:
+            return self.shard(name)
+        except ValueError:
+            return None
+
+    def _remember(self, name: str, size: int, added: float):
+        self._entries[name] = (size, added)
+        self.total_bytes += size
+
+    def _forget(self, name: str) -> Optional[Tuple[int, float]]:
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self.total_bytes -= entry[0]
+        return entry
+
+    def _append(self, entry: dict):
+        """Append one index line; the caller holds the lock."""
+        if self._journal is None:
+            self._journal = open(self.index_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        self._journal_lines += 1
+
+    def add(self, name: Union[str, Path]):
+        """
+        Record a file written at path_for(name) (replacing any earlier entry).
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        key = self._key(name)
+        size = self.path_for(key).stat().st_size
+        added = time.time()
+        with self._lock:
+            self._forget(key)
+            self._remember(key, size, added)
+            self._append({"name": key, "size": size, "added": added})
+            over_quota = self.max_bytes is not None and self.total_bytes > self.max_bytes
+        if over_quota:
+            self._wake.set()
+
+    def remove(self, name: Union[str, Path]) -> bool:
+        """
+        Delete a stored file and its index entry.
+
+        Returns:
+            True if the file was in the index.
+        """
+        key = self._key(name)
+        with self._lock:
+            entry = self._forget(key)
+            if entry is not None:
+                self._append({"name": key, "deleted": True})
+        self.path_for(key).unlink(missing_ok=True)
+        return entry is not None
+
+    def sweep(self, now: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Evict files older than ttl, then the oldest files while over max_bytes.
+
+        Also compacts the index if it has grown COMPACT_RATIO times longer
+        than the number of stored files.
+
+        Returns:
+            (files, bytes) evicted.
+        """
+        now = time.time() if now is None else now
+        victims = []
+        with self._lock:
+            while self._entries:
+                name, (size, added) = next(iter(self._entries.items()))
+                expired = self.ttl is not None and added < now - self.ttl
+                over_quota = self.max_bytes is not None and self.total_bytes > self.max_bytes
+                if not (expired or over_quota):
+                    break
+                self._forget(name)
+                self._append({"name": name, "deleted": True})
+                victims.append((name, size))
+            self.evicted_files += len(victims)
+            self.evicted_bytes += sum(size for _, size in victims)
+            if self._journal_lines > max(COMPACT_MIN_LINES, COMPACT_RATIO * len(self._entries)):
+                self._compact()
+
+        for name, _ in victims:
+            try:
+                self.path_for(name).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning("⚠️  Could not evict %s: %s", name, e)
+        freed = sum(size for _, size in victims)
+        if victims:
+            logger.info("🧹 Evicted %d file(s), %.1f MB", len(victims), freed / 1e6)
+        return len(victims), freed
+
+    def usage(self) -> dict:
+        """Return file count, total size, oldest file age and eviction totals."""
+        with self._lock:
+            oldest = next(iter(self._entries.values()), None)
+            return {
+                "files": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "oldest_age": time.time() - oldest[1] if oldest else 0.0,
+                "evicted_files": self.evicted_files,
+                "evicted_bytes": self.evicted_bytes,
+            }
+
+    def start(self) -> "OutputStorage":
+        """Start the background sweeper."""
+        if self._thread is None and (self.ttl is not None or self.max_bytes is not None):
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._sweep_forever, name="pdf-storage-sweeper", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def _sweep_forever(self):
+        while True:
+            self._wake.wait(self.sweep_interval)
+            self._wake.clear()
+            if self._stopping:
+                break
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Storage sweep failed")
+
+    def _compact(self):
+        """Rewrite the index with only the current entries; the caller holds the lock."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for name, (size, added) in self._entries.items():
+                    entry = {"name": name, "size": size, "added": added}
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_name, self.index_path)
+            self._journal_lines = len(self._entries)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+    def close(self):
+        """Stop the sweeper and compact the index."""
+        if self._thread is not None:
+            self._stopping = True
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            if self._journal is not None:
+                self._compact()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
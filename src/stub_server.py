@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Local stub of the Doppio direct render endpoint.
+Returns canned PDF bytes so generators can be exercised without the live API,
+with optional latency, response size and error injection for benchmarks.
+"""
+
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# Smallest well-formed single-page PDF, used as the default canned response
+CANNED_PDF = (
+    b"%PDF-1.4\n"
+    b"1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n"
+    b"2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj\n"
+    b"3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] >> endobj\n"
+    b"trailer << /Root 1 0 R >>\n"
+    b"%%EOF\n"
+)
+
+RENDER_PATH = "/v1/render/pdf/direct"
+
+
+def make_pdf_payload(size: int) -> bytes:
+    """
+    Return a well-formed PDF padded with a comment to roughly `size` bytes.
+
+    Used to simulate large rendered documents; never smaller than CANNED_PDF.
+    """
+    body = CANNED_PDF[: -len(b"%%EOF\n")]
+    padding = size - len(CANNED_PDF) - 2
+    if padding <= 0:
+        return CANNED_PDF
+    return body + b"%" + b"x" * padding + b"\n%%EOF\n"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Request handler answering render calls with the server's canned PDF."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # body waits for the client's delayed ACK (~40 ms on Linux)
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+
+        if self.path.split("?", 1)[0] != RENDER_PATH:
+            self._reply(404, b'{"message": "Not found"}', "application/json")
+            return
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self._reply(401, b'{"message": "Unauthorized"}', "application/json")
+            return
+
+        # Accept every upload mode the generator can use
+        try:
+            if self.headers.get("Content-Encoding", "").lower() == "gzip":
+                body = gzip.decompress(body)
+            json.loads(body or b"{}")
+        except (OSError, EOFError):
+            self._reply(400, b'{"message": "Invalid gzip body"}', "application/json")
+            return
+        except ValueError:
+            self._reply(400, b'{"message": "Invalid JSON"}', "application/json")
+            return
+
+        if stub.latency:
+            time.sleep(stub.latency)
+        if stub.should_fail():
+            headers = {}
+            if stub.retry_after is not None:
+                headers["Retry-After"] = f"{stub.retry_after:g}"
+            self._reply(
+                stub.error_status,
+                b'{"message": "Injected failure"}',
+                "application/json",
+                headers,
+            )
+            return
+
+        stub.record_request(body, dict(self.headers))
+        self._reply(200, stub.pdf_bytes, "application/pdf")
+
+    def _reply(self, status: int, payload: bytes, content_type: str, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # Keep test and benchmark output quiet
+        pass
+
+
+class StubDoppioServer:
+    """
+    Threaded HTTP server mimicking POST /v1/render/pdf/direct.
+
+    Usage:
+        with StubDoppioServer() as stub:
+            generator = PDFGenerator(api_key="test", api_url=stub.url)
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        pdf_bytes: Optional[bytes] = None,
+        latency: float = 0.0,
+        payload_size: Optional[int] = None,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        retry_after: Optional[float] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize the stub server.
+
+        Args:
+            host: Interface to bind.
+            port: Port to bind (0 picks a free port).
+            pdf_bytes: Body returned for every successful render.
+            latency: Seconds each render request takes before answering.
+            payload_size: Size in bytes of the generated PDF body; ignored
+                when pdf_bytes is given.
+            error_rate: Fraction of render requests (0-1) answered with
+                error_status instead of a PDF.
+            error_status: HTTP status used for injected failures.
+            retry_after: Retry-After seconds sent with injected failures
+                (None omits the header).
+            seed: Seed for the failure injection, for repeatable runs.
+        """
+        if pdf_bytes is None and payload_size:
+            pdf_bytes = make_pdf_payload(payload_size)
+        self.pdf_bytes = pdf_bytes or CANNED_PDF
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.error_count = 0
+        self.last_request_body = b""
+        self.last_request_headers = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _StubHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.stub = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Render endpoint URL to pass as api_url."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{RENDER_PATH}"
+
+    def record_request(self, body: bytes, headers: Optional[dict] = None):
+        """Record a successfully handled render request (body decompressed)."""
+        with self._lock:
+            self.request_count += 1
+            self.last_request_body = body
+            self.last_request_headers = headers or {}
+
+    def should_fail(self) -> bool:
+        """Decide whether to inject a failure, counting it if so."""
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            if self._random.random() >= self.error_rate:
+                return False
+            self.error_count += 1
+            return True
+
+    def start(self) -> "StubDoppioServer":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down and release its socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
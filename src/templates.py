@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Named HTML templates with data binding.
+Templates are Jinja2 files in the template directory, compiled once and
+kept in memory until the file changes on disk.
+"""
+
+import csv
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+try:
+    import jinja2
+except ImportError:
+    # Jinja2 not installed; raw templates still load, rendering raises
+    jinja2 = None
+
+# Data-bound templates live outside src/, so batch conversion of src/*.html
+# never renders their raw placeholders
+TEMPLATE_DIR = Path(__file__).parent.parent / "templates"
+
+
+def load_records(path: Union[str, Path]) -> Iterator[dict]:
+    """
+    Lazily read data records from a CSV, JSON Lines or JSON file.
+
+    CSV rows become dicts keyed by the header row; JSON Lines files hold
+    one object per line (blank lines are skipped); a .json file holds a
+    list of objects and is read whole.
+
+    Raises:
+        ValueError: For other file types.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+    elif suffix in (".jsonl", ".ndjson"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif suffix == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+    else:
+        raise ValueError(f"Unsupported record file (expected .csv, .jsonl or .json): {path}")
+
+
+class _Entry:
+    __slots__ = ("mtime_ns", "size", "source", "template")
+
+    def __init__(self, mtime_ns: int, size: int, source: str):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.source = source
+        self.template = None
+
+
+class TemplateStore:
+    """
+    In-memory cache of the templates in one directory.
+
+    Each lookup costs one stat() of the file; the source is re-read and
+    recompiled only when its modification time or size changed. Safe to
+    share between threads.
+    """
+
+    def __init__(self, template_dir: Union[str, Path] = TEMPLATE_DIR, strict: bool = True):
+        """
+        Initialize the store.
+
+        Args:
+            template_dir: Directory holding the templates (default: templates/).
+            strict: Raise on variables missing from the data instead of
+                rendering them empty.
+        """
+        self.template_dir = Path(template_dir)
+        self.strict = strict
+        self.reads = 0
+        self.compiles = 0
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._environment = None
+        if jinja2 is not None:
+            self._environment = jinja2.Environment(
+                loader=jinja2.FileSystemLoader(str(self.template_dir)),
+                autoescape=jinja2.select_autoescape(("html", "htm", "xml")),
+                undefined=jinja2.StrictUndefined if strict else jinja2.Undefined,
+                auto_reload=True,
+            )
+
+    def _path(self, name: str) -> Path:
+        root = self.template_dir.resolve()
+        path = (root / name).resolve()
+        if root not in path.parents:
+            raise FileNotFoundError(f"Template not found: {self.template_dir / name}")
+        return path
+
+    def _entry(self, name: str) -> _Entry:
+        path = self._path(name)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Template not found: {path}") from None
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+                return entry
+
+        with open(path, "r", encoding="utf-8") as f:
+            source = f.read()
+        entry = _Entry(stat.st_mtime_ns, stat.st_size, source)
+        with self._lock:
+            self.reads += 1
+            self._entries[name] = entry
+        return entry
+
+    def source(self, name: str) -> str:
+        """
+        Return a template's raw text.
+
+        Raises:
+            FileNotFoundError: If the template does not exist.
+        """
+        return self._entry(name).source
+
+    def get(self, name: str):
+        """
+        Return a template compiled for rendering.
+
+        Raises:
+            FileNotFoundError: If the template does not exist.
+            ImportError: If Jinja2 is not installed.
+        """
+        if self._environment is None:
+            raise ImportError("Rendering templates with data requires Jinja2: pip install Jinja2")
+        entry = self._entry(name)
+        template = entry.template
+        if template is None:
+            template = self._environment.from_string(entry.source)
+            template.name = name
+            with self._lock:
+                self.compiles += 1
+                entry.template = template
+        return template
+
+    def render(self, name: str, data: Optional[dict] = None, **extra) -> str:
+        """
+        Render a template with a data dict.
+
+        Args:
+            name: Template file name, relative to the template directory.
+            data: Values available to the template.
+            **extra: Further values, overriding data.
+
+        Returns:
+            The rendered HTML.
+        """
+        return self.get(name).render({**(data or {}), **extra})
+
+    def clear(self):
+        """Forget every cached template."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"templates": len(self._entries), "reads": self.reads, "compiles": self.compiles}
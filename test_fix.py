@@ -19,7 +19,7 @@ except ImportError:
 base_dir = Path(__file__).parent
 sys.path.insert(0, str(base_dir / "src"))
 
-from generator import PDFGenerator
+from generator import PDFGenerator, configure_logging
 
 
 def test_simple_html():
@@ -131,6 +131,7 @@ def test_simple_html():
 
 def main():
     """Run the test."""
+    configure_logging()
     print("PDF GENERATOR - API FIX TEST")
     print("This script tests if the Doppio API integration is working.")
     print()
@@ -0,0 +1,25 @@
+"""
+Shared pytest setup: modules are imported the way the scripts import them,
+with src/ and the project root on sys.path, and renders go to a local stub
+Doppio server so no network access or API key is needed.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "src"))
+
+from stub_server import StubDoppioServer  # noqa: E402
+
+HTML = "<html><body><h1>Stub test</h1></body></html>"
+
+
+@pytest.fixture
+def stub():
+    """A running stub Doppio server."""
+    with StubDoppioServer() as server:
+        yield server
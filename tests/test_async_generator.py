@@ -0,0 +1,80 @@
+"""AsyncPDFGenerator against the stub Doppio server."""
+
+import asyncio
+
+import pytest
+
+from async_generator import AsyncPDFGenerator
+from backends import DoppioAPIError
+from retry import RetryPolicy
+from stub_server import StubDoppioServer
+
+from conftest import HTML
+
+
+def run(url, coroutine_fn, **kwargs):
+    async def main():
+        async with AsyncPDFGenerator(api_key="test", api_url=url, **kwargs) as generator:
+            return await coroutine_fn(generator)
+
+    return asyncio.run(main())
+
+
+def test_generate_pdf_streams_to_disk(stub, tmp_path):
+    output = tmp_path / "doc.pdf"
+    path = run(stub.url, lambda generator: generator.generate_pdf(HTML, str(output)))
+    assert path == output
+    assert output.read_bytes() == stub.pdf_bytes
+
+
+def test_generate_from_template(stub, tmp_path):
+    output = tmp_path / "template.pdf"
+    run(stub.url, lambda generator: generator.generate_from_template("template.html", str(output)))
+    assert output.exists()
+    assert stub.request_count == 1
+
+
+def test_429_is_retried_then_raises(tmp_path):
+    policy = RetryPolicy(max_attempts=3, backoff_base=0.01, respect_retry_after=False)
+    with StubDoppioServer(error_rate=1.0, error_status=429, retry_after=1) as stub:
+        with pytest.raises(DoppioAPIError) as error:
+            run(
+                stub.url,
+                lambda generator: generator.generate_pdf(HTML, str(tmp_path / "throttled.pdf")),
+                retry_policy=policy,
+            )
+        assert stub.error_count == 3
+    assert error.value.status_code == 429
+    assert error.value.retry_after == 1.0
+    assert error.value.body
+    assert not (tmp_path / "throttled.pdf").exists()
+
+
+def test_transient_failure_is_retried(tmp_path):
+    policy = RetryPolicy(max_attempts=5, backoff_base=0.01, respect_retry_after=False)
+    with StubDoppioServer(error_rate=0.5, seed=3) as stub:
+        paths = run(
+            stub.url,
+            lambda generator: generator.agenerate_many(
+                [{"html_content": f"<p>{n}</p>", "output_filename": str(tmp_path / f"{n}.pdf")}
+                 for n in range(6)]
+            ),
+            retry_policy=policy,
+        )
+        assert stub.error_count > 0
+    assert all(path.exists() for path in paths)
+
+
+def test_concurrent_identical_renders_are_coalesced(tmp_path):
+    async def render_all(generator):
+        paths = await generator.agenerate_many(
+            {"html_content": HTML, "output_filename": str(tmp_path / f"copy{index}.pdf")}
+            for index in range(4)
+        )
+        return paths, generator.coalesce_stats
+
+    with StubDoppioServer(latency=0.3) as stub:
+        paths, stats = run(stub.url, render_all)
+        assert stub.request_count == 1
+    assert stats["coalesced"] == 3
+    assert all(path.exists() for path in paths)
@@ -0,0 +1,68 @@
+"""Mail-merge bulk generation."""
+
+import json
+
+import pytest
+
+from bulk import bulk_generate, failed_indexes
+from generator import PDFGenerator
+from templates import TemplateStore, load_records
+
+
+@pytest.fixture
+def generator(stub, tmp_path):
+    templates = tmp_path / "templates"
+    templates.mkdir()
+    (templates / "letter.html").write_text("<html><body><p>Dear {{ name }}</p></body></html>")
+    with PDFGenerator(api_key="test", api_url=stub.url) as generator:
+        generator.output_dir = tmp_path / "out"
+        generator.templates = TemplateStore(templates)
+        yield generator
+
+
+def _write_records(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+
+def test_records_render_in_order_and_failures_can_be_rerun(generator, stub, tmp_path):
+    records = tmp_path / "records.jsonl"
+    # The second record lacks a field the template needs
+    _write_records(records, [{"name": "Ada"}, {}, {"name": "Grace"}])
+    results = tmp_path / "results.jsonl"
+
+    stats = bulk_generate(
+        generator, "letter.html", records, "letter_{index}.pdf", results, max_workers=2
+    )
+    assert (stats["records"], stats["done"], stats["failed"]) == (3, 2, 1)
+    assert [json.loads(line)["index"] for line in results.read_text().splitlines()] == [0, 1, 2]
+    assert failed_indexes(results) == {1}
+
+    _write_records(records, [{"name": "Ada"}, {"name": "Alan"}, {"name": "Grace"}])
+    stats = bulk_generate(
+        generator, "letter.html", records, "letter_{index}.pdf", results, retry_failed=True
+    )
+    assert (stats["records"], stats["done"]) == (1, 1)
+    assert failed_indexes(results) == set()
+    assert stub.request_count == 3
+    assert sorted(path.name for path in generator.output_dir.iterdir()) == [
+        "letter_0.pdf",
+        "letter_1.pdf",
+        "letter_2.pdf",
+    ]
+
+
+def test_output_names_cannot_escape_the_output_directory(generator, tmp_path):
+    results = tmp_path / "results.jsonl"
+    stats = bulk_generate(generator, "letter.html", [{"name": "../../x"}], "{name}.pdf", results)
+
+    assert stats["failed"] == 1
+    assert "escapes" in json.loads(results.read_text())["error"]
+
+
+def test_csv_records_are_read_lazily(tmp_path):
+    path = tmp_path / "records.csv"
+    path.write_text("name,city\nAda,London\nGrace,Arlington\n")
+    records = load_records(path)
+
+    assert next(records) == {"name": "Ada", "city": "London"}
+    assert [record["name"] for record in records] == ["Grace"]
@@ -0,0 +1,51 @@
+"""Content-addressed render cache."""
+
+import os
+
+from cache import RenderCache, render_key
+from generator import PDFGenerator
+
+from conftest import HTML
+
+
+def test_cache_hit_sends_no_second_request(stub, tmp_path):
+    with PDFGenerator(
+        api_key="test", api_url=stub.url, cache=RenderCache(tmp_path / "cache")
+    ) as generator:
+        first = generator.generate_pdf(HTML, str(tmp_path / "first.pdf"))
+        second = generator.generate_pdf(HTML, str(tmp_path / "second.pdf"))
+
+    assert stub.request_count == 1
+    assert first.read_bytes() == second.read_bytes()
+
+
+def test_options_are_part_of_the_key():
+    assert render_key(HTML) == render_key(HTML, "A4", True)
+    assert render_key(HTML, "A4") != render_key(HTML, "Letter")
+    assert render_key(HTML) != render_key(HTML + " ")
+
+
+def test_get_writes_atomically(tmp_path):
+    cache = RenderCache(tmp_path / "cache")
+    source = tmp_path / "rendered.pdf"
+    source.write_bytes(b"%PDF-1.4 cached")
+    cache.put("k" * 64, source)
+
+    output = tmp_path / "out.pdf"
+    output.write_bytes(b"old")
+    assert cache.get("k" * 64, output)
+    assert output.read_bytes() == b"%PDF-1.4 cached"
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".part")] == []
+    assert not cache.get("m" * 64, tmp_path / "miss.pdf")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction_over_budget(tmp_path):
+    cache = RenderCache(tmp_path / "cache", max_bytes=250)
+    for name in "abc":
+        pdf = tmp_path / f"{name}.pdf"
+        pdf.write_bytes(b"%PDF-" + b"x" * 95)
+        cache.put(name * 64, pdf)
+    assert len(cache) == 2
+    assert cache.total_bytes <= 250
+    assert not cache.get("a" * 64, tmp_path / "evicted.pdf")
@@ -0,0 +1,47 @@
+"""Recursive input discovery and streaming conversion."""
+
+from batch_convert import BatchPDFGenerator, walk_files
+from generator import PDFGenerator
+
+from conftest import HTML
+
+
+def _tree(root, names):
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"{HTML}<!-- {name} -->")
+
+
+def test_walk_order_and_filters(tmp_path):
+    _tree(
+        tmp_path,
+        ["b.html", "a.html", "notes.txt", "sub/c.html", "sub/deep/d.html", "drafts/e.html"],
+    )
+
+    def relative(paths):
+        return [path.relative_to(tmp_path).as_posix() for path in paths]
+
+    assert relative(walk_files(tmp_path, exclude=["drafts"])) == [
+        "a.html",
+        "b.html",
+        "sub/c.html",
+        "sub/deep/d.html",
+    ]
+    assert relative(walk_files(tmp_path, recursive=False)) == ["a.html", "b.html"]
+    assert relative(walk_files(tmp_path, include=["sub/deep/*.html"])) == ["sub/deep/d.html"]
+
+
+def test_threaded_results_keep_input_order_and_mirror_the_tree(stub, tmp_path):
+    sources = tmp_path / "in"
+    _tree(sources, [f"{index}.html" for index in range(6)] + ["sub/x.html"])
+    generator = PDFGenerator(api_key="test", api_url=stub.url)
+    generator.output_dir = tmp_path / "out"
+    with BatchPDFGenerator(generator, jobs=3, manifest=False) as batch:
+        files = list(walk_files(sources))
+        results = list(batch.iter_convert(files, root=sources))
+
+    generator.close()
+    assert [name for name, _, _ in results] == [path.relative_to(sources).as_posix() for path in files]
+    assert all(success for _, success, _ in results)
+    assert (tmp_path / "out" / "sub" / "x.pdf").exists()
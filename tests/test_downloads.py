@@ -0,0 +1,67 @@
+"""Conditional and ranged PDF downloads from the web app."""
+
+import importlib
+import os
+
+import pytest
+
+from storage import OutputStorage
+from web_app.downloads import ContentETags
+
+PDF = b"%PDF-1.4\n" + b"0123456789" * 100 + b"\n%%EOF\n"
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setenv("DOPPIO_API_KEY", "test")
+    web = importlib.import_module("web_app.app")
+    storage = OutputStorage(tmp_path)
+    monkeypatch.setattr(web, "output_storage", storage)
+    monkeypatch.setattr(web, "download_etags", ContentETags())
+
+    path = storage.path_for("report.pdf")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(PDF)
+    storage.add("report.pdf")
+    yield web.app.test_client()
+    storage.close()
+
+
+def test_revalidation_is_answered_with_not_modified(client):
+    first = client.get("/download/report.pdf")
+    assert first.status_code == 200
+    assert first.data == PDF
+    assert "private" in first.headers["Cache-Control"]
+    etag = first.headers["ETag"]
+
+    again = client.get("/download/report.pdf", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+
+
+def test_range_requests_resume_partial_downloads(client):
+    response = client.get("/download/report.pdf", headers={"Range": "bytes=9-18"})
+
+    assert response.status_code == 206
+    assert response.data == PDF[9:19]
+    assert response.headers["Content-Range"] == f"bytes 9-18/{len(PDF)}"
+
+
+def test_unknown_and_escaping_names_are_not_found(client):
+    for url in ("/download/missing.pdf", "/download/.."):
+        response = client.get(url)
+        assert response.status_code == 404
+        assert response.get_json() == {"error": "File not found"}
+
+
+def test_etags_are_memoized_until_the_file_changes(tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(PDF)
+    etags = ContentETags()
+
+    first, _ = etags.get(str(path))
+    assert etags.get(str(path))[0] == first
+    path.write_bytes(PDF + b"changed")
+    os.utime(path, ns=(0, 0))
+    assert etags.get(str(path))[0] != first
+    assert (etags.hits, etags.misses) == (1, 2)
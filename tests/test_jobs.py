@@ -0,0 +1,86 @@
+"""Background job queue: expiry, sweeping and error reporting."""
+
+import threading
+import time
+
+from web_app.jobs import DONE, FAILED, InMemoryJobStore, Job, JobQueue
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_finished_job_without_finish_time_is_not_expired():
+    store = InMemoryJobStore()
+    job = Job({})
+    job.status = DONE
+    store.add(job)
+    assert store.finished_before(time.time() + 10) == []
+
+
+def test_sweep_while_jobs_finish():
+    expired = []
+    jobs = JobQueue(
+        lambda payload: {"n": payload["n"]},
+        workers=4,
+        max_queued=500,
+        ttl=0,
+        on_expire=lambda job: expired.append(job.id),
+    ).start()
+    stop = threading.Event()
+    errors = []
+
+    def sweep():
+        while not stop.is_set():
+            try:
+                jobs.sweep(force=True)
+            except Exception as e:
+                errors.append(e)
+
+    sweepers = [threading.Thread(target=sweep) for _ in range(2)]
+    for thread in sweepers:
+        thread.start()
+    try:
+        submitted = [jobs.submit({"n": n}).id for n in range(300)]
+        wait_for(lambda: len(expired) == len(submitted))
+    finally:
+        stop.set()
+        for thread in sweepers:
+            thread.join()
+        jobs.shutdown()
+
+    assert errors == []
+    assert sorted(expired) == sorted(submitted)
+
+
+def test_idle_queue_expires_jobs_in_background():
+    expired = []
+    jobs = JobQueue(
+        lambda payload: {}, ttl=0.05, sweep_interval=0.05, on_expire=expired.append
+    ).start()
+    try:
+        job = jobs.submit({})
+        wait_for(lambda: expired)
+    finally:
+        jobs.shutdown()
+    assert [expired_job.id for expired_job in expired] == [job.id]
+    assert jobs.store.get(job.id) is None
+
+
+def test_failed_job_records_error():
+    def fail(payload):
+        raise ValueError("bad input")
+
+    jobs = JobQueue(fail).start()
+    try:
+        job = jobs.submit({})
+        wait_for(lambda: jobs.get(job.id).finished)
+    finally:
+        jobs.shutdown()
+    job = jobs.get(job.id)
+    assert job.status == FAILED
+    assert job.error == "bad input"
+    assert job.finished_at >= job.started_at
@@ -0,0 +1,48 @@
+"""Local rendering backend: what it accepts and how "auto" routes documents."""
+
+from generator import PDFGenerator
+from local_renderer import local_render_blockers, render_html_to_pdf
+from markdown_renderer import DOCUMENT_SHELL, PROMPT_SHELL, MarkdownRenderer
+
+MARKDOWN = "# Notes\n\nSome *emphasis*, **bold** and `code`.\n\n- one\n- two\n\n> A quote\n"
+
+
+def test_web_app_shells_render_locally():
+    body = MarkdownRenderer().to_html(MARKDOWN)
+    assert local_render_blockers(DOCUMENT_SHELL.wrap(body)) == []
+    assert local_render_blockers(PROMPT_SHELL.wrap(body), "A4") == []
+    assert render_html_to_pdf(DOCUMENT_SHELL.wrap(body)).startswith(b"%PDF-")
+
+
+def test_class_selectors_are_supported():
+    html = '<style>.note { color: #666; } p.lead { font-weight: bold; }</style><p class="note lead">x</p>'
+    assert local_render_blockers(html) == []
+
+
+def test_selectors_that_could_match_are_blockers():
+    html = '<style>div p { color: red; } #main { color: blue; }</style><div><p id="main">x</p></div>'
+    assert local_render_blockers(html) == [
+        "unsupported CSS selector '#main'",
+        "unsupported CSS selector 'div p'",
+    ]
+    # A rule for elements the document does not contain is moot
+    assert local_render_blockers("<style>tr:last-child td { color: red; }</style><p>x</p>") == []
+
+
+def test_unsupported_page_format_falls_back_to_doppio():
+    html = "<p>Plain text</p>"
+    generator = PDFGenerator(api_key="test", backend="auto")
+    try:
+        assert generator.select_backend(html, "A4").name == "local"
+        assert generator.select_backend(html, "B5").name == "doppio"
+        assert generator.select_backend("<p>😀</p>", "A4").name == "doppio"
+    finally:
+        generator.close()
+
+
+def test_auto_backend_renders_without_network(stub, tmp_path):
+    with PDFGenerator(api_key="test", api_url=stub.url, backend="auto") as generator:
+        generator.generate_pdf("<h1>Local</h1><p>Body</p>", str(tmp_path / "local.pdf"))
+        generator.generate_pdf("<p>😀</p>", str(tmp_path / "remote.pdf"))
+    assert stub.request_count == 1
+    assert (tmp_path / "local.pdf").read_bytes().startswith(b"%PDF-")
@@ -0,0 +1,62 @@
+"""Incremental, resumable batches recorded in the batch manifest."""
+
+from batch_convert import BatchPDFGenerator, source_to_html
+from generator import PDFGenerator
+from manifest import DONE, FAILED, BatchManifest
+
+from conftest import HTML
+
+
+def _convert(stub, tmp_path, source, preprocessor=source_to_html):
+    generator = PDFGenerator(api_key="test", api_url=stub.url)
+    manifest = BatchManifest(tmp_path / "manifest.jsonl")
+    with BatchPDFGenerator(generator, manifest=manifest, preprocessor=preprocessor) as batch:
+        ok, _ = batch.convert_file(source, str(tmp_path / "out.pdf"))
+        skipped = batch.skipped_count
+    manifest.close()
+    generator.close()
+    return ok, skipped
+
+
+def test_unchanged_sources_are_skipped(stub, tmp_path):
+    source = tmp_path / "doc.html"
+    source.write_text(HTML)
+
+    assert _convert(stub, tmp_path, source) == (True, 0)
+    assert _convert(stub, tmp_path, source) == (True, 1)
+    assert stub.request_count == 1
+
+    # Touched but identical: read and hashed, still not rendered
+    source.write_text(HTML)
+    assert _convert(stub, tmp_path, source) == (True, 1)
+    source.write_text(HTML + "<p>edited</p>")
+    assert _convert(stub, tmp_path, source) == (True, 0)
+    assert stub.request_count == 2
+
+
+def test_edit_during_render_is_rendered_next_run(stub, tmp_path):
+    source = tmp_path / "doc.html"
+    source.write_text(HTML)
+
+    def edit_after_read(data, path):
+        path.write_text(HTML + "<p>saved while rendering</p>")
+        return data.decode("utf-8")
+
+    assert _convert(stub, tmp_path, source, edit_after_read) == (True, 0)
+    assert _convert(stub, tmp_path, source) == (True, 0)
+    assert stub.request_count == 2
+
+
+def test_journal_keeps_latest_record_per_source(tmp_path):
+    source = tmp_path / "doc.html"
+    source.write_text(HTML)
+    path = tmp_path / "manifest.jsonl"
+
+    with BatchManifest(path) as manifest:
+        manifest.record(source, FAILED, {}, tmp_path / "out.pdf", error="boom")
+        manifest.record(source, DONE, {}, tmp_path / "out.pdf", "digest")
+
+    assert len(path.read_text().splitlines()) == 1
+    entry = BatchManifest(path).lookup(source)
+    assert entry["status"] == DONE
+    assert entry["error"] is None
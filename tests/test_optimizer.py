@@ -0,0 +1,58 @@
+"""Pre-upload HTML optimization."""
+
+import base64
+import io
+import os
+
+import pytest
+
+from optimizer import HTMLOptimizer, minify_css
+
+
+def test_css_minification_keeps_meaning():
+    css = '/* note */ a :hover { content: "  {x} ; " ;  width: calc(1px + 2px) ; }\n'
+
+    assert minify_css(css) == 'a :hover{content:"  {x} ; ";width:calc(1px + 2px)}'
+
+
+def test_minify_leaves_protected_elements_alone():
+    html = (
+        "<div>\n  <p>Some   <b>bold</b>\n text</p>  <!-- gone -->"
+        "<!--[if IE]><p>old</p><![endif]-->\n"
+        "<pre>  keep\n   this </pre><textarea> a  b </textarea>"
+        "<script>var s = '  x  ';</script></div>"
+    )
+    optimized, report = HTMLOptimizer(max_image_dpi=None).optimize(html)
+
+    assert optimized == (
+        "<div><p>Some <b>bold</b> text</p><!--[if IE]><p>old</p><![endif]-->"
+        "<pre>  keep\n   this </pre><textarea> a  b </textarea>"
+        "<script>var s = '  x  ';</script></div>"
+    )
+    assert report.bytes_saved == len(html) - len(optimized)
+
+
+def test_duplicate_style_blocks_are_dropped():
+    style = "<style>p { color: red; }</style>"
+    optimized, report = HTMLOptimizer(max_image_dpi=None).optimize(style + "<p>x</p>" + style)
+
+    assert optimized == "<style>p{color:red}</style><p>x</p>"
+    assert report.saved["styles"] == len("<style>p{color:red}</style>")
+
+
+def test_oversized_images_are_downscaled_to_their_printed_width():
+    Image = pytest.importorskip("PIL.Image")
+    # Noise compresses badly, so the PNG is well over min_image_bytes
+    image = Image.frombytes("RGB", (1200, 300), os.urandom(1200 * 300 * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    uri = "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    # One inch wide at 150 dpi: at most 150 pixels are needed
+    html = f'<img width="96" src="{uri}">'
+    optimized, report = HTMLOptimizer(max_image_dpi=150).optimize(html)
+
+    assert report.images_resized == 1
+    assert report.saved["images"] > 0
+    data = optimized.split("base64,", 1)[1].split('"', 1)[0]
+    assert Image.open(io.BytesIO(base64.b64decode(data))).size == (150, 38)
@@ -0,0 +1,53 @@
+"""Multi-process batch pipeline."""
+
+import time
+
+from batch_convert import BatchPDFGenerator
+from generator import PDFGenerator
+
+from conftest import HTML
+
+
+def slow_early_files(data, path):
+    """Preprocessor that finishes later files first."""
+    time.sleep(0.05 * (5 - int(path.stem)))
+    return data.decode("utf-8")
+
+
+def _write_inputs(tmp_path, count=5):
+    sources = tmp_path / "in"
+    sources.mkdir()
+    for index in range(count):
+        (sources / f"{index}.html").write_text(f"{HTML}<!-- {index} -->")
+    return sources
+
+
+def test_results_come_out_in_input_order(stub, tmp_path):
+    sources = _write_inputs(tmp_path)
+    generator = PDFGenerator(api_key="test", api_url=stub.url)
+    generator.output_dir = tmp_path / "out"
+    with BatchPDFGenerator(
+        generator, jobs=3, manifest=False, processes=2, preprocessor=slow_early_files
+    ) as batch:
+        files = sorted(sources.iterdir())
+        results = list(batch.iter_convert(files, root=sources))
+
+    generator.close()
+    assert [name for name, _, _ in results] == [f"{index}.html" for index in range(5)]
+    assert all(success for _, success, _ in results)
+    assert stub.request_count == 5
+    assert [stats.name for stats in batch.pipeline_stats] == ["preprocess", "upload"]
+
+
+def test_consumer_can_stop_early(stub, tmp_path):
+    sources = _write_inputs(tmp_path)
+    generator = PDFGenerator(api_key="test", api_url=stub.url)
+    generator.output_dir = tmp_path / "out"
+    with BatchPDFGenerator(generator, manifest=False, processes=1, queue_size=1) as batch:
+        results = batch.iter_convert(sorted(sources.iterdir()), root=sources)
+        first = next(results)
+        # Closing the generator winds the stages down instead of hanging
+        results.close()
+
+    generator.close()
+    assert first[0] == "0.html"
@@ -0,0 +1,59 @@
+"""Client-side token bucket and in-flight limit."""
+
+import threading
+import time
+
+from ratelimit import RateLimiter
+
+
+def test_requests_are_paced_after_the_burst():
+    limiter = RateLimiter(rate=20, burst=2)
+
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    elapsed = time.monotonic() - started
+
+    # Two back to back, then one every 50 ms
+    assert 0.18 <= elapsed < 1.0
+    assert limiter.stats()["acquired"] == 6
+
+
+def test_backoff_blocks_and_accrues_no_tokens():
+    limiter = RateLimiter(rate=10, burst=5)
+    limiter.backoff(0.3)
+
+    started = time.monotonic()
+    limiter.acquire()
+    first = time.monotonic() - started
+    limiter.acquire()
+    second = time.monotonic() - started
+
+    assert first >= 0.28
+    # The bucket restarts empty when the block ends: the next caller
+    # waits for a fresh token instead of spending a burst saved up meanwhile
+    assert second - first >= 0.08
+
+
+def test_max_in_flight_caps_concurrent_slots():
+    limiter = RateLimiter(rate=1000, max_in_flight=2)
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def render():
+        with limiter.slot():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=render) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 2
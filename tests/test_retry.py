@@ -0,0 +1,51 @@
+"""Retry policy and retried renders."""
+
+import pytest
+
+from backends import DoppioAPIError
+from generator import PDFGenerator
+from retry import RetryPolicy, parse_retry_after
+from stub_server import StubDoppioServer
+
+from conftest import HTML
+
+
+def test_429_is_retried_then_raises(tmp_path):
+    policy = RetryPolicy(max_attempts=3, backoff_base=0.01, respect_retry_after=False)
+    with StubDoppioServer(error_rate=1.0, error_status=429, retry_after=1) as stub:
+        with PDFGenerator(api_key="test", api_url=stub.url, retry_policy=policy) as generator:
+            with pytest.raises(DoppioAPIError) as error:
+                generator.generate_pdf(HTML, str(tmp_path / "throttled.pdf"))
+            assert generator.retry_stats["retries"] == 2
+
+        assert stub.error_count == 3
+    assert error.value.status_code == 429
+    assert error.value.retry_after == 1.0
+    assert not (tmp_path / "throttled.pdf").exists()
+
+
+def test_transient_failures_are_retried_to_success(tmp_path):
+    policy = RetryPolicy(max_attempts=6, backoff_base=0.01, respect_retry_after=False)
+    with StubDoppioServer(error_rate=0.5, seed=1) as stub:
+        with PDFGenerator(api_key="test", api_url=stub.url, retry_policy=policy) as generator:
+            for n in range(5):
+                generator.generate_pdf(f"<p>{n}</p>", str(tmp_path / f"{n}.pdf"))
+        assert stub.error_count > 0
+        assert stub.request_count == 5
+
+
+def test_client_errors_are_not_retried(tmp_path):
+    with StubDoppioServer(error_rate=1.0, error_status=400) as stub:
+        with PDFGenerator(api_key="test", api_url=stub.url) as generator:
+            with pytest.raises(DoppioAPIError):
+                generator.generate_pdf(HTML, str(tmp_path / "bad.pdf"))
+        assert stub.error_count == 1
+
+
+def test_delay_honors_retry_after_and_caps_backoff():
+    policy = RetryPolicy(backoff_base=1.0, backoff_max=4.0, jitter=False, max_retry_after=10.0)
+    assert [policy.compute_delay(n) for n in (1, 2, 3, 4)] == [1.0, 2.0, 4.0, 4.0]
+    assert policy.compute_delay(1, retry_after=7.0) == 7.0
+    assert policy.compute_delay(1, retry_after=60.0) == 10.0
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("soon") is None
@@ -0,0 +1,56 @@
+"""Section-by-section rendering and merging."""
+
+import pytest
+from pypdf import PdfReader
+
+from cache import RenderCache
+from generator import PDFGenerator
+from sections import SectionRenderer, SectionRenderError, split_sections
+from stub_server import StubDoppioServer
+
+
+def _document(title, text="Body text."):
+    return f"<html><body><h2>{title}</h2><p>{text}</p></body></html>"
+
+
+def _renderer(tmp_path, **kwargs):
+    generator = PDFGenerator(api_key="test", **kwargs)
+    generator.output_dir = tmp_path
+    return generator, SectionRenderer(generator, cache=RenderCache(tmp_path / "cache"))
+
+
+def test_split_at_headings():
+    sections = split_sections("<p>intro</p><h2>One &amp; two</h2><p>a</p><H2 id=x>Three</H2>b")
+
+    assert [title for title, _ in sections] == [None, "One & two", "Three"]
+    assert sections[1][1] == "<h2>One &amp; two</h2><p>a</p>"
+
+
+def test_sections_merge_with_bookmarks_and_cache(tmp_path):
+    generator, renderer = _renderer(tmp_path, backend="local")
+    sections = [(title, _document(title)) for title in ("Alpha", "Beta", "Gamma")]
+
+    merged = renderer.render(sections, "merged.pdf")
+    reader = PdfReader(str(merged))
+    assert len(reader.pages) == 3
+    assert [item.title for item in reader.outline] == ["Alpha", "Beta", "Gamma"]
+
+    # Only the edited section is rendered again
+    sections[1] = ("Beta", _document("Beta", "Edited."))
+    renderer.render(sections, "merged.pdf")
+    generator.close()
+    assert renderer.stats == {"sections": 6, "cached": 2, "rendered": 4, "failed": 0}
+    assert [path.name for path in tmp_path.iterdir() if path.name.startswith(".sections_")] == []
+
+
+def test_failures_are_reported_per_section(tmp_path):
+    with StubDoppioServer(error_rate=1.0, error_status=400) as server:
+        generator, renderer = _renderer(tmp_path, api_url=server.url)
+        # Same title twice: failures are keyed by position, not title
+        sections = [("Same", _document("Same", "one")), ("Same", _document("Same", "two"))]
+        with pytest.raises(SectionRenderError) as caught:
+            renderer.render(sections, "merged.pdf")
+        generator.close()
+
+    assert sorted(caught.value.failures) == [0, 1]
+    assert not (tmp_path / "merged.pdf").exists()
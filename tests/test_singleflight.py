@@ -0,0 +1,68 @@
+"""Coalescing of identical concurrent renders."""
+
+import threading
+import time
+
+from generator import PDFGenerator
+from singleflight import SingleFlight
+from stub_server import StubDoppioServer
+
+from conftest import HTML
+
+
+def test_concurrent_identical_renders_are_coalesced(tmp_path):
+    callers = 4
+    barrier = threading.Barrier(callers)
+    outputs = [tmp_path / f"copy{index}.pdf" for index in range(callers)]
+
+    with StubDoppioServer(latency=0.3) as stub:
+        with PDFGenerator(api_key="test", api_url=stub.url) as generator:
+
+            def render(output_path):
+                barrier.wait()
+                generator.generate_pdf(HTML, str(output_path))
+
+            threads = [threading.Thread(target=render, args=(path,)) for path in outputs]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert generator.coalesce_stats["coalesced"] == callers - 1
+        assert stub.request_count == 1
+    assert len({path.read_bytes() for path in outputs}) == 1
+
+
+def test_followers_share_the_leaders_error():
+    flights = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def fail():
+        release.wait()
+        raise RuntimeError("render failed")
+
+    def call(fn):
+        try:
+            flights.do("key", fn)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call, args=(fail,))
+    leader.start()
+    while flights.stats()["in_flight"] == 0:
+        time.sleep(0.001)
+    followers = [threading.Thread(target=call, args=(lambda: "not run",)) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    while flights.stats()["coalesced"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert len(errors) == 4
+    assert len({id(error) for error in errors}) == 1
+    assert flights.stats() == {"leaders": 1, "coalesced": 3, "in_flight": 0}
+    # The key is forgotten once the leader finishes
+    assert flights.do("key", lambda: "fresh") == ("fresh", False)
@@ -0,0 +1,63 @@
+"""Sharded output storage: index, sweeps and quota."""
+
+import time
+
+import pytest
+
+from storage import INDEX_NAME, OutputStorage
+
+
+def _store(storage, name, size):
+    path = storage.path_for(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    storage.add(name)
+    return path
+
+
+def test_names_are_sharded_and_checked(tmp_path):
+    storage = OutputStorage(tmp_path)
+    path = storage.path_for("report.pdf")
+
+    assert path.parent.parent == tmp_path
+    assert path.parent.name == storage.shard("report.pdf")
+    for name in ("../escape.pdf", "/abs.pdf", "a/../../b.pdf"):
+        with pytest.raises(ValueError):
+            storage.path_for(name)
+
+
+def test_sweep_evicts_expired_then_oldest_over_quota(tmp_path):
+    storage = OutputStorage(tmp_path, ttl=100, max_bytes=250)
+    old = _store(storage, "old.pdf", 100)
+    first = _store(storage, "first.pdf", 100)
+    second = _store(storage, "second.pdf", 100)
+    third = _store(storage, "third.pdf", 100)
+
+    # Nothing expired yet: only the quota applies, oldest first
+    assert storage.sweep() == (2, 200)
+    assert not old.exists() and not first.exists()
+    assert second.exists() and third.exists()
+
+    # Everything older than ttl goes, whatever the quota
+    assert storage.sweep(now=time.time() + 1000) == (2, 200)
+    assert storage.usage()["files"] == 0
+    assert storage.usage()["evicted_bytes"] == 400
+    storage.close()
+
+
+def test_index_survives_reopen_and_is_rebuilt_if_lost(tmp_path):
+    with OutputStorage(tmp_path) as storage:
+        _store(storage, "a.pdf", 10)
+        _store(storage, "b.pdf", 20)
+        storage.remove("a.pdf")
+
+    # Compacted on close: one line per live file
+    assert len((tmp_path / INDEX_NAME).read_text().splitlines()) == 1
+    reopened = OutputStorage(tmp_path)
+    assert reopened.usage()["files"] == 1 and reopened.total_bytes == 20
+    reopened.close()
+
+    (tmp_path / INDEX_NAME).unlink()
+    rebuilt = OutputStorage(tmp_path)
+    assert rebuilt.usage()["files"] == 1 and rebuilt.total_bytes == 20
+    rebuilt.close()
@@ -0,0 +1,50 @@
+"""Choice of upload mode for render requests."""
+
+import gzip
+import json
+
+import pytest
+
+from backends import DoppioBackend
+
+LARGE_HTML = "<html><body>" + "<p>Repeated paragraph text.</p>" * 2000 + "</body></html>"
+
+
+def test_raw_mode_is_not_accepted():
+    with pytest.raises(ValueError):
+        DoppioBackend("test", upload_modes=["json", "raw"])
+
+
+def test_large_documents_are_compressed():
+    backend = DoppioBackend("test", upload_modes=["json", "gzip"])
+    prepared = backend.prepare(LARGE_HTML)
+    backend.close()
+
+    assert prepared.mode == "gzip"
+    payload = json.loads(gzip.decompress(prepared.body))
+    assert payload["page"]["pdf"]["format"] == "A4"
+
+
+def test_asset_mode_is_costed_by_the_bytes_it_sends():
+    uploads = []
+
+    def uploader(data, content_type):
+        uploads.append(data)
+        return "https://assets.example/doc.html"
+
+    backend = DoppioBackend("test", upload_modes=["json", "asset"], asset_uploader=uploader)
+    document = backend.encode(LARGE_HTML)
+
+    # Not uploaded yet: the HTML itself still has to go up, which beats base64 JSON
+    first = backend.prepare(document)
+    assert first.mode == "asset"
+    assert len(uploads) == 1
+
+    # Uploaded: only the small render request is sent for another option set
+    second = backend.prepare(document, page_format="Letter")
+    backend.close()
+    assert second.mode == "asset"
+    assert len(uploads) == 1
+    assert len(second) < 200
+    assert json.loads(second.body)["page"]["goto"]["url"] == "https://assets.example/doc.html"
+
@@ -5,25 +5,64 @@ Flask web application for PDF generation with Claude-style interface
 
 import os
 import sys
-import markdown
+import uuid
+import atexit
+import logging
 from pathlib import Path
-from flask import Flask, render_template, request, send_file, jsonify
+from flask import Flask, Response, render_template, request, send_file, jsonify
 from werkzeug.utils import secure_filename
 
 # Add parent directory to path to import existing modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from src.generator import PDFGenerator
+from src.generator import PDFGenerator, configure_logging
+from src.markdown_renderer import MarkdownRenderer
+from src.metrics import RenderMetrics, format_metric
+from src.storage import OutputStorage
+from web_app.downloads import ContentETags
+from web_app.jobs import JobQueue, QueueFullError
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'dev-key-change-in-production'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['PDF_JOB_WORKERS'] = int(os.getenv('PDF_JOB_WORKERS', 4))
+app.config['PDF_JOB_QUEUE_SIZE'] = int(os.getenv('PDF_JOB_QUEUE_SIZE', 50))
+app.config['PDF_JOB_TTL'] = int(os.getenv('PDF_JOB_TTL', 3600))  # seconds
+# Generated PDFs are deleted after PDF_OUTPUT_TTL seconds, oldest first above
+# PDF_OUTPUT_MAX_MB in total (0 disables either limit)
+app.config['PDF_OUTPUT_TTL'] = int(os.getenv('PDF_OUTPUT_TTL', 86400))
+app.config['PDF_OUTPUT_MAX_MB'] = int(os.getenv('PDF_OUTPUT_MAX_MB', 1024))
+app.config['PDF_DOWNLOAD_MAX_AGE'] = int(os.getenv('PDF_DOWNLOAD_MAX_AGE', 3600))  # seconds
+# "auto" renders plain documents in-process and the rest through Doppio
+app.config['PDF_BACKEND'] = os.getenv('PDF_BACKEND', 'auto')
+# Hand file bodies to a front-end server (nginx X-Accel-Redirect, Apache mod_xsendfile)
+app.config['USE_X_SENDFILE'] = os.getenv('PDF_X_SENDFILE', '').lower() in ('1', 'true', 'yes', 'on')
+
+configure_logging()
+logger = logging.getLogger("pdf_generator.web")
+
+# Render stage timings, exported at /metrics
+render_metrics = RenderMetrics()
+
+# Sharded output directory, swept in the background by age and total size
+output_dir = Path(__file__).parent.parent / "output"
+output_storage = OutputStorage(
+    output_dir,
+    ttl=app.config['PDF_OUTPUT_TTL'] or None,
+    max_bytes=app.config['PDF_OUTPUT_MAX_MB'] * 1024 * 1024 or None,
+).start()
+atexit.register(output_storage.close)
 
-# Initialize PDF generator
-pdf_generator = PDFGenerator()
+# Initialize PDF generator (its pooled session is shared by all requests)
+pdf_generator = PDFGenerator(
+    metrics=render_metrics, storage=output_storage, backend=app.config['PDF_BACKEND']
+)
+atexit.register(pdf_generator.close)
 
-# Ensure output directory exists
-output_dir = Path(__file__).parent.parent / "output"
-output_dir.mkdir(exist_ok=True)
+# Shared Markdown renderer with precompiled page shells
+markdown_renderer = MarkdownRenderer()
+
+# Content-hash ETags of downloaded PDFs, computed once per file
+download_etags = ContentETags()
 
 def process_markdown_content(content, mode="markdown"):
     """
@@ -31,199 +70,51 @@ def process_markdown_content(content, mode="markdown"):
 
     Args:
         content: Input content (markdown or prompt)
-        mode: "markdown" or "prompt"
+        mode: "markdown" or "prompt"; selects the page shell
 
     Returns:
         HTML content ready for PDF generation
     """
-    if mode == "markdown":
-        # Direct markdown processing
-        html_content = markdown.markdown(content)
-    else:
-        # For prompt mode, treat as simple markdown for now
-        # In a real implementation, you might use AI to enhance formatting
-        html_content = markdown.markdown(content)
-
-    # Apply professional styling (similar to existing template)
-    css = '''<style>
-        :root {
-          --bg: #ffffff;
-          --text: #1a1a1a;
-          --accent: #10b981;
-          --accent-light: #d1fae5;
-          --border: #e5e7eb;
-          --code-bg: #f9fafb;
-          --shadow: rgba(0, 0, 0, 0.05);
-          --font-main: 'Segoe UI', system-ui, -apple-system, sans-serif;
-          --font-mono: 'SF Mono', 'Monaco', 'Inconsolata', monospace;
-        }
-
-        * {
-          margin: 0;
-          padding: 0;
-          box-sizing: border-box;
-        }
-
-        body {
-          font-family: var(--font-main);
-          line-height: 1.6;
-          color: var(--text);
-          background: var(--bg);
-          padding: 2rem;
-          max-width: 800px;
-          margin: 0 auto;
-        }
-
-        @media print {
-          body {
-            padding: 1.5rem;
-            max-width: 100%;
-          }
-          h1, h2, h3 {
-            page-break-after: avoid;
-            page-break-inside: avoid;
-          }
-          pre, code {
-            page-break-inside: avoid;
-          }
-        }
-
-        h1 {
-          font-size: 2.8rem;
-          font-weight: 800;
-          margin: 1rem 0 2rem;
-          color: var(--accent);
-          text-align: center;
-          letter-spacing: -0.02em;
-        }
-
-        h2 {
-          font-size: 2rem;
-          font-weight: 700;
-          margin: 3rem 0 1.5rem;
-          padding: 1rem;
-          background: var(--accent-light);
-          color: var(--text);
-          border-radius: 8px;
-          text-align: center;
-        }
-
-        h3 {
-          font-size: 1.4rem;
-          font-weight: 600;
-          margin: 2rem 0 1rem;
-          color: var(--accent);
-        }
-
-        p, li {
-          margin-bottom: 1rem;
-          font-size: 1.1rem;
-        }
-
-        ul, ol {
-          padding-left: 1.5rem;
-          margin-bottom: 1.2rem;
-        }
-
-        li {
-          margin-bottom: 0.8rem;
-        }
-
-        blockquote {
-          background: var(--accent-light);
-          border-left: 4px solid var(--accent);
-          padding: 1rem 1.2rem;
-          margin: 1.5rem 0;
-          font-style: italic;
-          border-radius: 0 6px 6px 0;
-          font-weight: 500;
-        }
-
-        code {
-          font-family: var(--font-mono);
-          background: var(--code-bg);
-          padding: 0.3rem 0.5rem;
-          border-radius: 4px;
-          font-size: 0.95em;
-        }
-
-        pre {
-          background: var(--code-bg);
-          padding: 1.2rem;
-          border-radius: 8px;
-          overflow-x: auto;
-          margin: 1.5rem 0;
-          font-family: var(--font-mono);
-          font-size: 0.9em;
-          border: 1px solid var(--border);
-        }
-
-        table {
-          width: 100%;
-          border-collapse: collapse;
-          margin: 1.5rem 0;
-        }
-
-        th, td {
-          padding: 0.8rem 1rem;
-          text-align: left;
-          border-bottom: 1px solid var(--border);
-        }
-
-        th {
-          background: var(--accent-light);
-          font-weight: 700;
-          color: var(--accent);
-        }
-
-        tr:last-child td {
-          border-bottom: none;
-        }
-
-        .highlight {
-          background: #fffbeb;
-          padding: 0.2rem 0.4rem;
-          border-radius: 4px;
-          font-weight: 600;
-        }
-
-        .footer {
-          margin-top: 3rem;
-          padding-top: 1.5rem;
-          border-top: 1px solid var(--border);
-          font-size: 0.9rem;
-          color: #666;
-          text-align: center;
-        }
-      </style>'''
-
-    # Create header
-    header = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="UTF-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1.0"/>
-  <title>Generated PDF Document</title>
-  {css}
-</head>
-<body>
-<h1>📄 Generated Document</h1>
-<p style="text-align: center; font-size: 1.2rem; color: #666; margin-bottom: 3rem;">Created with PDF Generation Agent</p>
-'''
-
-    # Add footer
-    footer = '''
-<div class="footer">
-  <p>Generated by PDF Generation Agent</p>
-  <p>Powered by Doppio API</p>
-</div>
-</body>
-</html>
-'''
-
-    # Combine
-    full_html = header + html_content + footer
-    return full_html
+    return markdown_renderer.render(content, shell=mode)
+
+def render_pdf(content, mode="markdown"):
+    """
+    Convert content to HTML and render it to a uniquely named PDF
+
+    Returns:
+        Name of the generated PDF file in the output directory
+    """
+    html_content = process_markdown_content(content, mode)
+    filename = f"generated_{uuid.uuid4().hex[:8]}.pdf"
+
+    pdf_generator.generate_pdf(
+        html_content=html_content,
+        output_filename=filename,
+        page_format="A4",
+        print_background=True
+    )
+    return filename
+
+def run_pdf_job(payload):
+    """Job handler: render a queued request on a background worker"""
+    filename = render_pdf(payload['content'], payload['mode'])
+    return {'filename': filename, 'download_url': f'/download/{filename}'}
+
+def expire_pdf_job(job):
+    """Delete the PDF of an expired job"""
+    if job.result:
+        filename = job.result['filename']
+        output_storage.remove(filename)
+        download_etags.forget(str(output_storage.path_for(filename)))
+
+# Background render queue: requests enqueue and poll instead of blocking a worker
+job_queue = JobQueue(
+    run_pdf_job,
+    workers=app.config['PDF_JOB_WORKERS'],
+    max_queued=app.config['PDF_JOB_QUEUE_SIZE'],
+    ttl=app.config['PDF_JOB_TTL'],
+    on_expire=expire_pdf_job,
+).start()
 
 @app.route('/')
 def index():
@@ -241,20 +132,8 @@ def generate_pdf():
         if not content:
             return jsonify({'error': 'Content is required'}), 400
 
-        # Process content based on mode
-        html_content = process_markdown_content(content, mode)
-
-        # Generate unique filename
-        import uuid
-        filename = f"generated_{uuid.uuid4().hex[:8]}.pdf"
-
-        # Generate PDF
-        output_path = pdf_generator.generate_pdf(
-            html_content=html_content,
-            output_filename=filename,
-            page_format="A4",
-            print_background=True
-        )
+        # Convert and render the PDF in this request
+        filename = render_pdf(content, mode)
 
         return jsonify({
             'success': True,
@@ -262,27 +141,111 @@ def generate_pdf():
             'download_url': f'/download/{filename}'
         })
 
-    except Exception as e:
-        print(f"Error generating PDF: {str(e)}")
+    except Exception:
+        logger.exception("Error generating PDF")
         return jsonify({'error': 'Failed to generate PDF. Please try again.'}), 500
 
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """Queue PDF generation and return a job id immediately"""
+    content = request.form.get('content', '').strip()
+    mode = request.form.get('mode', 'markdown')
+
+    if not content:
+        return jsonify({'error': 'Content is required'}), 400
+
+    try:
+        job = job_queue.submit({'content': content, 'mode': mode})
+    except QueueFullError:
+        response = jsonify({'error': 'Server is busy. Please try again shortly.'})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+
+    status_url = f'/jobs/{job.id}'
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': status_url
+    }), 202, {'Location': status_url}
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Report the status of a queued PDF job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    data = {'job_id': job.id, 'status': job.status}
+    if job.status == 'done':
+        data.update(job.result)
+    elif job.status == 'failed':
+        # The worker logged the failure when it happened
+        data['error'] = 'Failed to generate PDF. Please try again.'
+    return jsonify(data)
+
 @app.route('/download/<filename>')
 def download_file(filename):
-    """Serve the generated PDF file"""
+    """
+    Serve the generated PDF file
+
+    Responses carry a content-hash ETag and Last-Modified, so re-downloads
+    are answered with 304 Not Modified, and Range requests resume partial
+    downloads. The body is sent with the server's zero-copy file wrapper
+    (sendfile) when it has one, or by the front-end server with X-Sendfile.
+    """
     try:
-        file_path = output_dir / filename
-        if file_path.exists():
-            return send_file(
-                file_path,
-                as_attachment=True,
-                download_name=filename,
-                mimetype='application/pdf'
-            )
-        else:
-            return jsonify({'error': 'File not found'}), 404
-    except Exception as e:
+        file_path = str(output_storage.path_for(filename))
+        etag, stat = download_etags.get(file_path)
+    except (ValueError, FileNotFoundError):
+        return jsonify({'error': 'File not found'}), 404
+
+    try:
+        response = send_file(
+            file_path,
+            as_attachment=True,
+            download_name=filename,
+            mimetype='application/pdf',
+            etag=etag,
+            last_modified=stat.st_mtime,
+            max_age=app.config['PDF_DOWNLOAD_MAX_AGE'],
+        )
+    except FileNotFoundError:
+        # Evicted between the stat and the open
+        return jsonify({'error': 'File not found'}), 404
+    except Exception:
+        logger.exception("Error serving download")
         return jsonify({'error': 'Download failed'}), 500
 
+    # Generated PDFs belong to whoever requested them: browser cache only
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Expose render, job queue and output storage metrics in Prometheus text format"""
+    queue_stats = job_queue.stats()
+    usage = output_storage.usage()
+    body = render_metrics.render_prometheus() + "".join(
+        format_metric(
+            f'pdf_jobs_{name}',
+            'gauge',
+            f'Background PDF jobs: {name}.',
+            [({}, queue_stats[name])],
+        )
+        for name in ('queued', 'running', 'workers', 'capacity')
+    ) + "".join(
+        format_metric(f'pdf_output_{name}', metric_type, help_text, [({}, usage[key])])
+        for name, key, metric_type, help_text in (
+            ('files', 'files', 'gauge', 'Generated PDFs in the output storage.'),
+            ('bytes', 'bytes', 'gauge', 'Total size of the generated PDFs.'),
+            ('oldest_age_seconds', 'oldest_age', 'gauge', 'Age of the oldest generated PDF.'),
+            ('evicted_files_total', 'evicted_files', 'counter', 'PDFs evicted by age or size.'),
+            ('evicted_bytes_total', 'evicted_bytes', 'counter', 'Bytes freed by eviction.'),
+        )
+    )
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
 @app.errorhandler(413)
 def too_large(e):
     return jsonify({'error': 'File too large. Maximum size is 16MB.'}), 413
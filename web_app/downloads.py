@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Content-hash validators for downloadable files.
+A file's SHA-256 is computed on its first download and remembered until the
+file's size or modification time changes, so repeat downloads and
+conditional requests cost one stat() instead of a full read.
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+
+class ContentETags:
+    """Thread-safe, size-bounded memo of file path -> content-hash ETag."""
+
+    def __init__(self, max_entries: int = 4096, chunk_size: int = 1024 * 1024):
+        """
+        Initialize the memo.
+
+        Args:
+            max_entries: Files remembered; the least recently used are forgotten.
+            chunk_size: Bytes read at a time while hashing.
+        """
+        self.max_entries = max_entries
+        self.chunk_size = chunk_size
+        self.hits = 0
+        self.misses = 0
+        # path -> (mtime_ns, size, etag), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Tuple[str, os.stat_result]:
+        """
+        Return a file's ETag and its stat result.
+
+        Raises:
+            FileNotFoundError: If path does not exist or is not a file.
+        """
+        stat = os.stat(path)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[2], stat
+            self.misses += 1
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                digest.update(chunk)
+        etag = digest.hexdigest()
+
+        with self._lock:
+            self._entries[path] = (stat.st_mtime_ns, stat.st_size, etag)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag, stat
+
+    def forget(self, path: str):
+        """Drop a file's memoized ETag, e.g. after deleting it."""
+        with self._lock:
+            self._entries.pop(path, None)
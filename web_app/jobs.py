@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Background job queue for PDF generation requests.
+Requests enqueue work and return immediately; a bounded pool of worker
+threads renders the PDFs and records the outcome in a pluggable job store.
+"""
+
+import queue
+import logging
+import threading
+import time
+import uuid
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger("pdf_generator.jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no room for another job."""
+
+
+class Job:
+    """A unit of work and its current state."""
+
+    def __init__(self, payload: dict, job_id: Optional[str] = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.payload = payload
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self) -> dict:
+        """Serializable snapshot, used by the API and by persistent stores."""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "payload": self.payload,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Job":
+        job = cls(data["payload"], job_id=data["job_id"])
+        for key in ("status", "result", "error", "created_at", "started_at", "finished_at"):
+            setattr(job, key, data.get(key))
+        return job
+
+
+class JobStore:
+    """
+    Storage interface for jobs.
+
+    The default InMemoryJobStore keeps jobs in a dict; a persistent store
+    (SQLite, files, ...) only needs to implement these methods, e.g. by
+    round-tripping Job.to_dict()/Job.from_dict().
+    """
+
+    def add(self, job: Job):
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+    def update(self, job: Job):
+        raise NotImplementedError
+
+    def delete(self, job_id: str):
+        raise NotImplementedError
+
+    def finish(self, job: Job, status: str, result=None, error: Optional[str] = None):
+        """
+        Record a job's outcome.
+
+        finished_at is set before the status, so a job that reads as
+        finished always has a finish time.
+        """
+        job.finished_at = time.time()
+        job.result = result
+        job.error = error
+        job.status = status
+        self.update(job)
+
+    def finished_before(self, timestamp: float) -> Iterable[Job]:
+        """Return finished jobs whose finished_at is older than timestamp."""
+        raise NotImplementedError
+
+
+class InMemoryJobStore(JobStore):
+    """Thread-safe, process-local job store."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def add(self, job: Job):
+        with self._lock:
+            self._jobs[job.id] = job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def update(self, job: Job):
+        with self._lock:
+            self._jobs[job.id] = job
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def finish(self, job: Job, status: str, result=None, error: Optional[str] = None):
+        # Jobs are shared objects here: change them under the lock that
+        # finished_before() reads them under
+        with self._lock:
+            job.finished_at = time.time()
+            job.result = result
+            job.error = error
+            job.status = status
+            self._jobs[job.id] = job
+
+    def finished_before(self, timestamp: float) -> Iterable[Job]:
+        with self._lock:
+            return [
+                job
+                for job in self._jobs.values()
+                if job.finished and job.finished_at is not None and job.finished_at < timestamp
+            ]
+
+
+class JobQueue:
+    """
+    Bounded queue drained by a fixed pool of worker threads.
+
+    Finished jobs expire ttl seconds after they finish; a background
+    sweeper expires them every sweep_interval seconds, so an idle server
+    still cleans up, and submit()/get() sweep at most once a second too.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[dict], dict],
+        workers: int = 4,
+        max_queued: int = 100,
+        ttl: float = 3600,
+        store: Optional[JobStore] = None,
+        on_expire: Optional[Callable[[Job], None]] = None,
+        sweep_interval: float = 60.0,
+    ):
+        """
+        Initialize the job queue.
+
+        Args:
+            handler: Called with a job's payload on a worker thread; its
+                return value becomes the job's result.
+            workers: Number of worker threads.
+            max_queued: Jobs allowed to wait before submit() refuses more.
+            ttl: Seconds a finished job is kept before it expires.
+            store: Job store (defaults to InMemoryJobStore).
+            on_expire: Called with each job as it expires, e.g. to delete its output.
+            sweep_interval: Seconds between background sweeps.
+        """
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.ttl = ttl
+        self.store = store or InMemoryJobStore()
+        self.on_expire = on_expire
+        self.sweep_interval = sweep_interval
+        self._queue = queue.Queue(maxsize=max(1, max_queued))
+        self._threads = []
+        self._running = 0
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._stop_sweeper = threading.Event()
+        self._sweeper = None
+
+    def start(self) -> "JobQueue":
+        """Start the worker threads and the expiry sweeper."""
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"pdf-job-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        if self._sweeper is None:
+            self._stop_sweeper.clear()
+            self._sweeper = threading.Thread(
+                target=self._sweep_forever, name="pdf-job-sweeper", daemon=True
+            )
+            self._sweeper.start()
+        return self
+
+    def shutdown(self):
+        """Stop the workers after the jobs already queued, then the sweeper."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._sweeper is not None:
+            self._stop_sweeper.set()
+            self._sweeper.join()
+            self._sweeper = None
+
+    def submit(self, payload: dict) -> Job:
+        """
+        Enqueue a job.
+
+        Raises:
+            QueueFullError: If the queue is at capacity.
+        """
+        self.sweep()
+        job = Job(payload)
+        self.store.add(job)
+        try:
+            self._queue.put_nowait(job.id)
+        except queue.Full:
+            self.store.delete(job.id)
+            raise QueueFullError("Job queue is full")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by id, or None if unknown or expired."""
+        self.sweep()
+        return self.store.get(job_id)
+
+    def sweep(self, force: bool = False):
+        """
+        Expire finished jobs older than ttl (at most once a second).
+
+        Expired jobs are removed from the store under a lock, so each one
+        is handed to on_expire exactly once however many threads sweep.
+        """
+        with self._sweep_lock:
+            now = time.time()
+            if not force and now - self._last_sweep < 1.0:
+                return
+            self._last_sweep = now
+            expired = list(self.store.finished_before(now - self.ttl))
+            for job in expired:
+                self.store.delete(job.id)
+
+        if self.on_expire is None:
+            return
+        for job in expired:
+            try:
+                self.on_expire(job)
+            except Exception:
+                logger.exception("Error expiring job %s", job.id)
+
+    def _sweep_forever(self):
+        while not self._stop_sweeper.wait(self.sweep_interval):
+            try:
+                self.sweep(force=True)
+            except Exception:
+                logger.exception("Job sweep failed")
+
+    def stats(self) -> dict:
+        """Return queue depth and worker utilization."""
+        with self._lock:
+            running = self._running
+        return {
+            "queued": self._queue.qsize(),
+            "running": running,
+            "workers": self.workers,
+            "capacity": self._queue.maxsize,
+        }
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                break
+            job = self.store.get(job_id)
+            if job is None:
+                continue
+
+            job.status = RUNNING
+            job.started_at = time.time()
+            self.store.update(job)
+            with self._lock:
+                self._running += 1
+            try:
+                result = self.handler(job.payload)
+            except Exception as e:
+                logger.exception("Job %s failed", job.id)
+                self.store.finish(job, FAILED, error=str(e))
+            else:
+                self.store.finish(job, DONE, result=result)
+            finally:
+                with self._lock:
+                    self._running -= 1
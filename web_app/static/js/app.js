@@ -104,18 +104,25 @@ async function handleFormSubmit(event) {
         formData.append('content', content);
         formData.append('mode', currentMode);
 
-        // Send request
-        const response = await fetch('/generate-pdf', {
+        // Queue the job; the server renders it in the background
+        const response = await fetch('/jobs', {
             method: 'POST',
             body: formData
         });
 
         const data = await response.json();
 
-        if (response.ok && data.success) {
-            showSuccess(data.download_url);
-        } else {
+        if (!response.ok) {
             showError(data.error || 'Failed to generate PDF');
+            return;
+        }
+
+        const job = await waitForJob(data.status_url);
+
+        if (job.status === 'done') {
+            showSuccess(job.download_url);
+        } else {
+            showError(job.error || 'Failed to generate PDF');
         }
 
     } catch (error) {
@@ -124,6 +131,23 @@ async function handleFormSubmit(event) {
     }
 }
 
+// Poll a job until it finishes
+async function waitForJob(statusUrl) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+
+        if (!response.ok) {
+            return { status: 'failed', error: job.error };
+        }
+        if (job.status === 'done' || job.status === 'failed') {
+            return job;
+        }
+    }
+}
+
 // Show loading state
 function showLoading() {
     hideAllStates();